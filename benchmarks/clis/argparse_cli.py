@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+A command-line interface built with argparse, for comparison with the same interface built with other libraries.
+"""
+
+import argparse
+
+
+def greet(name: str, times: int = 1) -> str:
+    return " ".join([f"Hello, {name}!"] * times)
+
+
+def add(first: int, second: int) -> int:
+    return first + second
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    greet_parser = commands.add_parser("greet", help="Greet someone.")
+    greet_parser.add_argument("name", help="The name of the person to greet.")
+    greet_parser.add_argument("--times", type=int, default=1, help="The number of times to greet them.")
+
+    add_parser = commands.add_parser("add", help="Add two numbers.")
+    add_parser.add_argument("first", type=int, help="The first number.")
+    add_parser.add_argument("second", type=int, help="The second number.")
+
+    args = parser.parse_args()
+
+    if args.command == "greet":
+        print(greet(args.name, args.times))
+    else:
+        print(add(args.first, args.second))
+
+
+if __name__ == "__main__":
+    main()
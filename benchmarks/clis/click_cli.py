@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+A command-line interface built with click, for comparison with the same interface built with other libraries.
+"""
+
+import click
+
+
+@click.group(help=__doc__)
+def main():
+    pass
+
+
+@main.command(help="Greet someone.")
+@click.argument("name")
+@click.option("--times", type=int, default=1, help="The number of times to greet them.")
+def greet(name: str, times: int):
+    click.echo(" ".join([f"Hello, {name}!"] * times))
+
+
+@main.command(help="Add two numbers.")
+@click.argument("first", type=int)
+@click.argument("second", type=int)
+def add(first: int, second: int):
+    click.echo(first + second)
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+A command-line interface built with Clippy, for comparison with the same interface built with other libraries.
+"""
+
+from clippy import clippy, begin_clippy
+
+
+@clippy
+def greet(name: str, times: int = 1) -> str:
+    """
+    Greet someone.
+
+    :param name: The name of the person to greet.
+    :param times: The number of times to greet them.
+    :returns: The greeting.
+    """
+    return " ".join([f"Hello, {name}!"] * times)
+
+
+@clippy
+def add(first: int, second: int) -> int:
+    """
+    Add two numbers.
+
+    :param first: The first number.
+    :param second: The second number.
+    :returns: The sum.
+    """
+    return first + second
+
+
+if __name__ == "__main__":
+    begin_clippy()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+A command-line interface built with docopt, for comparison with the same interface built with other libraries.
+
+Usage:
+    docopt_cli.py greet <name> [--times=<int>]
+    docopt_cli.py add <first> <second>
+    docopt_cli.py --help
+
+Options:
+    --help          Show this screen.
+    --times=<int>   The number of times to greet them. [default: 1]
+"""
+
+from docopt import docopt
+
+
+def greet(name: str, times: int = 1) -> str:
+    return " ".join([f"Hello, {name}!"] * times)
+
+
+def add(first: int, second: int) -> int:
+    return first + second
+
+
+def main():
+    args = docopt(__doc__)
+
+    if args["greet"]:
+        print(greet(args["<name>"], int(args["--times"])))
+    else:
+        print(add(int(args["<first>"]), int(args["<second>"])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Measures the start-up cost of the same command-line interface built with Clippy, argparse, click, and docopt.
+
+Each interface is run as a real subprocess many times, and the following are recorded:
+
+* cold start: wall-clock time with the bytecode caches of this repository removed before each run, as after a fresh checkout;
+  with `--drop-caches` (Linux, as root) the operating system's page cache is also dropped
+* warm start: wall-clock time once bytecode and the filesystem are cached
+* peak resident set size of each run, read from `/proc` within the process (Linux only)
+* a breakdown of import time by top-level package, from `python -X importtime`
+
+Run from the root of the repository:
+
+    python -m benchmarks.cold_start --runs 20 --json bench_output.json
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# each interface: its name, the module to run, and the module it requires (if any), which is skipped when not installed
+INTERFACES = [
+    ("clippy", "benchmarks.clis.clippy_cli", None),
+    ("argparse", "benchmarks.clis.argparse_cli", None),
+    ("click", "benchmarks.clis.click_cli", "click"),
+    ("docopt", "benchmarks.clis.docopt_cli", "docopt"),
+]
+
+# the arguments given to each interface, and the exit status every interface must return for them; every interface implements these commands
+# identically, and a run that returns any other status, such as one that raised an exception, fails the benchmark rather than being timed
+SCENARIOS = [
+    ("command", ["greet", "world", "--times", "2"], 0),
+    ("help", ["--help"], 0),
+]
+
+# written to standard error by the probe below, followed by the peak resident set size in bytes
+PEAK_MARKER = "cold_start peak rss: "
+
+# runs a module as `python -m` does, then reports the high-water resident set size of the process itself; the rusage from waiting on the
+# child cannot be used, as on Linux it includes the memory of the parent at the time of the fork
+PEAK_PROBE = f"""
+import atexit, runpy, sys
+
+def report():
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    sys.stderr.write("{PEAK_MARKER}" + str(int(line.split()[1]) * 1024) + "\\n")
+    except (OSError, ValueError, IndexError):
+        pass
+
+atexit.register(report)
+sys.argv = sys.argv[1:]
+runpy.run_module(sys.argv[0], run_name="__main__", alter_sys=True)
+"""
+
+
+def remove_bytecode() -> None:
+    """Remove the bytecode caches of this repository, so that the next run compiles Clippy and the interfaces from source."""
+    for (root, directories, _) in os.walk(ROOT):
+        if "__pycache__" in directories:
+            shutil.rmtree(os.path.join(root, "__pycache__"), ignore_errors=True)
+            directories.remove("__pycache__")
+
+        directories[:] = [name for name in directories if not name.startswith(".")]
+
+
+def drop_page_cache() -> bool:
+    """
+    Ask the operating system to drop its page cache. Only possible on Linux, as root.
+
+    :returns: True if the cache was dropped.
+    """
+    try:
+        os.sync()
+
+        with open("/proc/sys/vm/drop_caches", "w") as file:
+            file.write("3\n")
+    except (OSError, AttributeError):
+        return False
+
+    return True
+
+
+def run_once(module: str, arguments: List[str], expected: int = 0, extra: Optional[List[str]] = None) -> Tuple[float, Optional[int], str]:
+    """
+    Run an interface in a subprocess.
+
+    :param module: The module to run, as with `python -m`.
+    :param arguments: The arguments to the interface.
+    :param expected: The exit status the run must return. Optional. Defaults to zero.
+    :param extra: Additional arguments to the interpreter, such as `-X importtime`. Optional.
+    :returns: A tuple of wall-clock seconds, peak resident set size in bytes (if available), and standard error.
+    """
+    command = [sys.executable] + (extra or list()) + ["-c", PEAK_PROBE, module] + arguments
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+    _, output = process.communicate()
+    elapsed = time.perf_counter() - start
+
+    lines = output.splitlines(keepends=True)
+    peaks = [int(line[len(PEAK_MARKER):]) for line in lines if line.startswith(PEAK_MARKER)]
+    stderr = "".join(line for line in lines if not line.startswith(PEAK_MARKER))
+
+    if process.returncode != expected:
+        raise RuntimeError(f"python -m {module} {' '.join(arguments)} exited with status {process.returncode}, expected {expected}:\n{stderr}")
+
+    return elapsed, peaks[-1] if peaks else None, stderr
+
+
+def import_breakdown(module: str, arguments: List[str], expected: int, top: int) -> Dict[str, Any]:
+    """
+    Run an interface with `-X importtime` and total the import time of each top-level package.
+
+    :param module: The module to run with `python -m`.
+    :param arguments: The arguments to the interface.
+    :param expected: The exit status the run must return.
+    :param top: The number of packages to report.
+    :returns: The total import time, and the packages that took longest to import, in milliseconds.
+    """
+    _, _, stderr = run_once(module, arguments, expected, ["-X", "importtime"])
+    packages: Dict[str, int] = dict()
+    total = 0
+
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        fields = line.split("|")
+
+        if len(fields) != 3 or not fields[0].split(":")[-1].strip().isdigit():
+            continue
+
+        self_us = int(fields[0].split(":")[-1])
+        package = fields[2].strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+        total += self_us
+
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {"total_ms": total / 1000, "packages_ms": {name: us / 1000 for (name, us) in slowest}}
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """
+    Summarize timings in milliseconds.
+
+    :param samples: Timings in seconds.
+    """
+    ordered = sorted(samples)
+    return {
+        "min_ms": ordered[0] * 1000,
+        "median_ms": statistics.median(ordered) * 1000,
+        "p90_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))] * 1000,
+        "mean_ms": statistics.mean(ordered) * 1000,
+    }
+
+
+def benchmark(module: str, arguments: List[str], expected: int, runs: int, drop_caches: bool, top: int) -> Dict[str, Any]:  # pylint: disable=too-many-arguments
+    """
+    Measure one interface and scenario.
+
+    :param module: The module to run with `python -m`.
+    :param arguments: The arguments to the interface.
+    :param expected: The exit status every run must return.
+    :param runs: The number of cold and warm runs.
+    :param drop_caches: Also drop the page cache before each cold run.
+    :param top: The number of packages in the import breakdown.
+    """
+    cold = list()
+
+    for _ in range(runs):
+        remove_bytecode()
+
+        if drop_caches:
+            drop_page_cache()
+
+        cold.append(run_once(module, arguments, expected)[0])
+
+    # one run to write bytecode and fill the page cache
+    run_once(module, arguments, expected)
+    warm = list()
+    peaks = list()
+
+    for _ in range(runs):
+        elapsed, peak, _ = run_once(module, arguments, expected)
+        warm.append(elapsed)
+
+        if peak is not None:
+            peaks.append(peak)
+
+    return {
+        "cold": dict(summarize(cold), samples_ms=[sample * 1000 for sample in cold]),
+        "warm": dict(summarize(warm), samples_ms=[sample * 1000 for sample in warm]),
+        "peak_rss_mib": max(peaks) / (1024 * 1024) if peaks else None,
+        "imports": import_breakdown(module, arguments, expected, top),
+    }
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+    """
+    Format results as a plain-text table.
+
+    :param results: The results from `benchmark`, with the interface and scenario names added.
+    """
+    header = ["interface", "scenario", "cold median", "warm median", "warm p90", "peak RSS", "imports", "slowest imports"]
+    rows = [header]
+
+    for result in results:
+        rss = result["peak_rss_mib"]
+        slowest = ", ".join(f"{name} {ms:.1f}" for (name, ms) in list(result["imports"]["packages_ms"].items())[:3])
+        rows.append([result["interface"],
+                     result["scenario"],
+                     f"{result['cold']['median_ms']:.1f} ms",
+                     f"{result['warm']['median_ms']:.1f} ms",
+                     f"{result['warm']['p90_ms']:.1f} ms",
+                     f"{rss:.1f} MiB" if rss is not None else "n/a",
+                     f"{result['imports']['total_ms']:.1f} ms",
+                     slowest])
+
+    widths = [max(len(row[idx]) for row in rows) for idx in range(len(header))]
+    return "\n".join("  ".join(cell.ljust(width) for (cell, width) in zip(row, widths)).rstrip() for row in rows)
+
+
+def main() -> None:
+    """Run every available interface and scenario, then print a table and optionally write JSON."""
+    parser = argparse.ArgumentParser(description="Compare the start-up cost of Clippy with argparse, click, and docopt.")
+    parser.add_argument("--runs", type=int, default=10, help="The number of cold and warm runs of each interface.")
+    parser.add_argument("--json", help="Also write the results, including every sample, to this file.")
+    parser.add_argument("--top", type=int, default=8, help="The number of packages in the import breakdown.")
+    parser.add_argument("--drop-caches", action="store_true", help="Drop the page cache before each cold run (Linux, as root).")
+    args = parser.parse_args()
+
+    results = list()
+
+    for (name, module, requirement) in INTERFACES:
+        if requirement and importlib.util.find_spec(requirement) is None:
+            print(f"Skipping {name}: {requirement} is not installed", file=sys.stderr)
+            continue
+
+        for (scenario, arguments, expected) in SCENARIOS:
+            print(f"Running {name} {scenario}...", file=sys.stderr)
+            result = benchmark(module, arguments, expected, args.runs, args.drop_caches, args.top)
+            results.append(dict(result, interface=name, scenario=scenario, arguments=arguments))
+
+    print(format_table(results))
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"python": sys.version, "platform": sys.platform, "runs": args.runs, "results": results}, file, indent=1)
+
+
+if __name__ == "__main__":
+    main()
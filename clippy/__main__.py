@@ -0,0 +1,11 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Runs a module through Clippy, as in `python -m clippy <module> [arguments]`. See `launcher.py`.
+"""
+
+from .launcher import main
+
+if __name__ == "__main__":
+    main()
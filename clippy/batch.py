@@ -0,0 +1,374 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Runs one command line per record of a batch file, as with `python -m tools --clippy-batch records.txt`, and resumes after an interruption
+with `--clippy-resume`.
+
+Each line of the batch file holds a command and its arguments, quoted as in a shell, such as `parse --path "a b.csv"`; blank lines and
+comments beginning with `#` are skipped. Each record is identified by the byte offset at which its line begins. The result of each record is
+written to standard output as a line of JSON holding its offset, a checksum of the result, and the result itself, or the error it raised.
+
+Every record that succeeds is appended to a journal, by default the batch file's path followed by `.journal`, with its offset, a checksum of
+its line, and the checksum of its result. Entries are written and synced to disk in groups, after the results they describe have been
+flushed, so that the journal never claims a record whose result was lost. With `--clippy-resume`, every record in the journal whose line is
+unchanged is skipped; records that failed, and at most the last group of records that succeeded before an interruption, are run again.
+"""
+
+import hashlib
+import json
+import os
+import shlex
+import stat
+import sys
+import time
+import zlib
+from collections.abc import Iterator
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, TextIO, Tuple
+
+from .command_input import STDIN_ARGUMENT
+from .command_module import CommandModule
+from .command_output import to_serializable
+from .dispatch import dispatch_arguments
+from .options import ClippyOptions, OPTION_PREFIX
+
+# the first line of every journal, which is started over if it was written in another format
+JOURNAL_HEADER = "clippy-journal 1\n"
+
+# the suffix added to the batch file's path to name its journal, unless `--clippy-journal` is given
+JOURNAL_SUFFIX = ".journal"
+
+# the number of entries written to the journal at once, unless overridden by the CLIPPY_JOURNAL_GROUP environment variable
+DEFAULT_GROUP_SIZE = 256
+
+# the most seconds an entry waits to be written, so that slow records are not held back for a whole group
+DEFAULT_GROUP_INTERVAL = 1.0
+
+
+def record_checksum(line: bytes) -> str:
+    """
+    Get a checksum identifying the text of a record, so that a record whose line has changed is not skipped on resume.
+
+    :param line: The record's line, as read from the batch file.
+    :returns: The CRC-32 of the line, as eight hexadecimal digits.
+    """
+    return format(zlib.crc32(line.rstrip(b"\r\n")), "08x")
+
+
+def result_checksum(text: str) -> str:
+    """
+    Get a checksum of a record's result, so that the results of a run may be compared with the journal of another.
+
+    :param text: The result, serialized as JSON.
+    :returns: A 128-bit BLAKE2 digest, as hexadecimal digits.
+    """
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def read_records(stream: BinaryIO) -> Iterator[Tuple[int, bytes]]:
+    """
+    Read the records of a batch file. Records are only split into arguments as they are run, by `parse_record`, so that a record that
+    cannot be parsed fails on its own rather than ending the batch.
+
+    :param stream: The batch file, opened in binary mode.
+    :returns: The offset and line of each record, in order, skipping blank lines and comments.
+    """
+    offset = 0
+
+    for line in stream:
+        text = line.strip()
+
+        if text and not text.startswith(b"#"):
+            yield offset, line
+
+        offset += len(line)
+
+
+def parse_record(line: bytes) -> List[str]:
+    """
+    Split a record into its command and arguments.
+
+    :param line: The record's line, as read from the batch file.
+    :returns: The command and arguments, quoted as in a shell, without any trailing comment.
+    """
+    return shlex.split(line.decode("utf-8"), comments=True)
+
+
+def load_journal(path: str) -> Dict[int, Tuple[str, str]]:
+    """
+    Read the records completed by earlier runs.
+
+    :param path: The journal.
+    :returns: The record checksum and result checksum of each completed record, keyed by offset. Nothing is returned if the journal does not
+              exist or is in another format; an entry cut short by an interruption is ignored.
+    """
+    completed: Dict[int, Tuple[str, str]] = dict()
+
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            if file.readline() != JOURNAL_HEADER:
+                return completed
+
+            for line in file:
+                fields = line.split()
+
+                if not line.endswith("\n") or len(fields) != 3 or not fields[0].isdigit():
+                    continue
+
+                completed[int(fields[0])] = (fields[1], fields[2])
+    except FileNotFoundError:
+        pass
+
+    return completed
+
+
+def _sync_stream(stream: Any) -> None:
+    stream.flush()
+
+    # results written to a file are synced with the journal that describes them; pipes and terminals are only flushed
+    try:
+        descriptor = stream.fileno()
+    except (AttributeError, OSError, ValueError):
+        return
+
+    if stat.S_ISREG(os.fstat(descriptor).st_mode):
+        os.fsync(descriptor)
+
+
+class BatchJournal:  # pylint: disable=too-many-instance-attributes
+    """An append-only file of the records that have completed, written and synced to disk in groups."""
+
+    @property
+    def path(self) -> str:
+        """The journal's path."""
+        return self._path
+
+    @property
+    def group_size(self) -> int:
+        """The number of entries written to the journal at once."""
+        return self._group_size
+
+    @property
+    def completed(self) -> Dict[int, Tuple[str, str]]:
+        """The record checksum and result checksum of each record completed by an earlier run, keyed by offset, if resumed."""
+        return self._completed
+
+    def __init__(self,  # pylint: disable=too-many-arguments
+                 path: str,
+                 resume: bool = False,
+                 output_stream: Optional[TextIO] = None,
+                 group_size: Optional[int] = None,
+                 group_interval: float = DEFAULT_GROUP_INTERVAL):
+        """
+        Opens a journal, starting it over unless resuming.
+
+        :param path: The journal's path.
+        :param resume: Keep the entries of earlier runs, rather than starting over. Optional. Defaults to false.
+        :param output_stream: The stream to which results are written, which is flushed before each group of entries is written. Optional.
+                              Defaults to none.
+        :param group_size: The number of entries written at once. Optional. Defaults to the CLIPPY_JOURNAL_GROUP environment variable if set,
+                           otherwise 256.
+        :param group_interval: The most seconds an entry waits to be written. Optional. Defaults to one second.
+        """
+        if not isinstance(path, str):
+            raise TypeError(f"Parameter path must be a string, received {type(path)}")
+
+        if group_size is None:
+            group_size = int(os.environ.get("CLIPPY_JOURNAL_GROUP", DEFAULT_GROUP_SIZE))
+
+        if not isinstance(group_size, int):
+            raise TypeError(f"Parameter group_size must be an integer, received {type(group_size)}")
+
+        if group_size < 1:
+            raise ValueError(f"Parameter group_size must be positive, received {group_size}")
+
+        self._path = path
+        self._group_size = group_size
+        self._group_interval = group_interval
+        self._output = output_stream
+        self._completed = load_journal(path) if resume else dict()
+        self._pending: List[str] = list()
+        self._last_sync = time.monotonic()
+
+        if self._completed:
+            self._file = open(path, "a+", encoding="utf-8")  # pylint: disable=consider-using-with
+
+            # an entry cut short by an interruption is ended, so that the next entry begins on a line of its own
+            self._file.seek(max(0, self._file.tell() - 1))
+
+            if self._file.read(1) != "\n":
+                self._file.write("\n")
+        else:
+            self._file = open(path, "w", encoding="utf-8")  # pylint: disable=consider-using-with
+            self._file.write(JOURNAL_HEADER)
+
+        self._sync_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __str__(self):
+        return self.__repr__()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._path!r}, {self._group_size!r})"
+
+    def is_completed(self, offset: int, line: bytes) -> bool:
+        """
+        Check whether an earlier run completed a record.
+
+        :param offset: The record's offset in the batch file.
+        :param line: The record's line, which must be unchanged since it completed.
+        :returns: True if the record may be skipped.
+        """
+        entry = self._completed.get(offset)
+        return entry is not None and entry[0] == record_checksum(line)
+
+    def append(self, offset: int, line: bytes, checksum: str) -> None:
+        """
+        Record that a record has completed. Entries are written once a group is full, or once the oldest has waited long enough.
+
+        :param offset: The record's offset in the batch file.
+        :param line: The record's line.
+        :param checksum: The checksum of the record's result.
+        """
+        self._pending.append(f"{offset} {record_checksum(line)} {checksum}\n")
+
+        if len(self._pending) >= self._group_size or time.monotonic() - self._last_sync >= self._group_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        """Write every pending entry and sync it to disk, after flushing the results it describes."""
+        if not self._pending:
+            return
+
+        if self._output is not None:
+            _sync_stream(self._output)
+
+        self._file.write("".join(self._pending))
+        self._pending = list()
+        self._sync_file()
+
+    def close(self) -> None:
+        """Write every pending entry and close the journal."""
+        if self._file.closed:
+            return
+
+        try:
+            self.sync()
+        finally:
+            self._file.close()
+
+    def _sync_file(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+
+
+def journal_path(options: ClippyOptions) -> Optional[str]:
+    """
+    Get the journal for a batch run.
+
+    :param options: The Clippy options, including `--clippy-batch` and, optionally, `--clippy-journal`.
+    :returns: The journal given with `--clippy-journal`, or the batch file's path followed by `.journal`, or None if the batch is read from
+              standard input and no journal was given.
+    """
+    if options.journal:
+        return options.journal
+
+    if options.batch is None or options.batch == STDIN_ARGUMENT:
+        return None
+
+    return options.batch + JOURNAL_SUFFIX
+
+
+def run_record(command_module: CommandModule, line: bytes, options: ClippyOptions) -> str:
+    """
+    Run a single record.
+
+    :param command_module: The module containing the commands.
+    :param line: The record's line, holding its command and arguments.
+    :param options: The Clippy options applied to every record.
+    :returns: The result, serialized as JSON.
+    """
+    result = dispatch_arguments(command_module, parse_record(line), options)
+
+    # help or an error was returned instead of running a command
+    if not result.invoked:
+        raise ValueError(result.output)
+
+    value = result.value
+
+    # iterators are consumed here, so that errors raised while producing them are reported for this record
+    if isinstance(value, Iterator):
+        value = list(value)
+
+    return json.dumps(value, default=to_serializable)
+
+
+def _run_records(command_module: CommandModule,
+                 records: Iterable[Tuple[int, bytes]],
+                 options: ClippyOptions,
+                 output: TextIO,
+                 journal: Optional[BatchJournal]) -> int:
+    failures = 0
+
+    for (offset, line) in records:
+        if journal is not None and journal.is_completed(offset, line):
+            continue
+
+        try:
+            text = run_record(command_module, line, options)
+        except Exception as error:  # pylint: disable=broad-except
+            # a failed record is reported and left out of the journal, so that it runs again on resume
+            failures += 1
+            output.write(json.dumps({"offset": offset, "error": f"{type(error).__name__}: {error}"}) + "\n")
+            continue
+
+        checksum = result_checksum(text)
+        output.write(f'{{"offset": {offset}, "checksum": "{checksum}", "result": {text}}}\n')
+
+        if journal is not None:
+            journal.append(offset, line, checksum)
+
+    return failures
+
+
+def run_batch(command_module: CommandModule, options: ClippyOptions, output_stream: Optional[TextIO] = None) -> int:
+    """
+    Run every record of the batch file given with `--clippy-batch`.
+
+    :param command_module: The module containing the commands.
+    :param options: The Clippy options, including `--clippy-batch`, `--clippy-journal`, and `--clippy-resume`; the rest apply to every record.
+    :param output_stream: The stream to which results are written. Optional. Defaults to standard output.
+    :returns: The exit status; zero if every record succeeded, non-zero if any failed.
+    """
+    if options.batch is None:
+        raise ValueError(f"Option {OPTION_PREFIX}batch is required to run a batch")
+
+    path = journal_path(options)
+
+    if path is None and options.resume:
+        raise ValueError(f"Option {OPTION_PREFIX}resume requires {OPTION_PREFIX}journal when the batch is read from standard input")
+
+    output = output_stream if output_stream is not None else sys.stdout
+
+    # commands that print would corrupt the results, so their output is sent to standard error while the batch runs
+    previous, sys.stdout = sys.stdout, sys.stderr
+
+    try:
+        with open(options.batch, "rb") if options.batch != STDIN_ARGUMENT else open(sys.stdin.fileno(), "rb", closefd=False) as stream:
+            if path is None:
+                failures = _run_records(command_module, read_records(stream), options, output, None)
+            else:
+                with BatchJournal(path, options.resume, output) as journal:
+                    failures = _run_records(command_module, read_records(stream), options, output, journal)
+
+        output.flush()
+    finally:
+        sys.stdout = previous
+
+    return 1 if failures else 0
@@ -5,82 +5,140 @@
 Clippy (Command Line Interface Parser for Python) crawls the abstract syntax tree (AST) of a Python file and generates a simple command-line interface.
 
 Any function annotated with `@clippy` will have it's name, parameters, type annotation, and documentation parsed to generate commands.
+
+This module is imported by every module that uses `@clippy`, so it avoids importing anything beyond `sys` at load time; the parsing machinery
+is only imported once `begin_clippy` is called.
 """
 
 import sys
-from typing import Callable, Optional, List
 
-from .command_module import create_command_module
+TYPE_CHECKING = False
+
+if TYPE_CHECKING:
+    from typing import Callable, Optional, List  # pylint: disable=unused-import
+
 
+# the ways in which a command's input file may be split to run on parts of the file in parallel
+SPLIT_MODES = ["lines"]
 
-def clippy(func: Callable) -> Callable:
+
+def clippy(func: "Optional[Callable]" = None,  # pylint: disable=too-many-arguments
+           *,
+           cache: bool = False,
+           ttl: "Optional[float]" = None,
+           split: "Optional[str]" = None,
+           reduce: "Optional[Callable]" = None) -> "Callable":
     """
     Use this as an attribute on a function via `@clippy` to mark a function as available on the command line.
 
+    Settings may also be given, as in `@clippy(cache=True)`.
+
     :param func: A callable function; passed by Python when used as a function attribute.
-    :returns: The given function.
+    :param cache: Store results on disk and reuse them when the command is called again with the same arguments. Only use this for commands
+                  whose result depends on nothing but their arguments. Optional. Defaults to false.
+    :param ttl: The number of seconds for which a stored result may be reused. Optional. Defaults to no limit.
+    :param split: With `--clippy-jobs`, run the command on parts of its input file at once, in separate processes. The only mode is "lines",
+                  which splits the file between lines; the command must give the same result for a file as `reduce` gives for the results of
+                  its parts. Requires `reduce`. Optional. Defaults to running the command once on the whole file.
+    :param reduce: Combines the results of two consecutive parts into one, as for `functools.reduce`, such as `operator.add`. Required with
+                   `split`, so that the command returns the same type of result however many parts its input is cut into.
+    :returns: The given function, or a decorator if no function was given.
     """
+    if func is None:
+        return lambda decorated: clippy(decorated, cache=cache, ttl=ttl, split=split, reduce=reduce)
+
+    if ttl is not None:
+        if not isinstance(ttl, (int, float)) or isinstance(ttl, bool):
+            raise TypeError(f"Parameter ttl must be a number if provided, received {type(ttl)}.")
+
+        if ttl <= 0:
+            raise ValueError(f"Parameter ttl must be positive if provided, received {ttl}.")
+
+    if split is not None and split not in SPLIT_MODES:
+        raise ValueError(f"Parameter split must be one of {', '.join(SPLIT_MODES)} if provided, received {split!r}.")
+
+    if reduce is not None and not callable(reduce):
+        raise TypeError(f"Parameter reduce must be callable if provided, received {type(reduce)}.")
+
+    if split is not None and reduce is None:
+        raise ValueError("Parameter reduce must be provided with split, to combine the results of each part.")
+
     setattr(func, "is_clippy_command", True)
+    setattr(func, "clippy_settings", {"cache": bool(cache), "ttl": ttl, "split": split, "reduce": reduce})
     return func
 
 
-def begin_clippy(arguments: Optional[List[str]] = None) -> None:
+def begin_clippy(arguments: "Optional[List[str]]" = None) -> None:
     """
     Invoke Clippy to parse the calling module and generate command-line arguments.
 
     :param arguments: The arguments to the program. Optional. Defaults to `sys.argv`.
     """
+    from contextlib import ExitStack  # pylint: disable=import-outside-toplevel
+    from .command_module import create_command_module  # pylint: disable=import-outside-toplevel
+    from .command_output import default_format, write_output  # pylint: disable=import-outside-toplevel
+    from .dispatch import dispatch_arguments, enabled_metrics, phase_timer  # pylint: disable=import-outside-toplevel
+    from .options import split_clippy_options  # pylint: disable=import-outside-toplevel
+
     if arguments is None:
         arguments = sys.argv
 
-    command_module = create_command_module()
-
-    # if no args are given, print available commands and exit (with an error code)
-    if len(arguments) < 2:
-        print(command_module.help())
-        sys.exit(1)
-
-    # read the command, which is just the first argument
-    command = arguments[1]
-
-    # if the user requested help intentionally, print available commands and exit (with a success code)
-    if command == "--help":
-        print(command_module.help())
-        sys.exit(0)
-
-    # the version command is only valid if the module has a __version__ attribute
-    if command == "--version":
-        if command_module.has_version:
-            print(f"{command_module.name} v{command_module.version}")
-            sys.exit(0)
-        else:
-            print(f"Module {command_module.name} has no version information")
-            sys.exit(1)
-
-    # handle unrecognized commands; future versions could try to auto-correct, but that seems fraught with peril
-    if command not in command_module.commands.keys():
-        # we explicitly encode as utf-8 here in case Windows gave us an invalid string
-        print("Unrecognized command {}".format(command))
+    # options are checked before anything runs, so that a mistyped option does not surface only after a command has had its effects
+    try:
+        options, remaining = split_clippy_options(list(arguments[1:]))
+    except ValueError as error:
+        print(error)
         sys.exit(1)
 
-    # get the specified command from the list of commands
-    target_command = command_module.commands[command]
-
-    # read the provided arguments to the command
-    param_pairs = target_command.parse_arguments(arguments[2:])
-
-    # print help info if requested
-    if "help" in param_pairs:
-        print(target_command.help(command_module.name))
-        sys.exit(0)
-
-    # verify that we have all required arguments
-    target_command.validate_arguments(param_pairs)
-
-    # finally, invoke the desired command with all given arguments
-    output = target_command.call(param_pairs)
-
-    if output is None:
-        print("Done.")
-    else:
-        print(output)
+    with ExitStack() as stack:
+        # otherwise, only the command itself is profiled, within dispatch
+        if options.profile_load:
+            from .profiling import create_profiler  # pylint: disable=import-outside-toplevel
+            profiler = create_profiler(options, remaining[0] if remaining else "module")
+
+            if profiler is not None:
+                stack.enter_context(profiler)
+
+        command_module = create_command_module()
+
+        # serve requests from pre-forked workers instead of running a single command
+        if options.zygote:
+            from .zygote import ZygoteServer  # pylint: disable=import-outside-toplevel
+            stack.close()
+            ZygoteServer(command_module, options.zygote).serve_forever()
+            return
+
+        # serve every command over HTTP instead of running a single command
+        if options.serve:
+            from .http_server import serve  # pylint: disable=import-outside-toplevel
+            stack.close()
+            serve(command_module, options.serve, options)
+            return
+
+        # serve commands as a JSON-RPC co-process instead of running a single command
+        if options.rpc:
+            from .rpc import serve as serve_rpc  # pylint: disable=import-outside-toplevel
+            stack.close()
+            serve_rpc(command_module, options)
+            return
+
+        # run one command line per record of a batch file instead of running a single command
+        if options.batch:
+            from .batch import run_batch  # pylint: disable=import-outside-toplevel
+            stack.close()
+            status = run_batch(command_module, options)
+
+            if status:
+                sys.exit(status)
+
+            return
+
+        result = dispatch_arguments(command_module, remaining, options)
+
+    # help, version, and errors are printed with the exit status for the result
+    if not result.invoked:
+        print(result.output)
+        sys.exit(result.status)
+
+    with phase_timer(enabled_metrics(options), result.command.name if result.command else "", "output"):
+        write_output(result.value, options.format or default_format(result.command.return_value if result.command else None))
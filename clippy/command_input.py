@@ -0,0 +1,394 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Reads file parameters, annotated as `bytes`, `memoryview`, `typing.BinaryIO`, or `typing.TextIO`, from a file or standard input without a
+temporary file.
+
+An argument of `-`, or no argument at all, reads standard input; any other argument is the path of a file to read. A `memoryview` of a
+regular file is memory-mapped, so nothing is copied; from a pipe, it is read into a single buffer that grows as needed. `bytes` are read
+in one call, which sizes its buffer from the file where possible. A `BinaryIO` or `TextIO` parameter receives an open file, to read as a
+stream; if the data is compressed with gzip, bzip2, or xz, as detected from its first bytes, the stream is decompressed as it is read.
+Nothing is decompressed to disk or all at once, and if the `CLIPPY_READAHEAD` environment variable is set to a number of chunks, they are
+decompressed ahead of the reader in a background thread. Text is decoded as UTF-8. Streams opened for a command are closed once it returns,
+or once the iterator it returns is exhausted.
+"""
+
+import io
+import mmap
+import os
+import stat
+import sys
+from collections.abc import Iterator
+from typing import Any, BinaryIO, Dict, List, Optional, TextIO, Tuple
+
+# the argument that stands for standard input
+STDIN_ARGUMENT = "-"
+
+# the annotations for parameters that are read from files rather than converted from text
+INPUT_ANNOTATIONS = [bytes, memoryview, BinaryIO, TextIO]
+
+# the annotations for parameters that receive a stream, which is decompressed if needed
+STREAM_ANNOTATIONS = [BinaryIO, TextIO]
+
+# the first bytes of each compression format, keyed by the name of the module that reads it
+COMPRESSION_MAGIC = {
+    "gzip": b"\x1f\x8b",
+    "bz2": b"BZh",
+    "lzma": b"\xfd7zXZ\x00",
+}
+
+# the number of bytes needed to recognize any compression format
+MAGIC_LENGTH = max(len(magic) for magic in COMPRESSION_MAGIC.values())
+
+# the initial size of the buffer into which a pipe is read
+INITIAL_BUFFER_SIZE = 64 * 1024
+
+# the size of each chunk decompressed ahead of the reader
+READAHEAD_CHUNK_SIZE = 1024 * 1024
+
+
+def is_input_annotation(annotation: Any) -> bool:
+    """
+    Returns true if a parameter with the given annotation is read from a file or standard input.
+
+    :param annotation: The type annotation of a parameter.
+    """
+    return any(annotation is input_type for input_type in INPUT_ANNOTATIONS)
+
+
+def read_input_argument(annotation: Any, argument: str = STDIN_ARGUMENT, stdin: Optional[BinaryIO] = None) -> Any:
+    """
+    Read the value for a file parameter.
+
+    :param annotation: The annotation of the parameter; one of `bytes`, `memoryview`, `typing.BinaryIO`, or `typing.TextIO`.
+    :param argument: The path of the file to read, or `-` for standard input. Optional. Defaults to standard input.
+    :param stdin: The binary stream read for `-`. Optional. Defaults to `sys.stdin.buffer`.
+    :returns: The data, as the type given by the annotation.
+    """
+    if not is_input_annotation(annotation):
+        raise ValueError(f"Annotation {annotation} is not one of bytes, memoryview, typing.BinaryIO, or typing.TextIO")
+
+    if not isinstance(argument, str):
+        raise TypeError(f"Parameter argument must be a string, received {type(argument)}")
+
+    # the command reads the stream itself, which is closed by `close_input_streams` once the command is done with it
+    if any(annotation is stream_type for stream_type in STREAM_ANNOTATIONS):
+        return open_input_stream(argument, annotation is TextIO, stdin)
+
+    if argument == STDIN_ARGUMENT:
+        stream = stdin if stdin is not None else sys.stdin.buffer
+    else:
+        stream = open(argument, "rb")  # pylint: disable=consider-using-with
+
+    try:
+        if annotation is memoryview:
+            return map_stream(stream)
+
+        return stream.read()
+    finally:
+        if argument != STDIN_ARGUMENT:
+            stream.close()
+
+
+def detect_compression(prefix: bytes) -> Optional[str]:
+    """
+    Find the compression format of data from its first bytes.
+
+    :param prefix: The first bytes of the data; at least `MAGIC_LENGTH` bytes, unless the data is shorter.
+    :returns: The name of the module that reads the format, one of "gzip", "bz2", or "lzma", or None if the data is not compressed.
+    """
+    for (name, magic) in COMPRESSION_MAGIC.items():
+        if prefix.startswith(magic):
+            return name
+
+    return None
+
+
+def open_input_stream(argument: str = STDIN_ARGUMENT, text: bool = False, stdin: Optional[BinaryIO] = None) -> Any:
+    """
+    Open a file or standard input to read as a stream, decompressing it as it is read if it is compressed.
+
+    :param argument: The path of the file to read, or `-` for standard input. Optional. Defaults to standard input.
+    :param text: Whether to decode the stream as text, as `open` does. Optional. Defaults to false.
+    :param stdin: The binary stream read for `-`. Optional. Defaults to `sys.stdin.buffer`.
+    :returns: A binary or text stream.
+    """
+    if argument == STDIN_ARGUMENT:
+        prefix, stream = peek_prefix(stdin if stdin is not None else sys.stdin.buffer, MAGIC_LENGTH)
+        compression = detect_compression(prefix)
+
+        if compression is None:
+            # standard input is left open when the stream is collected, as it is not ours to close
+            if text and stdin is None and stream is sys.stdin.buffer:
+                return sys.stdin
+
+            return io.TextIOWrapper(io.BufferedReader(_Unclosed(stream)), encoding="utf-8") if text else stream
+
+        # a decompressor given a file object leaves it open when closed
+        stream = _open_compressed(compression, stream)
+    else:
+        # the file is opened once and its first bytes peeked, as a pipe, such as from `<(command)`, cannot be read again
+        file = open(argument, "rb")  # pylint: disable=consider-using-with
+
+        try:
+            prefix, stream = peek_prefix(file, MAGIC_LENGTH)
+        except BaseException:
+            file.close()
+            raise
+
+        compression = detect_compression(prefix)
+
+        if compression is None and stream is file:
+            return io.TextIOWrapper(file, encoding="utf-8") if text else file
+
+        # a decompressor, or a stream holding the bytes already read, leaves the file open when closed, so it is closed along with them
+        stream = io.BufferedReader(_Closing(_open_compressed(compression, stream) if compression is not None else stream, file))
+
+        if compression is None:
+            return io.TextIOWrapper(stream, encoding="utf-8") if text else stream
+
+    chunks = int(os.environ.get("CLIPPY_READAHEAD", "0") or "0")
+
+    if chunks > 0:
+        stream = io.BufferedReader(ReadaheadReader(stream, chunks))
+
+    return io.TextIOWrapper(stream, encoding="utf-8") if text else stream
+
+
+def _is_stdin(stream: Any) -> bool:
+    return any(stream is not None and stream is standard for standard in
+               [sys.stdin, getattr(sys.stdin, "buffer", None), sys.__stdin__, getattr(sys.__stdin__, "buffer", None)])
+
+
+def close_input_streams(arguments: Dict[str, Any]) -> None:
+    """
+    Close the streams given to a command for its file parameters, other than standard input, which is not ours to close.
+
+    :param arguments: The arguments to the command, as returned by `CommandMethod.parse_arguments`.
+    """
+    for value in arguments.values():
+        if isinstance(value, io.IOBase) and not _is_stdin(value):
+            value.close()
+
+
+def closing_input_streams(value: Any, arguments: Dict[str, Any]) -> Any:
+    """
+    Close the streams given to a command for its file parameters once the command is done with them.
+
+    :param value: The value returned by the command.
+    :param arguments: The arguments to the command, as returned by `CommandMethod.parse_arguments`.
+    :returns: The value; if it is an iterator that may still read the streams, an iterator that closes them once it is exhausted or closed.
+    """
+    streams: List[Any] = [stream for stream in arguments.values() if isinstance(stream, io.IOBase) and not _is_stdin(stream)]
+
+    if not streams:
+        return value
+
+    if not isinstance(value, Iterator):
+        close_input_streams(arguments)
+        return value
+
+    return _closing_iterator(value, arguments)
+
+
+def _closing_iterator(value: Iterator, arguments: Dict[str, Any]) -> Iterator:
+    try:
+        yield from value
+    finally:
+        close_input_streams(arguments)
+
+
+def peek_prefix(stream: BinaryIO, length: int) -> Tuple[bytes, BinaryIO]:
+    """
+    Read the first bytes of a stream without consuming them.
+
+    :param stream: The stream to read.
+    :param length: The number of bytes to read, if the stream is that long.
+    :returns: A tuple of the bytes read and a stream from which they can be read again, which is the given stream if it can peek.
+    """
+    if hasattr(stream, "peek"):
+        prefix = stream.peek(length)[:length]  # type: ignore
+
+        # a pipe may return fewer bytes than requested, but if they cannot begin any format, the rest are not needed
+        if len(prefix) >= length or not prefix or not any(magic.startswith(prefix) for magic in COMPRESSION_MAGIC.values()):
+            return prefix, stream
+
+    prefix = stream.read(length)
+    return prefix, io.BufferedReader(_Prefixed(prefix, stream))  # type: ignore
+
+
+def _open_compressed(compression: str, source: Any) -> BinaryIO:
+    # the decompressors are only imported when needed, as most inputs are not compressed
+    if compression == "gzip":
+        import gzip  # pylint: disable=import-outside-toplevel
+        return gzip.open(source, "rb")  # type: ignore
+
+    if compression == "bz2":
+        import bz2  # pylint: disable=import-outside-toplevel
+        return bz2.open(source, "rb")  # type: ignore
+
+    import lzma  # pylint: disable=import-outside-toplevel
+    return lzma.open(source, "rb")  # type: ignore
+
+
+class _Prefixed(io.RawIOBase):
+    """A stream that returns bytes already read from another stream, and then the rest of that stream."""
+
+    def __init__(self, prefix: bytes, stream: BinaryIO):
+        super().__init__()
+        self._prefix = memoryview(prefix)
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._prefix:
+            count = min(len(buffer), len(self._prefix))
+            buffer[:count] = self._prefix[:count]
+            self._prefix = self._prefix[count:]
+            return count
+
+        return self._stream.readinto(buffer)  # type: ignore
+
+
+class _Unclosed(io.RawIOBase):
+    """A stream that reads from another stream, but leaves it open when closed."""
+
+    def __init__(self, stream: BinaryIO):
+        super().__init__()
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._stream.readinto(buffer)  # type: ignore
+
+
+class _Closing(io.RawIOBase):
+    """A stream that reads from another stream, and closes both it and the file beneath it when closed."""
+
+    def __init__(self, stream: BinaryIO, file: BinaryIO):
+        super().__init__()
+        self._stream = stream
+        self._file = file
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._stream.readinto(buffer)  # type: ignore
+
+    def close(self):
+        if not self.closed:
+            try:
+                self._stream.close()
+            finally:
+                self._file.close()
+
+        super().close()
+
+
+class ReadaheadReader(io.RawIOBase):
+    """Reads a stream in a background thread, such as to decompress it while the reader works, holding a fixed number of chunks ahead."""
+
+    def __init__(self, stream: BinaryIO, chunks: int, chunk_size: int = READAHEAD_CHUNK_SIZE):
+        """
+        Creates a new reader, and starts reading the given stream.
+
+        :param stream: The stream to read, which is closed when this reader is closed.
+        :param chunks: The number of chunks that may be read ahead of the reader.
+        :param chunk_size: The number of bytes in each chunk. Optional. Defaults to 1 MiB.
+        """
+        from .pipeline import BufferedIterator  # pylint: disable=import-outside-toplevel
+
+        super().__init__()
+
+        if not isinstance(chunk_size, int):
+            raise TypeError(f"Parameter chunk_size must be an integer, received {type(chunk_size)}")
+
+        if chunk_size < 1:
+            raise ValueError(f"Parameter chunk_size must be positive, received {chunk_size}")
+
+        self._stream = stream
+        self._chunks = BufferedIterator(iter(lambda: stream.read(chunk_size), b""), chunks)
+        self._current = memoryview(b"")
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self._current:
+            self._current = memoryview(next(self._chunks, b""))
+
+        count = min(len(buffer), len(self._current))
+        buffer[:count] = self._current[:count]
+        self._current = self._current[count:]
+        return count
+
+    def close(self):
+        if not self.closed:
+            self._chunks.close()
+            self._stream.close()
+
+        super().close()
+
+
+def map_stream(stream: BinaryIO) -> memoryview:
+    """
+    Get a view of the remaining contents of a stream, memory-mapping it if it is a regular file.
+
+    The mapping remains valid after the stream is closed, and is released once the view is no longer used.
+
+    :param stream: The stream to read.
+    :returns: A read-only view of the contents, if mapped; otherwise, a view of a buffer holding the contents.
+    """
+    try:
+        descriptor = stream.fileno()
+    except (AttributeError, OSError, ValueError):
+        descriptor = None
+
+    if descriptor is not None:
+        status = os.fstat(descriptor)
+
+        # an empty file cannot be mapped, but there is nothing to read from it anyway
+        if stat.S_ISREG(status.st_mode) and status.st_size > 0:
+            offset = stream.tell()
+            return memoryview(mmap.mmap(descriptor, 0, access=mmap.ACCESS_READ))[offset:]
+
+    return read_into_buffer(stream)
+
+
+def read_into_buffer(stream: BinaryIO, size: int = INITIAL_BUFFER_SIZE) -> memoryview:
+    """
+    Read the remaining contents of a stream, such as a pipe, into a single buffer, which is doubled in size whenever it is filled.
+
+    :param stream: The stream to read.
+    :param size: The initial size of the buffer. Optional. Defaults to 64 KiB.
+    :returns: A view of the part of the buffer holding the contents.
+    """
+    if not isinstance(size, int):
+        raise TypeError(f"Parameter size must be an integer, received {type(size)}")
+
+    if size < 1:
+        raise ValueError(f"Parameter size must be positive, received {size}")
+
+    buffer = bytearray(size)
+    length = 0
+
+    while True:
+        if length == len(buffer):
+            buffer.extend(bytes(len(buffer)))
+
+        # the view must be released before the buffer can be resized
+        with memoryview(buffer)[length:] as view:
+            count = stream.readinto(view)  # type: ignore
+
+        if not count:
+            break
+
+        length += count
+
+    return memoryview(buffer)[:length]
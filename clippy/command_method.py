@@ -10,10 +10,13 @@ from ast import FunctionDef
 from types import ModuleType
 from typing import Any, Callable, Dict, List, Optional
 
+from .command_input import is_input_annotation, read_input_argument, STDIN_ARGUMENT
 from .command_param import CommandParam, DEFAULT_HELP_PARAM
 from .command_protocols import CommandProtocol
 from .command_return import CommandReturn
-from .common import get_default_args, function_docs_from_string, read_param_pair
+from .common import function_docs_from_string, function_parameters, read_param_pair
+from .common import POSITIONAL_ONLY, VAR_POSITIONAL, VAR_KEYWORD
+from .prefix_index import PrefixIndex
 
 
 class CommandMethod(CommandProtocol):
@@ -24,6 +27,11 @@ class CommandMethod(CommandProtocol):
         """Returns the parameters (keyed by the parameter name) associated with this function."""
         return self._params
 
+    @property
+    def param_index(self) -> PrefixIndex:
+        """An index of the names that may be given as options to this method, including `help`, to resolve abbreviations such as `--ar`."""
+        return self._param_index
+
     @property
     def has_params(self) -> bool:
         """Returns true if this method has any parameters."""
@@ -32,14 +40,14 @@ class CommandMethod(CommandProtocol):
     @property
     def required_params(self) -> List[CommandParam]:
         """Convenience accessor to get only parameters without a default value, sorted by index."""
-        result = list(filter(lambda x: not x.has_default, self.params.values()))
+        result = list(filter(lambda x: not x.has_default and not x.is_variadic, self.params.values()))
         result.sort(key=lambda x: x.index)
         return result
 
     @property
     def optional_params(self) -> List[CommandParam]:
-        """Convenience accessor to get only parameters with a default value, sorted by index."""
-        result = list(filter(lambda x: x.has_default, self._params.values()))
+        """Convenience accessor to get only parameters with a default value, or that accept any number of values, sorted by index."""
+        result = list(filter(lambda x: x.has_default or x.is_variadic, self._params.values()))
         result.sort(key=lambda x: x.index)
         return result + [DEFAULT_HELP_PARAM]
 
@@ -57,7 +65,13 @@ class CommandMethod(CommandProtocol):
         result = ""
 
         for param in self.params.values():
-            if param.has_default:
+            if param.kind == VAR_POSITIONAL:
+                result += f"[<{param.name}>...] "
+            elif param.kind == VAR_KEYWORD:
+                result += "[--<name>=<value>...] "
+            elif not param.is_positional and not param.has_default:
+                result += f"--{param.name}=<{param.annotation_name if param.annotation is not None else param.name[:2]}> "
+            elif param.has_default:
                 if param.annotation is bool:
                     result += f"[--{param.name}] "
                 elif param.annotation is None:
@@ -75,6 +89,16 @@ class CommandMethod(CommandProtocol):
         """Returns information related to the return value of this function."""
         return self._return
 
+    @property
+    def implementation(self) -> Callable:
+        """Returns the function to which this object is referring."""
+        return self._implementation
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """Returns the settings given to the `@clippy` decorator for this function, such as `cache`."""
+        return getattr(self._implementation, "clippy_settings", dict())
+
     def __init__(self,
                  implementation: Callable,
                  documentation: Optional[str] = None,
@@ -111,6 +135,7 @@ class CommandMethod(CommandProtocol):
         else:
             self._params = dict()
 
+        self._param_index = PrefixIndex(list(self._params.keys()) + [DEFAULT_HELP_PARAM.name], "option")
         self._return = return_value if return_value else CommandReturn()
 
     def __str__(self):
@@ -119,28 +144,109 @@ class CommandMethod(CommandProtocol):
     def __repr__(self):
         return f"{self.__class__.__name__}({self.name!r}, {self.documentation!r}, {len(self.params)} parameters)"
 
-    def parse_arguments(self, arguments: List[str]) -> Dict[str, Any]:
+    def parse_arguments(self, arguments: List[str], supplied: int = 0, open_inputs: bool = True) -> Dict[str, Any]:
         """
         Parse the given list of arguments to generate pairs of argument names and values for this method.
 
+        Keyword-only parameters may only be given by name. If the function accepts `*args`, extra positional arguments are collected in a list
+        under its name; if it accepts `**kwargs`, options that match no parameter are passed through under their own names. Otherwise, options
+        may be abbreviated, as `--ar` for `--arg`, and an `AmbiguousPrefixError` is raised if an abbreviation matches more than one parameter.
+        Parameters annotated as `bytes`, `memoryview`, `typing.BinaryIO`, or `typing.TextIO` are read from the named file, or from standard
+        input for `-` or, for the first such required parameter, when no argument is given.
+
         :param arguments: Command-line arguments provided to a method.
+        :param supplied: The number of leading positional parameters whose values are given separately, as by a pipeline; positional arguments
+                         fill the parameters after them. Optional. Defaults to zero.
+        :param open_inputs: Whether to read file parameters; if false, their paths are left as given, and `-` is given for standard input, to be
+                            read later by `open_inputs`. Optional. Defaults to true.
         :return: Argument names paired with their typed (if type annotations are available) value.
         """
-        parameters = list(map(lambda x: x.name, self.params.values()))
+        positional = [param.name for param in self.params.values() if param.is_positional]
+        parameters = positional[supplied:]
+        var_positional = self._param_of_kind(VAR_POSITIONAL)
         idx = 0
-        result = dict()
+        result: Dict[str, Any] = dict()
+        extra = list()
 
         while idx < len(arguments):
+            if var_positional is not None and idx >= len(parameters) and not arguments[idx].startswith("--"):
+                extra.append(arguments[idx])
+                idx += 1
+                continue
+
             name, val, incr = read_param_pair(idx, arguments, parameters)
             idx += incr
-            result[name] = val
+            result[self._resolve_param_name(name)] = val
 
         for (key, val) in result.items():
-            if key in self.params.keys():
-                annotation = self.params[key].annotation
+            annotation = self._annotation_for(key)
+
+            # file parameters are read once every argument is known to be valid
+            if annotation is not None and not is_input_annotation(annotation):
+                result[key] = annotation(val)
+
+        if extra and var_positional is not None:
+            annotation = var_positional.annotation
+            result[var_positional.name] = [annotation(val) for val in extra] if annotation is not None else extra
+
+        # nothing is read if only help was requested
+        if "help" in result:
+            return result
+
+        # the first required file parameter without an argument reads standard input
+        for param in self.required_params:
+            if param.name not in result and param.name not in positional[:supplied] and is_input_annotation(param.annotation):
+                result[param.name] = STDIN_ARGUMENT
+                break
+
+        return self.open_inputs(result) if open_inputs else result
+
+    def open_inputs(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Read the file parameters in the result of `parse_arguments`, replacing each path, or `-` for standard input, with its contents.
+
+        :param arguments: Argument names paired with their values.
+        :return: The same arguments, with file parameters read.
+        """
+        result = dict(arguments)
+
+        for (key, val) in arguments.items():
+            annotation = self._annotation_for(key)
+
+            if is_input_annotation(annotation) and isinstance(val, str):
+                result[key] = read_input_argument(annotation, val)
+
+        return result
+
+    def bind_arguments(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convert named values, such as those from a query string or JSON object, to arguments for this method.
+
+        String values are converted through each parameter's type annotation, as in `parse_arguments`; other values, such as numbers decoded
+        from JSON, are passed through unchanged. Strings for boolean parameters are read as false if they are "false", "0", "no", or "off".
+        Values for `*args` must be a list, each item of which is converted.
+
+        :param values: Values keyed by parameter name.
+        :return: Argument names paired with their typed (if type annotations are available) value.
+        """
+        if not isinstance(values, dict):
+            raise TypeError(f"Parameter values must be a dict, received {type(values)}")
 
-                if annotation is not None:
-                    result[key] = annotation(val)
+        result = dict()
+
+        for (key, val) in values.items():
+            if key not in self.params.keys() and self._param_of_kind(VAR_KEYWORD) is None:
+                raise ValueError(f"Command {self.name} has no parameter named {key}")
+
+            annotation = self._annotation_for(key)
+
+            if key in self.params.keys() and self.params[key].kind == VAR_POSITIONAL:
+                if not isinstance(val, list):
+                    raise ValueError(f"Parameter {key} of command {self.name} must be a list")
+
+                result[key] = [_convert_value(annotation, item) for item in val]
+            else:
+                result[key] = _convert_value(annotation, val)
 
         return result
 
@@ -194,9 +300,67 @@ class CommandMethod(CommandProtocol):
         """
         Invoke the implementation of the function to which this object is referring.
 
+        Positional-only parameters, and the values for `*args`, are passed by position; everything else is passed by name.
+
         :param args: The arguments to pass to the underlying function.
         """
-        return self._implementation(**args)
+        var_positional = self._param_of_kind(VAR_POSITIONAL)
+
+        if var_positional is None and not any(param.kind == POSITIONAL_ONLY for param in self.params.values()):
+            return self._implementation(**args)
+
+        keywords = dict(args)
+        positional = list()
+        extra = keywords.pop(var_positional.name, None) if var_positional is not None else None
+
+        for param in self.params.values():
+            if not param.is_positional:
+                break
+
+            # once *args are given, every parameter before them must be given by position, including those left at their defaults
+            by_position = param.kind == POSITIONAL_ONLY or bool(extra)
+
+            if by_position and param.name in keywords:
+                positional.append(keywords.pop(param.name))
+            elif by_position and param.has_default:
+                positional.append(param.default_value)
+            else:
+                break
+
+        return self._implementation(*positional, *(extra or list()), **keywords)
+
+    def _param_of_kind(self, kind: str) -> Optional[CommandParam]:
+        for param in self.params.values():
+            if param.kind == kind:
+                return param
+
+        return None
+
+    def _resolve_param_name(self, name: str) -> str:
+        # with **kwargs, an unknown name is passed through as given rather than read as an abbreviation
+        if name in self.params.keys() or self._param_of_kind(VAR_KEYWORD) is not None:
+            return name
+
+        resolved = self._param_index.resolve(name)
+        return resolved if resolved is not None else name
+
+    def _annotation_for(self, name: str) -> Optional[type]:
+        if name in self.params.keys():
+            return self.params[name].annotation
+
+        # options that match no parameter are passed to **kwargs, converted through its annotation
+        var_keyword = self._param_of_kind(VAR_KEYWORD)
+        return var_keyword.annotation if var_keyword is not None else None
+
+
+def _convert_value(annotation: Optional[type], val: Any) -> Any:
+    if annotation is bool and isinstance(val, str):
+        return val.strip().lower() not in ("false", "0", "no", "off")
+
+    if annotation is not None and annotation is not str and isinstance(val, str):
+        return annotation(val)
+
+    return val
 
 
 def create_command_method(function_definition: FunctionDef, module: ModuleType) -> CommandMethod:
@@ -210,22 +374,19 @@ def create_command_method(function_definition: FunctionDef, module: ModuleType)
 
     method_docs, all_param_docs, return_doc = function_docs_from_string(ast.get_docstring(function_definition))
 
-    func_annotations = func_impl.__annotations__
-    default_args = get_default_args(func_impl)
-
-    params: List[CommandParam] = list()
-    func_args = function_definition.args.args
-
-    for (idx, arg) in enumerate(func_args):
-        param_name = arg.arg
-        params += [CommandParam(name=param_name,
-                                index=idx,
-                                documentation=all_param_docs.get(param_name, None) if all_param_docs is not None else None,
-                                annotation=func_annotations.get(param_name, None),
-                                default_args=default_args)]
+    params = [CommandParam(name=param.name,
+                           index=idx,
+                           documentation=all_param_docs.get(param.name, None) if all_param_docs is not None else None,
+                           annotation=param.annotation,
+                           default_args={param.name: param.default} if param.has_default else None,
+                           kind=param.kind,
+                           function=func_impl)
+              for (idx, param) in enumerate(function_parameters(func_impl))]
 
+    # annotations written as strings are resolved only when the command is used, so commands that are not invoked cost nothing
     return CommandMethod(implementation=func_impl,
                          documentation=method_docs,
                          parameters=params,
                          return_value=CommandReturn(documentation=return_doc,
-                                                    annotation=func_annotations.get("return", None)))
+                                                    annotation=getattr(func_impl, "__annotations__", dict()).get("return", None),
+                                                    function=func_impl))
@@ -14,6 +14,8 @@ from .command_param import CommandParam, DEFAULT_HELP_PARAM, DEFAULT_VERSION_PAR
 from .command_method import CommandMethod, create_command_method
 from .command_protocols import CommandProtocol
 from .common import get_function_definitions, get_parent_stack_frame, get_module_impl
+from .module_cache import COMMAND_MODULE_CACHE
+from .prefix_index import PrefixIndex
 
 
 class CommandModule(CommandProtocol):
@@ -24,11 +26,21 @@ class CommandModule(CommandProtocol):
         """A dictionary of name-method pairs for all commands in this module."""
         return self._command_list
 
+    @property
+    def command_index(self) -> PrefixIndex:
+        """An index of command names, to resolve abbreviations and list commands by prefix."""
+        return self._command_index
+
     @property
     def version(self) -> str:
         """The version associated with this module, or a default value."""
         return self._version
 
+    @property
+    def filename(self) -> Optional[str]:
+        """The source file of this module, if known."""
+        return self._filename
+
     @property
     def has_version(self) -> bool:
         """Returns true if this module has version information, false otherwise."""
@@ -62,7 +74,12 @@ class CommandModule(CommandProtocol):
         param_lengths = list(map(lambda x: x.longest_param_name_length, self.commands.values()))
         return max(param_lengths + [len("--version") if self.has_version else len("--help")])
 
-    def __init__(self, name: str, documentation: Optional[str] = None, version: Optional[str] = None, command_list: Optional[List[CommandMethod]] = None):
+    def __init__(self,  # pylint: disable=too-many-arguments
+                 name: str,
+                 documentation: Optional[str] = None,
+                 version: Optional[str] = None,
+                 command_list: Optional[List[CommandMethod]] = None,
+                 filename: Optional[str] = None):
         """
         Creates a new object to hold module information.
 
@@ -70,8 +87,15 @@ class CommandModule(CommandProtocol):
         :param documentation: The documentation associated with the module. Optional. Defaults to "No documentation provided".
         :param version: The version information associated with the module. Optional. Defaults to "No version provided".
         :param command_list: The commands available in the module. Optional. Defaults to an empty list.
+        :param filename: The source file of the module, beside which its search index is saved. Optional. Defaults to unknown.
         """
         super().__init__(name, documentation)
+
+        if filename is not None:
+            if not isinstance(filename, str):
+                raise TypeError(f"Parameter filename must be a string if provided, received {type(filename)}")
+
+        self._filename = filename
         self._has_version = bool(version)
         self._version = version if version else "No version provided."
 
@@ -80,12 +104,29 @@ class CommandModule(CommandProtocol):
         else:
             self._command_list = dict()
 
+        self._command_index = PrefixIndex(self._command_list.keys(), "command")
+
     def __str__(self):
         return self.__repr__()
 
     def __repr__(self):
         return f"{self.__class__.__name__}({self.name!r}, {self.documentation!r}, {len(self.commands)} commands)"
 
+    def find_command(self, name: str) -> Optional[CommandMethod]:
+        """
+        Find a command by its full name or an unambiguous abbreviation, such as `doc_one_t` for `documented_one_typed_parameter`.
+
+        Raises an `AmbiguousPrefixError` if the abbreviation could refer to more than one command.
+
+        :param name: The name or abbreviation given on the command line.
+        :returns: The command, or None if no command matches.
+        """
+        if name in self._command_list.keys():
+            return self._command_list[name]
+
+        resolved = self._command_index.resolve(name)
+        return self._command_list[resolved] if resolved is not None else None
+
     def help(self) -> str:
         """Build a help message for this module."""
         result = f"{self.documentation}\n\n{self.usage()}"
@@ -114,6 +155,21 @@ class CommandModule(CommandProtocol):
 
 
 def _create_command_module(imported_module: ModuleType, module_name: str, filename: str) -> CommandModule:
+    """
+    Internal method to get the object holding module information, reusing a cached object if the file has not changed.
+
+    :param imported_module: The imported module.
+    :param module_name: The name of the module.
+    :param filename: The name of the file containing the module.
+    :return: The module.
+    """
+    return COMMAND_MODULE_CACHE.get_or_create(imported_module=imported_module,
+                                              module_name=module_name,
+                                              filename=filename,
+                                              factory=lambda: _build_command_module(imported_module, module_name, filename))
+
+
+def _build_command_module(imported_module: ModuleType, module_name: str, filename: str) -> CommandModule:
     """
     Internal method to create a new object to hold module information.
 
@@ -132,7 +188,8 @@ def _create_command_module(imported_module: ModuleType, module_name: str, filena
     return CommandModule(name=module_name,
                          documentation=documentation,
                          version=version,
-                         command_list=command_list)
+                         command_list=command_list,
+                         filename=filename)
 
 
 def create_command_module(index: int = 1) -> CommandModule:
@@ -183,3 +240,30 @@ def create_command_module_for_file(filename: str) -> CommandModule:
     return _create_command_module(imported_module=imported_module,
                                   module_name=module_name,
                                   filename=filename)
+
+
+def create_command_module_for_module(imported_module: ModuleType) -> CommandModule:
+    """
+    Creates a new object to hold module information for an already-imported module.
+
+    :param imported_module: The module to parse.
+    :return: The newly-created module.
+    """
+    if imported_module is None:
+        raise ValueError("Parameter imported_module is required.")
+
+    if not isinstance(imported_module, ModuleType):
+        raise TypeError(f"Parameter imported_module must be a module, received {type(imported_module)}")
+
+    filename = getattr(imported_module, "__file__", None)
+
+    if not filename:
+        raise ValueError(f"Module {imported_module.__name__} has no source file")
+
+    # modules run as scripts have no spec, but modules run via `python -m` are named by their spec rather than `__main__`
+    spec = getattr(imported_module, "__spec__", None)
+    module_name = spec.name if spec is not None else imported_module.__name__
+
+    return _create_command_module(imported_module=imported_module,
+                                  module_name=module_name,
+                                  filename=filename)
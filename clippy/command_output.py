@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Writes the value returned by a command in a text, structured, or binary format.
+
+Lists and iterators are written one record at a time, so that generators producing many records are never held in memory.
+
+NumPy arrays are written whole rather than as their abbreviated `str`. The "npy" format writes an array as a `.npy` file, and the "raw"
+format writes only its bytes, as does any other object that supports the buffer protocol, such as `bytes` or `array.array`. Contiguous data
+is written to the binary stream directly from the array's memory, without being copied. Text formats format whole arrays in NumPy rather than
+one element at a time in Python. NumPy is never imported by this module unless a command returned an array, or the "npy" format was requested.
+"""
+
+import io
+import sys
+from typing import Any, BinaryIO, Iterable, List, Optional, TextIO
+
+from .command_return import CommandReturn
+from .options import CSV_FORMAT, FORMATS, JSON_FORMAT, JSONL_FORMAT, NPY_FORMAT, RAW_FORMAT, TEXT_FORMAT
+
+# the formats written as bytes rather than text
+BINARY_FORMATS = [NPY_FORMAT, RAW_FORMAT]
+
+# the number of records collected before each write to the output stream
+BATCH_SIZE = 1024
+
+# the most bytes copied at once from an array that is not contiguous in memory
+COPY_CHUNK_BYTES = 16 * 1024 * 1024
+
+
+def is_array(value: Any) -> bool:
+    """
+    Returns true if the given value is a NumPy array. NumPy is not imported; if it has not been imported already, no value can be an array.
+
+    :param value: The value to check.
+    """
+    numpy = sys.modules.get("numpy")
+    return numpy is not None and isinstance(value, numpy.ndarray)
+
+
+def _is_array_type(annotation: Any) -> bool:
+    return getattr(annotation, "__module__", None) == "numpy" and getattr(annotation, "__name__", None) == "ndarray"
+
+
+def is_dataclass_instance(value: Any) -> bool:
+    """
+    Returns true if the given value is an instance of a dataclass, false otherwise.
+
+    :param value: The value to check.
+    """
+    return hasattr(value, "__dataclass_fields__") and not isinstance(value, type)
+
+
+def is_records(value: Any) -> bool:
+    """
+    Returns true if the given value is a sequence or iterator of records, rather than a single record.
+
+    :param value: The value to check.
+    """
+    if isinstance(value, (str, bytes, bytearray, dict)) or is_dataclass_instance(value):
+        return False
+
+    return hasattr(value, "__iter__")
+
+
+def to_serializable(value: Any) -> Any:
+    """
+    Convert a value that the `json` module cannot serialize; used as the `default` argument to `json.dumps`.
+
+    :param value: The value to convert.
+    :returns: A dictionary for dataclasses, a list for other iterables, a number for NumPy scalars, or the string form of any other value.
+    """
+    # arrays and scalars are converted in NumPy, all at once, rather than element by element
+    if getattr(type(value), "__module__", None) == "numpy" and hasattr(value, "tolist"):
+        return value.tolist()
+
+    if is_dataclass_instance(value):
+        import dataclasses  # pylint: disable=import-outside-toplevel
+        return dataclasses.asdict(value)
+
+    if is_records(value):
+        return list(value)
+
+    return str(value)
+
+
+def default_format(return_value: Optional[CommandReturn]) -> str:
+    """
+    Get the output format to use when none was requested, based on a command's return type annotation.
+
+    :param return_value: The return value of the invoked command.
+    :returns: JSON for commands annotated to return a dictionary or dataclass, npy for a NumPy array, otherwise text.
+    """
+    annotation = return_value.annotation if return_value is not None else None
+
+    if annotation is not None and (issubclass(annotation, dict) or hasattr(annotation, "__dataclass_fields__")):
+        return JSON_FORMAT
+
+    if _is_array_type(annotation):
+        return NPY_FORMAT
+
+    return TEXT_FORMAT
+
+
+def _write_batched(lines: Iterable[str], stream: TextIO) -> None:
+    batch: List[str] = list()
+
+    for line in lines:
+        batch.append(line)
+
+        if len(batch) >= BATCH_SIZE:
+            stream.write("".join(batch))
+            batch.clear()
+
+    stream.write("".join(batch))
+
+
+def _json_array(records: Iterable[Any]) -> Iterable[str]:
+    import json  # pylint: disable=import-outside-toplevel
+
+    separator = "[\n"
+
+    for record in records:
+        yield separator + json.dumps(record, default=to_serializable)
+        separator = ",\n"
+
+    yield "[]\n" if separator == "[\n" else "\n]\n"
+
+
+def _csv_row(record: Any) -> List[Any]:
+    if is_records(record):
+        return list(record)
+
+    return [record]
+
+
+def _csv_lines(records: Iterable[Any]) -> Iterable[str]:
+    import csv  # pylint: disable=import-outside-toplevel
+
+    buffer = io.StringIO()
+    writer: Any = None
+
+    for record in records:
+        if is_dataclass_instance(record):
+            record = to_serializable(record)
+
+        if writer is None:
+            if isinstance(record, dict):
+                writer = csv.DictWriter(buffer, fieldnames=list(record.keys()), lineterminator="\n")
+                writer.writeheader()
+            else:
+                writer = csv.writer(buffer, lineterminator="\n")
+
+        writer.writerow(record if isinstance(record, dict) else _csv_row(record))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _array_text(array: Any, stream: TextIO, delimiter: str) -> None:
+    import numpy  # pylint: disable=import-outside-toplevel,import-error
+
+    # each value is written in full, as the shortest text that reads back exactly; arrays of more than two dimensions are written by rows
+    rows = array.reshape(-1, array.shape[-1]) if array.ndim > 2 else array.reshape(1) if array.ndim == 0 else array
+    numpy.savetxt(stream, rows, fmt="%s", delimiter=delimiter)
+
+
+def _write_array_bytes(array: Any, stream: BinaryIO, fortran_order: bool = False) -> None:
+    import numpy  # pylint: disable=import-outside-toplevel,import-error
+
+    # contiguous data is written straight from memory; when Fortran order may be written, as in a `.npy` file whose header says so, a
+    # Fortran-ordered array is written as its C-ordered transpose
+    if array.flags.c_contiguous or (fortran_order and array.flags.f_contiguous):
+        contiguous = array if array.flags.c_contiguous else array.T
+        stream.write(memoryview(contiguous.reshape(-1).view(numpy.uint8)))
+        return
+
+    # otherwise, rows are gathered into a bounded buffer, as with `numpy.lib.format.write_array`
+    rows = max(1, COPY_CHUNK_BYTES // max(1, array.itemsize))
+
+    for chunk in numpy.nditer(array, flags=["external_loop", "buffered", "zerosize_ok"], buffersize=rows, order="C"):
+        stream.write(chunk.tobytes("C"))  # type: ignore
+
+
+def write_npy(value: Any, stream: BinaryIO) -> None:
+    """
+    Write a value as a `.npy` file, as `numpy.save` would.
+
+    :param value: A NumPy array, or anything NumPy can convert to one, such as a list of numbers.
+    :param stream: The binary stream to which the file is written.
+    """
+    try:
+        import numpy  # pylint: disable=import-outside-toplevel,import-error
+    except ImportError:
+        raise ValueError(f"Output format {NPY_FORMAT} requires NumPy") from None
+
+    array = numpy.asanyarray(value)
+
+    if array.dtype.hasobject:
+        raise ValueError(f"Arrays of Python objects cannot be written as {NPY_FORMAT}")
+
+    header = numpy.lib.format.header_data_from_array_1_0(array)
+
+    try:
+        numpy.lib.format.write_array_header_1_0(stream, header)
+    except ValueError:
+        # structured arrays with many fields need the longer header of version 2.0
+        numpy.lib.format.write_array_header_2_0(stream, header)
+
+    _write_array_bytes(array, stream, header["fortran_order"])
+
+
+def write_raw(value: Any, stream: BinaryIO) -> None:
+    """
+    Write the bytes of a value that supports the buffer protocol, such as a NumPy array, `bytes`, or `array.array`, in C order.
+
+    :param value: The value to write.
+    :param stream: The binary stream to which the bytes are written.
+    """
+    if is_array(value):
+        if value.dtype.hasobject:
+            raise ValueError(f"Arrays of Python objects cannot be written as {RAW_FORMAT}")
+
+        _write_array_bytes(value, stream)
+        return
+
+    try:
+        view = memoryview(value)
+    except TypeError:
+        raise ValueError(f"Output format {RAW_FORMAT} requires bytes or an object that supports the buffer protocol, received {type(value)}") \
+            from None
+
+    stream.write(view if view.c_contiguous else view.tobytes())
+
+
+def _write_json(value: Any, output_format: str, stream: TextIO) -> None:
+    # the json module is only loaded when requested, since most commands write text
+    import json  # pylint: disable=import-outside-toplevel
+
+    if output_format == JSONL_FORMAT:
+        _write_batched((json.dumps(record, default=to_serializable) + "\n" for record in (value if is_records(value) else [value])), stream)
+    elif is_records(value) and not isinstance(value, (list, tuple)) and not is_array(value):
+        _write_batched(_json_array(value), stream)
+    else:
+        # an array is converted to lists in NumPy, all at once
+        stream.write(json.dumps(value, default=to_serializable) + "\n")
+
+
+def _write_binary(value: Any, output_format: str, stream: Any) -> None:
+    # anything already written as text must come first
+    binary = getattr(stream, "buffer", stream)
+
+    if binary is not stream:
+        stream.flush()
+
+    if output_format == NPY_FORMAT:
+        write_npy(value, binary)
+    else:
+        write_raw(value, binary)
+
+    binary.flush()
+
+
+def write_output(value: Any, output_format: str = TEXT_FORMAT, stream: Optional[TextIO] = None) -> None:
+    """
+    Write the value returned by a command.
+
+    :param value: The value to write.
+    :param output_format: One of "text", "json", "jsonl", "csv", "npy", or "raw". Optional. Defaults to "text", which prints the value as-is,
+                          except that arrays are printed in full.
+    :param stream: The stream to which the value is written; binary formats are written to its underlying `buffer`, if it has one. Optional.
+                   Defaults to standard output.
+    """
+    if output_format not in FORMATS:
+        raise ValueError(f"Unrecognized output format {output_format}, expected one of {', '.join(FORMATS)}")
+
+    if stream is None:
+        stream = sys.stdout
+
+    if output_format in BINARY_FORMATS:
+        _write_binary(value, output_format, stream)
+    elif is_array(value) and output_format in (TEXT_FORMAT, CSV_FORMAT):
+        _array_text(value, stream, " " if output_format == TEXT_FORMAT else ",")
+    elif output_format == TEXT_FORMAT:
+        print("Done." if value is None else value, file=stream)
+    elif output_format == JSON_FORMAT or (output_format == JSONL_FORMAT and value is not None):
+        _write_json(value, output_format, stream)
+    elif value is not None:
+        _write_batched(_csv_lines(value if is_records(value) else [value]), stream)
@@ -6,15 +6,22 @@ Defines one parameter in a function, including its name, documentation (if prese
 """
 
 
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Union
 
 from clippy.command_protocols import CommandProtocol
-from .common import right_pad, format_default, format_param_doc
+from .common import right_pad, format_default, format_param_doc, resolve_annotation
+from .common import POSITIONAL_ONLY, POSITIONAL_OR_KEYWORD, VAR_POSITIONAL, KEYWORD_ONLY, VAR_KEYWORD
+
+PARAMETER_KINDS = [POSITIONAL_ONLY, POSITIONAL_OR_KEYWORD, VAR_POSITIONAL, KEYWORD_ONLY, VAR_KEYWORD]
 
 
 class CommandParam(CommandProtocol):
     """One function parameter and its associated properties."""
 
+    # an annotation given as a string is replaced by the object it names once resolved
+    _annotation: Optional[Union[type, str]]
+    _function: Optional[Callable]
+
     @property
     def index(self) -> int:
         """Returns the position of the parameter in the list of parameters."""
@@ -22,16 +29,36 @@ class CommandParam(CommandProtocol):
 
     @property
     def annotation(self) -> Optional[type]:
-        """Returns the type annotation associated with the parameter, if provided."""
-        return self._annotation
+        """Returns the type annotation associated with the parameter, if provided, resolving it the first time if it was given as a string."""
+        if isinstance(self._annotation, str) and self._function is not None:
+            self._annotation = resolve_annotation(self._function, self._annotation)
+
+        return self._annotation  # type: ignore
 
     @property
     def annotation_name(self) -> Optional[str]:
         """Returns the name of the type annotation associated with the parameter, if provided."""
-        if not self._annotation:
+        annotation = self.annotation
+
+        if not annotation:
             return None
 
-        return self._annotation.__name__
+        return annotation if isinstance(annotation, str) else annotation.__name__
+
+    @property
+    def kind(self) -> str:
+        """Returns how arguments are bound to this parameter; one of `PARAMETER_KINDS`, such as "keyword_only"."""
+        return self._kind
+
+    @property
+    def is_positional(self) -> bool:
+        """Returns true if this parameter may be given by position on the command line."""
+        return self._kind in (POSITIONAL_ONLY, POSITIONAL_OR_KEYWORD)
+
+    @property
+    def is_variadic(self) -> bool:
+        """Returns true if this parameter collects any number of values, as `*args` and `**kwargs` do."""
+        return self._kind in (VAR_POSITIONAL, VAR_KEYWORD)
 
     @property
     def has_default(self) -> bool:
@@ -47,16 +74,22 @@ class CommandParam(CommandProtocol):
                  name: str,
                  index: int,
                  documentation: Optional[str] = None,
-                 annotation: Optional[type] = None,
-                 default_args: Optional[Dict[str, Any]] = None):
+                 annotation: Optional[Union[type, str]] = None,
+                 default_args: Optional[Dict[str, Any]] = None,
+                 kind: str = POSITIONAL_OR_KEYWORD,
+                 function: Optional[Callable] = None):
         """
         Creates a new object to hold function parameter information.
 
         :param name: The name of the parameter. Required.
         :param index: The position of the parameter in the list of function parameters. Required.
         :param documentation: The documentation of the parameter. Optional. Defaults to none.
-        :param annotation: The type annotation of the parameter. Optional. Defaults to none.
+        :param annotation: The type annotation of the parameter, or a string naming it, as under `from __future__ import annotations`. Optional.
+                           Defaults to none.
         :param default_args: The default arguments in this parameter's function. Optional. Defaults to none.
+        :param kind: How arguments are bound to the parameter; one of `PARAMETER_KINDS`. Optional. Defaults to "positional_or_keyword".
+        :param function: The function to which the parameter belongs, in whose module a string annotation is resolved when first needed.
+                         Optional. Defaults to none, leaving string annotations as they are.
         """
         super().__init__(name, documentation)
 
@@ -66,8 +99,13 @@ class CommandParam(CommandProtocol):
         if not isinstance(index, int):
             raise TypeError("Parameter index must be an integer.")
 
+        if kind not in PARAMETER_KINDS:
+            raise ValueError(f"Parameter kind must be one of {', '.join(PARAMETER_KINDS)}, received {kind!r}.")
+
         self._index = index
+        self._kind = kind
         self._annotation = annotation
+        self._function = function
 
         if default_args is None:
             self._default_value = None
@@ -80,15 +118,15 @@ class CommandParam(CommandProtocol):
             self._has_default = name in default_args.keys()
 
     def __eq__(self, other):
-        return [self.name, self.documentation, self.index, self.annotation, self.has_default, self.default_value] == \
-            [other.name, other.documentation, other.index, other.annotation, other.has_default, other.default_value]
+        return [self.name, self.documentation, self.index, self.annotation, self.has_default, self.default_value, self.kind] == \
+            [other.name, other.documentation, other.index, other.annotation, other.has_default, other.default_value, other.kind]
 
     def __str__(self):
         return self.__repr__()
 
     def __repr__(self):
         if self.annotation:
-            return (f"{self.__class__.__name__}({self.name!r}, {self.index!r}, {self.documentation!r}, '{self.annotation.__name__}'"
+            return (f"{self.__class__.__name__}({self.name!r}, {self.index!r}, {self.documentation!r}, '{self.annotation_name}'"
                     f", {self.default_value}, {self.has_default})")
 
         return (f"{self.__class__.__name__}({self.name!r}, {self.index!r}, {self.documentation!r}"
@@ -101,6 +139,12 @@ class CommandParam(CommandProtocol):
         :param longest_param: Pass the length of the longest parameter name that will be printed so that descriptions are aligned.
         :return: A formatted usage string.
         """
+        if self.kind == VAR_POSITIONAL:
+            return f"\n\t  {right_pad(self.name + '...', longest_param)} {format_param_doc(self.documentation)} Accepts any number of values."
+
+        if self.kind == VAR_KEYWORD:
+            return f"\n\t--{right_pad('<name>', longest_param)} {format_param_doc(self.documentation)} Accepts any other named values."
+
         if self.has_default:
             return f"\n\t--{right_pad(self.name, longest_param)} {format_param_doc(self.documentation)} {format_default(self.default_value)}"
 
@@ -7,6 +7,9 @@ Common protocols for methods and modules.
 
 from typing import Optional
 
+# the documentation of anything that has none
+NO_DOCUMENTATION = "No documentation provided."
+
 
 class CommandProtocol:
     """A common class for modules, methods, parameters, and return values."""
@@ -39,4 +42,4 @@ class CommandProtocol:
                 raise TypeError("Parameter documentation must be a string, if provided.")
 
         self._name = name
-        self._documentation = documentation if documentation else "No documentation provided."
+        self._documentation = documentation if documentation else NO_DOCUMENTATION
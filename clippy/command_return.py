@@ -5,39 +5,57 @@
 Defines the return value from a function, including its documentation and type annotation, if provided.
 """
 
-from typing import Optional
+from typing import Callable, Optional, Union
 
 from clippy.command_protocols import CommandProtocol
+from .common import resolve_annotation
 
 
 class CommandReturn(CommandProtocol):
     """The return value from a function and its associated properties."""
 
+    # an annotation given as a string is replaced by the object it names once resolved
+    _annotation: Optional[Union[type, str]]
+    _function: Optional[Callable]
+
     @property
     def annotation(self) -> Optional[type]:
-        """The type annotation associated with this return value, if provided."""
-        return self._annotation
+        """
+        The type annotation associated with this return value, if provided, resolving it the first time if it was given as a string. A string
+        that names something other than a type, such as `List[int]`, is treated as no annotation.
+        """
+        if isinstance(self._annotation, str) and self._function is not None:
+            resolved = resolve_annotation(self._function, self._annotation)
+            self._annotation = resolved if isinstance(resolved, type) else None
 
-    def __init__(self, documentation: Optional[str] = None, annotation: Optional[type] = None):
+        return self._annotation  # type: ignore
+
+    def __init__(self, documentation: Optional[str] = None, annotation: Optional[Union[type, str]] = None, function: Optional[Callable] = None):
         """
         Creates a new object to hold function return value information.
 
         :param documentation: The documentation associated with this return value. Optional.
-        :param annotation: The type annotation associated with this return value. Optional.
+        :param annotation: The type annotation associated with this return value, or a string naming it, as under
+                           `from __future__ import annotations`. Optional.
+        :param function: The function that returns this value, in whose module a string annotation is resolved when first needed. Optional.
         """
         super().__init__("return", documentation)
 
         if annotation is not None:
-            if not isinstance(annotation, type):
-                raise TypeError("Parameter annotation must be a type, if provided.")
+            if not isinstance(annotation, (type, str)):
+                raise TypeError("Parameter annotation must be a type or a string, if provided.")
+
+            if isinstance(annotation, str) and function is None:
+                raise ValueError("Parameter function is required to resolve a string annotation.")
 
         self._annotation = annotation
+        self._function = function
 
     def __str__(self):
         return self.__repr__()
 
     def __repr__(self):
-        if self._annotation:
+        if self.annotation:
             return f"{self.__class__.__name__}({self.documentation!r}, '{self.annotation.__name__}')"
 
         return f"{self.__class__.__name__}({self.documentation!r}, no annotation)"
@@ -9,11 +9,26 @@ import inspect
 import os
 import re
 import ast
+import weakref
 from ast import FunctionDef, Module, stmt
+from collections import namedtuple
 from inspect import FrameInfo
-from types import ModuleType
+from types import CodeType, ModuleType
 from typing import Callable, Iterable, List, Optional, Tuple, Dict, Any
 
+# parameter kinds, named as in `inspect.Parameter`
+POSITIONAL_ONLY = "positional_only"
+POSITIONAL_OR_KEYWORD = "positional_or_keyword"
+VAR_POSITIONAL = "var_positional"
+KEYWORD_ONLY = "keyword_only"
+VAR_KEYWORD = "var_keyword"
+
+# code object flags marking *args and **kwargs, as in `inspect.CO_VARARGS` and `inspect.CO_VARKEYWORDS`
+CO_VARARGS = 0x04
+CO_VARKEYWORDS = 0x08
+
+ParameterInfo = namedtuple("ParameterInfo", ["name", "kind", "has_default", "default", "annotation"])
+
 
 def string_remove(str1: str, str2: str) -> str:
     """
@@ -101,6 +116,86 @@ def top_level_functions(body: List[stmt]) -> Iterable[FunctionDef]:
             yield func
 
 
+# a top-level `@clippy`, `@clippy(...)`, or `@some_module.clippy` decorator
+CLIPPY_DECORATOR = re.compile(r"^@[ \t]*(?:\w+[ \t]*\.[ \t]*)*clippy\b", re.MULTILINE)
+
+# a top-level line that is not a comment, decorator, or continuation; this should be the `def` following a decorator
+TOP_LEVEL_STATEMENT = re.compile(r"^[^\s#@]", re.MULTILINE)
+
+# any top-level line that is not a comment; this ends the body of a function
+TOP_LEVEL_LINE = re.compile(r"^[^\s#]", re.MULTILINE)
+
+FUNCTION_DEF = re.compile(r"(?:async[ \t]+)?def[ \t]")
+
+
+def scan_clippy_blocks(source: str) -> Optional[List[Tuple[int, str]]]:
+    """
+    Find the source of each top-level function decorated with `@clippy` without tokenizing or parsing the whole file.
+
+    :param source: The source code of a module.
+    :returns: Pairs of starting line number and source for each decorated function, or None if the source could not be scanned.
+    """
+    blocks = list()
+
+    for match in CLIPPY_DECORATOR.finditer(source):
+        definition = TOP_LEVEL_STATEMENT.search(source, source.find("\n", match.end()) + 1)
+
+        # a decorator that spans lines or applies to something other than a function needs the full parse
+        if not definition or not FUNCTION_DEF.match(source, definition.start()):
+            return None
+
+        end = TOP_LEVEL_LINE.search(source, source.find("\n", definition.start()) + 1)
+        block = source[match.start():end.start() if end else len(source)]
+        blocks.append((source.count("\n", 0, match.start()) + 1, block))
+
+    return blocks
+
+
+def scan_function_definitions(filename: str, imported_module: ModuleType) -> Optional[List[FunctionDef]]:
+    """
+    Parse only the `@clippy` functions in the given file. This is much faster than `parse_ast` for large files with few commands.
+
+    Scanning is only trusted if it finds exactly the commands that the imported module defines in this file; otherwise, returns None.
+
+    :param filename: The name of the file to scan.
+    :param imported_module: The module loaded from the file.
+    :returns: The function definitions, or None if the full file should be parsed instead.
+    """
+    try:
+        with open(filename, "rt") as file:
+            source = file.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+    blocks = scan_clippy_blocks(source)
+
+    if not blocks:
+        return None
+
+    result = list()
+
+    for (lineno, block) in blocks:
+        try:
+            parsed = ast.parse(block, filename=filename)
+        except SyntaxError:
+            return None
+
+        if len(parsed.body) != 1 or not isinstance(parsed.body[0], FunctionDef):
+            return None
+
+        result.append(ast.increment_lineno(parsed.body[0], lineno - 1))
+
+    path = os.path.abspath(filename)
+    expected = sorted(name for (name, value) in vars(imported_module).items()
+                      if callable(value) and is_clippy_command(value) and getattr(value, "__name__", None) == name
+                      and os.path.abspath(getattr(getattr(value, "__code__", None), "co_filename", "")) == path)
+
+    if sorted(definition.name for definition in result) != expected:
+        return None
+
+    return result
+
+
 def get_function_definitions(filename: str, imported_module: ModuleType) -> Iterable[FunctionDef]:
     """
     Gets a list of functions as CommandMethods keyed by their function name from a stack frame and module.
@@ -109,8 +204,12 @@ def get_function_definitions(filename: str, imported_module: ModuleType) -> Iter
     :param imported_module: A module containing functions to load.
     :returns: An iterable of method implementations.
     """
+    definitions = scan_function_definitions(filename, imported_module)
+
+    if definitions is None:
+        definitions = list(top_level_functions(parse_ast(filename).body))
 
-    for function_definition in top_level_functions(parse_ast(filename).body):
+    for function_definition in definitions:
         func_impl = getattr(imported_module, function_definition.name)
 
         if is_clippy_command(func_impl) and function_definition is not None:
@@ -262,6 +361,125 @@ def function_docs_from_string(docstring: str) -> Tuple[Optional[str], Optional[D
     return method_doc, param_docs, return_doc
 
 
+def _code_layout(code: CodeType) -> Tuple[Tuple[str, str], ...]:
+    names = code.co_varnames
+    positional_only = getattr(code, "co_posonlyargcount", 0)
+    positional = code.co_argcount
+    keyword_end = positional + code.co_kwonlyargcount
+
+    layout = [(name, POSITIONAL_ONLY) for name in names[:positional_only]]
+    layout += [(name, POSITIONAL_OR_KEYWORD) for name in names[positional_only:positional]]
+
+    # *args and **kwargs are stored after the keyword-only names, but *args is declared before them
+    if code.co_flags & CO_VARARGS:
+        layout.append((names[keyword_end], VAR_POSITIONAL))
+        keyword_end += 1
+
+    layout += [(name, KEYWORD_ONLY) for name in names[positional:positional + code.co_kwonlyargcount]]
+
+    if code.co_flags & CO_VARKEYWORDS:
+        layout.append((names[keyword_end], VAR_KEYWORD))
+
+    return tuple(layout)
+
+
+# the parameters read from each function, with the defaults and annotations they were read with; entries go away with their functions
+_PARAMETER_CACHE: "weakref.WeakKeyDictionary[Callable, Tuple[Any, Any, Any, Tuple[ParameterInfo, ...]]]" = weakref.WeakKeyDictionary()
+
+
+def function_parameters(func: Callable) -> Tuple[ParameterInfo, ...]:
+    """
+    Read every parameter of a function, in declaration order, directly from its code object, defaults, and annotations.
+
+    This covers positional-only, keyword-only, `*args`, and `**kwargs` parameters, and is much faster than `inspect.signature`. Results are
+    cached per function, for as long as the function exists. Functions wrapped with `functools.wraps` are read through to the wrapped
+    function; other callables without a code object, such as classes, fall back to `inspect.signature`.
+
+    :param func: The function to read.
+    :returns: The name, kind, default (if any), and annotation (if any) of each parameter. Annotations are returned as written, so they may be
+              strings in modules using postponed evaluation of annotations; see `resolve_annotation`.
+    """
+    while hasattr(func, "__wrapped__"):
+        func = func.__wrapped__
+
+    code = getattr(func, "__code__", None)
+
+    if not isinstance(code, CodeType):
+        return _signature_parameters(func)
+
+    defaults = getattr(func, "__defaults__", None)
+    kwdefaults = getattr(func, "__kwdefaults__", None)
+    annotations = getattr(func, "__annotations__", None)
+    cached = _PARAMETER_CACHE.get(func)
+
+    # defaults and annotations may be replaced after the function is defined, so the cached result is only used if they match
+    if cached is not None and cached[0] is defaults and cached[1] is kwdefaults and cached[2] is annotations:
+        return cached[3]
+
+    positional_defaults = defaults or ()
+    first_default = code.co_argcount - len(positional_defaults)
+    keyword_defaults = kwdefaults or dict()
+    annotation_values = annotations or dict()
+    result = list()
+
+    for (idx, (name, kind)) in enumerate(_code_layout(code)):
+        if kind in (POSITIONAL_ONLY, POSITIONAL_OR_KEYWORD) and idx >= first_default:
+            result.append(ParameterInfo(name, kind, True, positional_defaults[idx - first_default], annotation_values.get(name)))
+        elif kind == KEYWORD_ONLY and name in keyword_defaults:
+            result.append(ParameterInfo(name, kind, True, keyword_defaults[name], annotation_values.get(name)))
+        else:
+            result.append(ParameterInfo(name, kind, False, None, annotation_values.get(name)))
+
+    parameters = tuple(result)
+    _PARAMETER_CACHE[func] = (defaults, kwdefaults, annotations, parameters)
+    return parameters
+
+
+def _signature_parameters(func: Callable) -> Tuple[ParameterInfo, ...]:
+    result = list()
+
+    for param in inspect.signature(func).parameters.values():
+        has_default = param.default is not inspect.Parameter.empty
+        annotation = param.annotation if param.annotation is not inspect.Parameter.empty else None
+        result.append(ParameterInfo(param.name, param.kind.name.lower(), has_default, param.default if has_default else None, annotation))
+
+    return tuple(result)
+
+
+# the annotations resolved from strings for each function, keyed by the text of the annotation; entries go away with their functions
+_ANNOTATION_CACHE: "weakref.WeakKeyDictionary[Callable, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+
+
+def resolve_annotation(func: Callable, annotation: Any) -> Any:
+    """
+    Resolve an annotation written as a string, as all annotations are in modules using `from __future__ import annotations`, to the object it
+    names. The string is evaluated in the namespace of the module that defines the function, and the result is cached for as long as that
+    function exists.
+
+    This is done only when an annotation is needed, such as when a command is invoked or its help is shown, so that modules with many commands
+    do not pay for resolving the annotations of commands that are not used.
+
+    :param func: The function to which the annotation belongs.
+    :param annotation: The annotation, as returned by `function_parameters`.
+    :returns: The object named by the annotation if it is a string, otherwise the annotation unchanged.
+    """
+    if not isinstance(annotation, str):
+        return annotation
+
+    while hasattr(func, "__wrapped__"):
+        func = func.__wrapped__
+
+    resolved = _ANNOTATION_CACHE.setdefault(func, dict())
+
+    if annotation not in resolved:
+        try:
+            resolved[annotation] = eval(annotation, getattr(func, "__globals__", dict()))  # pylint: disable=eval-used
+        except Exception as error:  # pylint: disable=broad-except
+            raise ValueError(f"Cannot resolve annotation {annotation!r} of {getattr(func, '__name__', func)}: {error}") from error
+
+    return resolved[annotation]
+
+
 def get_default_args(func: Callable) -> Dict[str, Any]:
     """
     Return all default arguments for the given function.
@@ -269,13 +487,7 @@ def get_default_args(func: Callable) -> Dict[str, Any]:
     :param func: The function for which to retrieve default arguments.
     :returns: A dictionary of default arguments.
     """
-    result = dict()
-
-    for (key, val) in inspect.signature(func).parameters.items():
-        if val.default is not inspect.Parameter.empty:
-            result[key] = val.default
-
-    return result
+    return {param.name: param.default for param in function_parameters(func) if param.has_default}
 
 
 def format_default(value: object) -> str:
@@ -0,0 +1,346 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Invokes commands and returns their results as data, rather than printing them and exiting.
+
+This is what `begin_clippy` uses internally, and it may also be called directly by programs that embed Clippy commands.
+"""
+
+import os
+import sys
+from contextlib import nullcontext
+from types import ModuleType
+from typing import Any, Dict, List, Optional, Union
+
+from .command_input import close_input_streams, closing_input_streams
+from .command_method import CommandMethod
+from .command_module import CommandModule, create_command_module_for_module
+from .options import ClippyOptions, split_clippy_options
+from .prefix_index import AmbiguousPrefixError
+
+# the argument that separates the stages of a pipeline, as in `a --x 1 :: b :: c --y 2`
+STAGE_SEPARATOR = "::"
+
+
+class DispatchResult:
+    """The outcome of dispatching a list of arguments to a module."""
+
+    @property
+    def value(self) -> Any:
+        """The value returned by the invoked command, or None if no command was invoked."""
+        return self._value
+
+    @property
+    def status(self) -> int:
+        """The exit status; zero for success, non-zero if the arguments did not name a command."""
+        return self._status
+
+    @property
+    def output(self) -> Optional[str]:
+        """Help, version, or error text to show instead of a value, if no command was invoked."""
+        return self._output
+
+    @property
+    def invoked(self) -> bool:
+        """Returns true if a command was called and `value` holds its result."""
+        return self._invoked
+
+    @property
+    def command(self) -> Optional[CommandMethod]:
+        """The command that was invoked, if any."""
+        return self._command
+
+    def __init__(self,  # pylint: disable=too-many-arguments
+                 value: Any = None,
+                 status: int = 0,
+                 output: Optional[str] = None,
+                 invoked: bool = False,
+                 command: Optional[CommandMethod] = None):
+        """
+        Creates a new object to hold the outcome of a dispatch.
+
+        :param value: The value returned by the command. Optional. Defaults to None.
+        :param status: The exit status. Optional. Defaults to zero.
+        :param output: Text to show instead of a value. Optional. Defaults to None.
+        :param invoked: Whether a command was called. Optional. Defaults to false.
+        :param command: The command that was invoked. Optional. Defaults to None.
+        """
+        if not isinstance(status, int):
+            raise TypeError(f"Parameter status must be an integer, received {type(status)}.")
+
+        if output is not None:
+            if not isinstance(output, str):
+                raise TypeError(f"Parameter output must be a string if provided, received {type(output)}.")
+
+        self._value = value
+        self._status = status
+        self._output = output
+        self._invoked = invoked
+        self._command = command
+
+    def __str__(self):
+        return self.__repr__()
+
+    def __repr__(self):
+        if self.invoked:
+            return f"{self.__class__.__name__}({self.value!r})"
+
+        return f"{self.__class__.__name__}({self.status!r}, {self.output!r})"
+
+
+def dispatch(target: Union[ModuleType, CommandModule], arguments: List[str]) -> DispatchResult:
+    """
+    Invoke the command named by the given arguments. Nothing is printed, and `sys.exit` is never called.
+
+    This does not modify any global state, so it may be called from many threads at once.
+
+    :param target: A module containing Clippy commands, or a `CommandModule` that has already been created for one.
+    :param arguments: The command name followed by its arguments, without the program name that begins `sys.argv`. May include Clippy options.
+    :returns: The returned value, or the text to show and exit status if no command was invoked.
+    """
+    if target is None:
+        raise ValueError("Parameter target is required.")
+
+    if isinstance(target, ModuleType):
+        command_module = create_command_module_for_module(target)
+    elif isinstance(target, CommandModule):
+        command_module = target
+    else:
+        raise TypeError(f"Parameter target must be a module or CommandModule, received {type(target)}")
+
+    try:
+        options, remaining = split_clippy_options(list(arguments))
+    except ValueError as error:
+        return DispatchResult(status=1, output=str(error))
+
+    return dispatch_arguments(command_module, remaining, options)
+
+
+def dispatch_arguments(command_module: CommandModule,
+                       arguments: List[str],
+                       options: Optional[ClippyOptions] = None) -> DispatchResult:
+    """
+    Invoke the command named by the given arguments within a module.
+
+    :param command_module: The module containing the command.
+    :param arguments: The command name followed by its arguments, with any Clippy options already removed.
+    :param options: The Clippy options for this invocation. Optional. Defaults to no options.
+    :returns: The returned value, or the text to show and exit status if no command was invoked.
+    """
+    if options is None:
+        options = ClippyOptions()
+
+    # list the commands or options that could complete a partial argument, as for shell completion, rather than running anything
+    if options.complete is not None:
+        return DispatchResult(status=0, output="\n".join(complete_arguments(command_module, arguments, options.complete)))
+
+    # only the commands whose names or documentation match the search terms are shown
+    if options.search is not None:
+        return _search(command_module, [options.search])
+
+    # stages separated by `::` run one after another in this process, each receiving the value returned by the last
+    if STAGE_SEPARATOR in arguments:
+        from .pipeline import run_pipeline  # pylint: disable=import-outside-toplevel
+        return run_pipeline(command_module, arguments, options)
+
+    # if no args are given, show available commands (with an error code)
+    if not arguments:
+        return DispatchResult(status=1, output=command_module.help())
+
+    # read the command, which is just the first argument
+    command = arguments[0]
+
+    # if the user requested help intentionally, show available commands (with a success code), or only those matching any words that follow
+    if command == "--help":
+        if len(arguments) > 1:
+            return _search(command_module, arguments[1:])
+
+        return DispatchResult(status=0, output=command_module.help())
+
+    # the version command is only valid if the module has a __version__ attribute
+    if command == "--version":
+        if command_module.has_version:
+            return DispatchResult(status=0, output=f"{command_module.name} v{command_module.version}")
+
+        return DispatchResult(status=1, output=f"Module {command_module.name} has no version information")
+
+    # commands may be abbreviated, but only when the abbreviation matches a single command; nothing is auto-corrected
+    try:
+        target_command = command_module.find_command(command)
+    except AmbiguousPrefixError as error:
+        return DispatchResult(status=1, output=str(error))
+
+    if target_command is None:
+        return DispatchResult(status=1, output="Unrecognized command {}".format(command))
+
+    command = target_command.name
+    metrics = enabled_metrics(options)
+
+    if metrics is not None:
+        metrics.count_invocation(command)
+
+    # read the provided arguments to the command; a file that is split is left for each process to read
+    # options may be abbreviated as commands may, with the same rule for abbreviations that match more than one
+    # arguments that cannot be converted are reported like any other mistake on the command line, rather than raised to each front end
+    try:
+        with phase_timer(metrics, command, "parse"):
+            param_pairs = target_command.parse_arguments(list(arguments[1:]), open_inputs=split_jobs(target_command, options) == 1)
+    except (ValueError, TypeError) as error:
+        return DispatchResult(status=1, output=str(error))
+
+    # show help info if requested
+    if "help" in param_pairs:
+        close_input_streams(param_pairs)
+        return DispatchResult(status=0, output=target_command.help(command_module.name))
+
+    # verify that we have all required arguments
+    try:
+        with phase_timer(metrics, command, "validate"):
+            target_command.validate_arguments(param_pairs)
+    except (ValueError, TypeError) as error:
+        close_input_streams(param_pairs)
+        return DispatchResult(status=1, output=str(error))
+
+    # finally, invoke the desired command with all given arguments
+    # when parsing the module is also profiled, the caller has already started profiling
+    profiler = None
+
+    if (options.profile or os.environ.get("CLIPPY_PROFILE")) and not options.profile_load:
+        from .profiling import create_profiler  # pylint: disable=import-outside-toplevel
+        profiler = create_profiler(options, command)
+
+    with phase_timer(metrics, command, "call"):
+        if profiler is None:
+            value = call_command(target_command, param_pairs, options)
+        else:
+            with profiler:
+                value = call_command(target_command, param_pairs, options)
+
+    return DispatchResult(value=value, invoked=True, command=target_command)
+
+
+def enabled_metrics(options: ClippyOptions) -> Any:
+    """
+    Get the registry in which metrics are being recorded, importing the metrics module only if metrics may be enabled.
+
+    :param options: The Clippy options for this invocation, including `--clippy-metrics`.
+    :returns: The registry from `metrics.get_metrics`, or None if metrics are disabled.
+    """
+    # a registry can only exist if the option or environment variable is set, or if a program imported the module to enable metrics itself
+    if not options.metrics and not os.environ.get("CLIPPY_METRICS") and "clippy.metrics" not in sys.modules:
+        return None
+
+    from .metrics import get_metrics as get_registry  # pylint: disable=import-outside-toplevel
+    return get_registry(options.metrics)
+
+
+def phase_timer(metrics: Any, command: str, phase: str) -> Any:
+    """
+    Get a context manager that times one phase of an invocation, importing the metrics module only if metrics are enabled.
+
+    :param metrics: The registry from `enabled_metrics`, or None if metrics are disabled.
+    :param command: The name of the command.
+    :param phase: One of `metrics.PHASES`.
+    :returns: A timer, or a context manager that does nothing if metrics are disabled.
+    """
+    if metrics is None:
+        return nullcontext()
+
+    from .metrics import phase_timer as timer  # pylint: disable=import-outside-toplevel
+    return timer(metrics, command, phase)
+
+
+def split_jobs(command: CommandMethod, options: ClippyOptions) -> int:
+    """
+    Get the number of processes among which to split a command's input, importing the split module only if `--clippy-jobs` was given.
+
+    :param command: The command to run.
+    :param options: The Clippy options for this invocation.
+    :returns: The number of processes, or one if the input is not split.
+    """
+    if options.jobs is None or not command.settings.get("split"):
+        return 1
+
+    from .split import split_jobs as count_jobs  # pylint: disable=import-outside-toplevel
+    return count_jobs(command, options)
+
+
+def _search(command_module: CommandModule, terms: List[str]) -> DispatchResult:
+    from .search import search_commands  # pylint: disable=import-outside-toplevel
+
+    status, output = search_commands(command_module, terms)
+    return DispatchResult(status=status, output=output)
+
+
+def complete_arguments(command_module: CommandModule, arguments: List[str], partial: str) -> List[str]:
+    """
+    List the names that could complete a partial argument, using each index rather than scanning every command.
+
+    :param command_module: The module containing the commands.
+    :param arguments: The arguments before the partial one; if these name a command, its options are completed instead of command names.
+    :param partial: The beginning of the argument to complete.
+    :returns: The matching commands or options, sorted.
+    """
+    if not arguments:
+        builtin = [option for option in ["--help", "--version"] if option.startswith(partial) and (option != "--version" or command_module.has_version)]
+        return command_module.command_index.with_prefix(partial) + builtin
+
+    try:
+        command = command_module.find_command(arguments[0])
+    except AmbiguousPrefixError:
+        return list()
+
+    # values for positional parameters are not completed
+    if command is None or not partial.startswith("--"):
+        return list()
+
+    return [f"--{name}" for name in command.param_index.with_prefix(partial[len("--"):])]
+
+
+def call_command(command: CommandMethod, arguments: Dict[str, Any], options: ClippyOptions) -> Any:
+    """
+    Call a command, reusing a stored result instead if the command was marked with `@clippy(cache=True)`.
+
+    :param command: The command to call.
+    :param arguments: The converted arguments to the command.
+    :param options: The Clippy options for this invocation; `--clippy-no-cache` skips stored results, and `--clippy-jobs` splits the input
+                    of a command marked with `@clippy(split=...)` among processes, which are never cached.
+    :returns: The value returned by the command. Streams opened for the command's file parameters are closed once it returns, or, if it
+              returns an iterator, once that is exhausted.
+    """
+    try:
+        value = _call_command(command, arguments, options)
+    except BaseException:
+        close_input_streams(arguments)
+        raise
+
+    return closing_input_streams(value, arguments)
+
+
+def _call_command(command: CommandMethod, arguments: Dict[str, Any], options: ClippyOptions) -> Any:
+    jobs = split_jobs(command, options)
+
+    if jobs > 1:
+        from .split import run_split  # pylint: disable=import-outside-toplevel
+        return run_split(command, arguments, jobs)
+
+    if not command.settings.get("cache") or options.no_cache:
+        return command.call(arguments)
+
+    # the store, and the modules it needs to hash and pickle results, are only imported for commands marked to be cached
+    from .result_cache import ResultCache  # pylint: disable=import-outside-toplevel
+
+    cache = ResultCache()
+    key = cache.key(command.implementation, arguments)
+
+    if key is None:
+        return command.call(arguments)
+
+    found, value = cache.get(key, command.settings.get("ttl"))
+
+    if not found:
+        value = command.call(arguments)
+        cache.put(key, value)
+
+    return value
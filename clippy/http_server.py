@@ -0,0 +1,311 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Serves every command in a module over HTTP, started with `--clippy-serve=<address>`.
+
+The address is `host:port`, or just a port to listen on 127.0.0.1; an address containing a `/` is the path of a Unix domain socket. Each
+command is a route named after the command, `/<command>`, taking its parameters from the query string, a JSON object in the body of a POST
+request, or both. Values are converted through each parameter's type annotation, just as on the command line. `/` lists the commands.
+
+Results are returned as JSON. Iterators and generators are streamed as JSON Lines with chunked transfer encoding, so large results are never
+held in memory. Connections are kept alive between requests, and each connection is served on its own thread.
+"""
+
+import json
+import socket
+import socketserver
+import sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+
+from .command_module import CommandModule
+from .command_output import BATCH_SIZE, is_records, to_serializable
+from .dispatch import call_command
+from .metrics import get_metrics, phase_timer
+from .options import ClippyOptions
+from .zygote import remove_socket
+
+DEFAULT_HOST = "127.0.0.1"
+
+JSON_CONTENT_TYPE = "application/json"
+JSONL_CONTENT_TYPE = "application/x-ndjson"
+
+# the largest request body read, in bytes
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+
+def parse_address(address: str) -> Tuple[int, Union[str, Tuple[str, int]]]:
+    """
+    Read an address given to `--clippy-serve`.
+
+    :param address: A Unix domain socket path, `host:port`, or a port.
+    :returns: A tuple of the socket address family and the address to bind.
+    """
+    if not address:
+        raise ValueError("Parameter address is required.")
+
+    if "/" in address:
+        return socket.AF_UNIX, address
+
+    host, _, port = address.rpartition(":")
+
+    if not port.isdigit():
+        raise ValueError(f"Address {address} must be host:port, a port, or the path of a Unix domain socket")
+
+    return socket.AF_INET, (host or DEFAULT_HOST, int(port))
+
+
+def parse_json_body(body: bytes) -> Dict[str, Any]:
+    """
+    Read the parameters in the body of a POST request.
+
+    :param body: The body, which is empty or a JSON object.
+    :returns: Values keyed by parameter name.
+    """
+    if not body:
+        return dict()
+
+    values = json.loads(body.decode("utf-8"))
+
+    if not isinstance(values, dict):
+        raise ValueError("Request body must be a JSON object of parameter names and values")
+
+    return values
+
+
+class CommandRequestHandler(BaseHTTPRequestHandler):
+    """Handles one connection to a `CommandHTTPServer`, which may carry many requests."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        # headers and body are written separately, which Nagle's algorithm would delay on kept-alive TCP connections
+        self.disable_nagle_algorithm = self.server.address_family != socket.AF_UNIX
+        super().setup()
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Respond to a GET request, with parameters in the query string."""
+        self._respond(read_body=False)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Respond to a POST request, with parameters in the query string and a JSON object in the body."""
+        self._respond(read_body=True)
+
+    def address_string(self):
+        # Unix domain socket clients have no address
+        return self.client_address[0] if self.client_address else "local"
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        # logging every request to stderr would limit throughput; errors are still returned to the client
+        pass
+
+    def _respond(self, read_body: bool) -> None:
+        command_module: CommandModule = self.server.command_module  # type: ignore
+        url = urlsplit(self.path)
+        name = url.path.strip("/")
+
+        # the body is read before anything else, so that no response leaves it on the connection to be read as the next request
+        body = self._read_body()
+
+        if body is None:
+            return
+
+        if not name:
+            self._send_json(200, describe_module(command_module))
+            return
+
+        if name not in command_module.commands.keys():
+            self._send_json(404, {"error": f"Unrecognized command {name}"})
+            return
+
+        command = command_module.commands[name]
+        options: ClippyOptions = self.server.options  # type: ignore
+        metrics = get_metrics(options.metrics)
+
+        if metrics is not None:
+            metrics.count_invocation(name)
+
+        try:
+            with phase_timer(metrics, name, "parse"):
+                values: Dict[str, Any] = dict(parse_qsl(url.query, keep_blank_values=True))
+
+                if read_body:
+                    values.update(parse_json_body(body))
+
+                arguments = command.bind_arguments(values)
+
+            with phase_timer(metrics, name, "validate"):
+                command.validate_arguments(arguments)
+        except (ValueError, TypeError) as error:
+            self._send_json(400, {"error": str(error)})
+            return
+
+        try:
+            with phase_timer(metrics, name, "call"):
+                value = call_command(command, arguments, options)
+        except Exception as error:  # pylint: disable=broad-except
+            # any error raised by a command is reported to the client rather than closing the connection
+            self._send_json(500, {"error": f"{type(error).__name__}: {error}"})
+            return
+
+        with phase_timer(metrics, name, "output"):
+            if is_records(value) and not isinstance(value, (list, tuple)):
+                self._send_stream(value)
+            else:
+                self._send_json(200, value)
+
+    def _read_body(self) -> Optional[bytes]:
+        length = self.headers.get("Content-Length") or "0"
+
+        # a body that is not read leaves the connection at an unknown position, so it is closed after the error is sent
+        if not length.isdigit():
+            self._send_json(400, {"error": f"Invalid Content-Length {length}"}, close=True)
+            return None
+
+        if int(length) > MAX_BODY_BYTES:
+            self._send_json(413, {"error": f"Request body is larger than {MAX_BODY_BYTES} bytes"}, close=True)
+            return None
+
+        return self.rfile.read(int(length)) if int(length) else b""
+
+    def _send_json(self, status: int, value: Any, close: bool = False) -> None:
+        body = (json.dumps(value, default=to_serializable) + "\n").encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", JSON_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+
+        # the header also tells the handler to close the connection once the response is sent
+        if close:
+            self.send_header("Connection", "close")
+
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, records: Iterable[Any]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", JSONL_CONTENT_TYPE)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        batch = list()
+
+        try:
+            for record in records:
+                batch.append(json.dumps(record, default=to_serializable) + "\n")
+
+                if len(batch) >= BATCH_SIZE:
+                    self._write_chunk("".join(batch).encode("utf-8"))
+                    batch = list()
+        except Exception:  # pylint: disable=broad-except
+            # the status was already sent, so the only way to report an error is to end the response without its final chunk
+            self.close_connection = True
+            return
+
+        if batch:
+            self._write_chunk("".join(batch).encode("utf-8"))
+
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+
+class CommandHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    """An HTTP server for the commands in one module, serving each connection on its own thread."""
+
+    daemon_threads = True
+
+    # the default of five pending connections drops bursts of concurrent clients
+    request_queue_size = 128
+
+    @property
+    def command_module(self) -> CommandModule:
+        """The module whose commands are served."""
+        return self._command_module
+
+    @property
+    def options(self) -> ClippyOptions:
+        """The Clippy options applied to every request, such as `--clippy-no-cache`."""
+        return self._options
+
+    def __init__(self, command_module: CommandModule, address: str, options: Optional[ClippyOptions] = None):
+        """
+        Creates a new server and binds its socket. Requests are not served until `serve_forever` is called.
+
+        :param command_module: The module whose commands are served.
+        :param address: A Unix domain socket path, `host:port`, or a port; see `parse_address`.
+        :param options: The Clippy options applied to every request. Optional. Defaults to no options.
+        """
+        if not isinstance(command_module, CommandModule):
+            raise TypeError(f"Parameter command_module must be a CommandModule, received {type(command_module)}")
+
+        family, bind_address = parse_address(address)
+        self.address_family = family
+        self._command_module = command_module
+        self._options = options if options is not None else ClippyOptions()
+        super().__init__(bind_address, CommandRequestHandler)  # type: ignore
+
+    def __str__(self):
+        return self.__repr__()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.command_module.name!r}, {self.server_address!r})"
+
+    def server_bind(self):
+        if self.address_family != socket.AF_UNIX:
+            super().server_bind()
+            return
+
+        remove_socket(self.server_address)
+
+        # HTTPServer looks up a host name and port, which Unix domain sockets do not have
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+    def server_close(self):
+        super().server_close()
+
+        if self.address_family == socket.AF_UNIX:
+            try:
+                remove_socket(self.server_address)
+            except OSError:
+                pass
+
+
+def describe_module(command_module: CommandModule) -> Dict[str, Any]:
+    """
+    Describe the commands in a module, as returned for requests to `/`.
+
+    :param command_module: The module to describe.
+    :returns: The module name and version, and each command's documentation and parameters.
+    """
+    return {
+        "name": command_module.name,
+        "version": command_module.version if command_module.has_version else None,
+        "commands": {name: {"documentation": command.documentation,
+                            "parameters": [{"name": param.name, "type": param.annotation_name, "required": not param.has_default}
+                                           for param in sorted(command.params.values(), key=lambda x: x.index)]}
+                     for (name, command) in command_module.commands.items()}
+    }
+
+
+def serve(command_module: CommandModule, address: str, options: Optional[ClippyOptions] = None) -> None:
+    """
+    Serve a module's commands over HTTP until interrupted.
+
+    :param command_module: The module whose commands are served.
+    :param address: A Unix domain socket path, `host:port`, or a port; see `parse_address`.
+    :param options: The Clippy options applied to every request. Optional. Defaults to no options.
+    """
+    server = CommandHTTPServer(command_module, address, options)
+    print(f"Serving {command_module.name} on {address}", file=sys.stderr)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
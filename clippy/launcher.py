@@ -0,0 +1,418 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Runs a module's commands through Clippy, as in `python -m clippy <module> [arguments]` or `clippy <module> [arguments]`.
+
+Help, version, and search requests are answered from the module's source alone, without importing the module or anything it imports: commands,
+parameters, and documentation are read from the abstract syntax tree, default values from literals, and the version from a literal
+`__version__` or a `__version__ = version("package")` lookup of installed package metadata. The text is rendered by the same `CommandModule`
+and `CommandMethod` methods as at runtime, so it is identical. If anything cannot be read statically, or a command is being run, the module
+is run as with `python -m <module>`.
+"""
+
+import ast
+import builtins
+import importlib.util
+import os
+import runpy
+import sys
+from ast import FunctionDef, Module
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .command_method import CommandMethod
+from .command_module import CommandModule
+from .command_param import CommandParam
+from .command_return import CommandReturn
+from .common import function_docs_from_string, parse_ast, top_level_functions
+from .common import POSITIONAL_ONLY, POSITIONAL_OR_KEYWORD, VAR_POSITIONAL, KEYWORD_ONLY, VAR_KEYWORD
+from .dispatch import dispatch_arguments
+from .options import split_clippy_options
+
+USAGE = ("Usage:\n\tpython -m clippy <module> [<command>] [arguments]\n\tclippy --index [<paths>...] [--output=<file>] [--jobs=<count>]"
+         "\n\tclippy --run <command> [arguments]")
+
+# functions that read an installed package's version, as in `__version__ = version("package")`
+VERSION_FUNCTIONS = ["version", "get_version"]
+
+
+class NotStaticError(ValueError):
+    """Raised when a module cannot be described from its source alone, so it must be imported."""
+
+
+def find_module_file(module_name: str) -> Tuple[str, str]:
+    """
+    Find the source file that `python -m <module>` would run, without importing the module itself.
+
+    :param module_name: The name of a module or package; packages are run through their `__main__` module.
+    :returns: A tuple of the name of the module to run and its source file.
+    """
+    spec = importlib.util.find_spec(module_name)
+
+    if spec is None:
+        raise ImportError(f"No module named {module_name}")
+
+    if spec.submodule_search_locations is not None:
+        return find_module_file(f"{module_name}.__main__")
+
+    if not spec.origin or not spec.origin.endswith(".py") or not os.path.isfile(spec.origin):
+        raise NotStaticError(f"Module {module_name} has no Python source file")
+
+    return module_name, spec.origin
+
+
+def _module_statements(body: List[ast.stmt]) -> Iterator[ast.stmt]:
+    # the statements run when the module is imported, including those inside conditionals and exception handlers, but not function bodies
+    for node in body:
+        yield node
+
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            for field in ("body", "orelse", "finalbody"):
+                yield from _module_statements(getattr(node, field, list()))
+
+            for handler in getattr(node, "handlers", list()):
+                yield from _module_statements(handler.body)
+
+
+def _bound_names(node: ast.stmt) -> List[str]:
+    # the names a module-level statement binds by anything other than an import or a definition
+    targets: List[ast.AST] = list()
+
+    if isinstance(node, ast.Assign):
+        targets = list(node.targets)
+    elif isinstance(node, (ast.AnnAssign, ast.AugAssign, ast.For, ast.AsyncFor)):
+        targets = [node.target]
+    elif isinstance(node, (ast.With, ast.AsyncWith)):
+        targets = [item.optional_vars for item in node.items if item.optional_vars is not None]
+    elif isinstance(node, ast.Try):
+        return [handler.name for handler in node.handlers if handler.name]
+
+    return [target.id for root in targets for target in ast.walk(root) if isinstance(target, ast.Name)]
+
+
+def _clippy_decorator_names(tree: Module) -> Tuple[List[str], List[str], List[str]]:
+    # the names bound to the decorator, as by `from clippy import clippy`, and to the package, as by `import clippy`, and the names whose
+    # values cannot be known from source, as they are assigned or imported from another module that may re-export the decorator
+    names = list()
+    modules = list()
+    unresolved = list()
+    bindings: List[str] = list()
+
+    for node in _module_statements(tree.body):
+        if isinstance(node, ast.ImportFrom):
+            # any name, including the decorator, may be bound by a star import
+            if any(alias.name == "*" for alias in node.names):
+                raise NotStaticError(f"Module imports * from {node.module}")
+
+            if node.module in ("clippy", "clippy.clip"):
+                names += [alias.asname or alias.name for alias in node.names if alias.name == "clippy"]
+            else:
+                unresolved += [alias.asname or alias.name for alias in node.names if alias.name == "clippy"]
+
+            bindings += [alias.asname or alias.name for alias in node.names]
+        elif isinstance(node, ast.Import):
+            modules += [alias.asname or alias.name for alias in node.names if alias.name in ("clippy", "clippy.clip")]
+            bindings += [alias.asname or alias.name.split(".")[0] for alias in node.names]
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bindings.append(node.name)
+        else:
+            assigned = _bound_names(node)
+            unresolved += assigned
+            bindings += assigned
+
+    # a name bound to the decorator and to something else may be either when a function is decorated
+    for name in set(names + modules):
+        if bindings.count(name) > 1:
+            raise NotStaticError(f"Decorator {name} is bound more than once")
+
+    return names, modules, unresolved
+
+
+def _decorator_root(node: ast.expr) -> Optional[str]:
+    if isinstance(node, ast.Call):
+        node = node.func
+
+    while isinstance(node, ast.Attribute):
+        node = node.value
+
+    return node.id if isinstance(node, ast.Name) else None
+
+
+def _is_clippy_decorator(node: ast.expr, names: List[str], modules: List[str]) -> bool:
+    if isinstance(node, ast.Call):
+        node = node.func
+
+    if isinstance(node, ast.Name):
+        return node.id in names
+
+    return isinstance(node, ast.Attribute) and node.attr == "clippy" and isinstance(node.value, ast.Name) and node.value.id in modules
+
+
+def _literal(node: ast.expr) -> Any:
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError) as error:
+        raise NotStaticError("Value is not a literal") from error
+
+
+def _annotation(node: Optional[ast.expr]) -> Optional[type]:
+    if node is None:
+        return None
+
+    # quoted annotations, as for forward references, are read as the expression they contain
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        node = ast.parse(node.value, mode="eval").body
+
+    # built-in types convert arguments, so they must be the real type; other types are only named in help, so a stand-in with the same name
+    # is enough
+    if isinstance(node, ast.Name):
+        value = getattr(builtins, node.id, None)
+        return value if isinstance(value, type) else type(node.id, (), dict())
+
+    if isinstance(node, ast.Attribute):
+        return type(node.attr, (), dict())
+
+    raise NotStaticError("Annotation is not a simple name")
+
+
+def _stub(name: str):
+    def stub(*args, **kwargs):
+        raise NotStaticError(f"Command {name} was read from source and cannot be called")
+
+    stub.__name__ = name
+    return stub
+
+
+def static_command_method(definition: FunctionDef) -> CommandMethod:
+    """
+    Describe a function from its definition alone. The result can render help, but cannot be called.
+
+    :param definition: A function from the AST.
+    :returns: An object holding the function's documentation and parameters.
+    """
+    arguments = definition.args
+    positional = [(arg, POSITIONAL_ONLY) for arg in getattr(arguments, "posonlyargs", list())] + [(arg, POSITIONAL_OR_KEYWORD) for arg in arguments.args]
+    first_default = len(positional) - len(arguments.defaults)
+    defaults: Dict[str, Any] = dict()
+
+    for (idx, (arg, _)) in enumerate(positional):
+        if idx >= first_default:
+            defaults[arg.arg] = _literal(arguments.defaults[idx - first_default])
+
+    for (arg, default) in zip(arguments.kwonlyargs, arguments.kw_defaults):
+        if default is not None:
+            defaults[arg.arg] = _literal(default)
+
+    ordered = list(positional)
+
+    if arguments.vararg is not None:
+        ordered.append((arguments.vararg, VAR_POSITIONAL))
+
+    ordered += [(arg, KEYWORD_ONLY) for arg in arguments.kwonlyargs]
+
+    if arguments.kwarg is not None:
+        ordered.append((arguments.kwarg, VAR_KEYWORD))
+
+    method_docs, all_param_docs, return_doc = function_docs_from_string(ast.get_docstring(definition) or "")
+    params = [CommandParam(name=arg.arg,
+                           index=idx,
+                           documentation=all_param_docs.get(arg.arg, None) if all_param_docs is not None else None,
+                           annotation=_annotation(arg.annotation),
+                           default_args={arg.arg: defaults[arg.arg]} if arg.arg in defaults else None,
+                           kind=kind)
+              for (idx, (arg, kind)) in enumerate(ordered)]
+
+    return CommandMethod(implementation=_stub(definition.name),
+                         documentation=method_docs,
+                         parameters=params,
+                         return_value=CommandReturn(documentation=return_doc, annotation=_annotation(definition.returns)))
+
+
+def _static_version(tree: Module) -> Optional[str]:
+    assignments = [node for node in tree.body
+                   if isinstance(node, (ast.Assign, ast.AnnAssign))
+                   and any(isinstance(target, ast.Name) and target.id == "__version__" for target in getattr(node, "targets", [getattr(node, "target", None)]))]
+    imported = [node for node in tree.body
+                if isinstance(node, (ast.Import, ast.ImportFrom)) and any((alias.asname or alias.name) == "__version__" for alias in node.names)]
+
+    if imported or len(assignments) > 1:
+        raise NotStaticError("Version is not assigned once at the top level")
+
+    if not assignments:
+        return None
+
+    value = assignments[0].value
+
+    if value is None:
+        raise NotStaticError("Version is declared without a value")
+
+    if isinstance(value, ast.Call):
+        name = value.func.attr if isinstance(value.func, ast.Attribute) else getattr(value.func, "id", None)
+
+        if name not in VERSION_FUNCTIONS or len(value.args) != 1 or value.keywords:
+            raise NotStaticError("Version is not a literal or package metadata")
+
+        try:
+            from importlib import metadata  # pylint: disable=import-outside-toplevel
+        except ImportError as error:
+            raise NotStaticError("Package metadata cannot be read before Python 3.8") from error
+
+        try:
+            return metadata.version(_literal(value.args[0]))
+        except metadata.PackageNotFoundError as error:
+            raise NotStaticError("Package metadata was not found") from error
+
+    return _literal(value)
+
+
+def clippy_definitions(tree: Module) -> List[FunctionDef]:
+    """
+    Find the top-level functions of a module that are decorated with `@clippy`, from its source alone.
+
+    :param tree: The parsed source of the module.
+    :returns: The definition of each command, in order. Raises `NotStaticError` if whether a function is a command cannot be known from source,
+             as when the module has a star import or a function is decorated with a name that is assigned.
+    """
+    names, modules, unresolved = _clippy_decorator_names(tree)
+    definitions = list(top_level_functions(tree.body))
+
+    # a function defined twice could be a command in one definition but not the other
+    if len({definition.name for definition in definitions}) != len(definitions):
+        raise NotStaticError("A function is defined more than once")
+
+    # a decorator whose value is assigned, such as `command = clippy`, may be the Clippy decorator
+    for definition in definitions:
+        for decorator in definition.decorator_list:
+            if _decorator_root(decorator) in unresolved:
+                raise NotStaticError(f"Decorator {_decorator_root(decorator)} of {definition.name} cannot be resolved from source")
+
+    return [definition for definition in definitions if any(_is_clippy_decorator(decorator, names, modules) for decorator in definition.decorator_list)]
+
+
+def static_command_module(module_name: str, filename: str) -> CommandModule:
+    """
+    Describe a module from its source alone, without importing it. The result can render help and version text, but cannot call commands.
+
+    :param module_name: The name of the module.
+    :param filename: The module's source file.
+    :returns: An object holding the module's documentation, version, and commands.
+    """
+    tree = parse_ast(filename)
+    docstring = ast.get_docstring(tree, clean=False)
+    commands = [static_command_method(definition) for definition in clippy_definitions(tree)]
+
+    return CommandModule(name=module_name,
+                         documentation=docstring.strip() if docstring else None,
+                         version=_static_version(tree),
+                         command_list=commands,
+                         filename=filename)
+
+
+def is_help_request(arguments: List[str]) -> bool:
+    """
+    Returns true if the given arguments only ask for help or version information, which does not require importing the module.
+
+    :param arguments: The arguments to the module, with any Clippy options removed.
+    """
+    if not arguments or arguments[0] in ("--help", "--version"):
+        return True
+
+    return "--help" in arguments[1:]
+
+
+def static_output(module_name: str, filename: str, arguments: List[str]) -> Optional[Tuple[int, str]]:
+    """
+    Answer a help or version request from source, if possible.
+
+    :param module_name: The name of the module.
+    :param filename: The module's source file.
+    :param arguments: The arguments to the module.
+    :returns: A tuple of exit status and text to print, or None if the module must be imported.
+    """
+    try:
+        options, remaining = split_clippy_options(list(arguments))
+
+        # completions and searches, like help, only need names and documentation
+        if options.complete is None and options.search is None and not is_help_request(remaining):
+            return None
+
+        # a search is answered from the saved index alone while the source is unchanged, without even parsing it
+        terms = [options.search] if options.search is not None else remaining[1:] if remaining and remaining[0] == "--help" else list()
+
+        if options.complete is None and terms:
+            from .search import load_search_index, search_output  # pylint: disable=import-outside-toplevel
+
+            index = load_search_index(filename, module_name)
+
+            if index is not None:
+                return search_output(index, terms)
+
+        result = dispatch_arguments(static_command_module(module_name, filename), remaining, options)
+    except (NotStaticError, ValueError, SyntaxError):
+        return None
+
+    if result.invoked or result.output is None:
+        return None
+
+    return result.status, result.output
+
+
+def run_module(module_name: str, filename: str, arguments: List[str]) -> None:
+    """
+    Run a module as `python -m <module>` would.
+
+    :param module_name: The name of the module.
+    :param filename: The module's source file.
+    :param arguments: The arguments to the module.
+    """
+    sys.argv = [filename] + list(arguments)
+    runpy.run_module(module_name, run_name="__main__", alter_sys=True)
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    """
+    Run a module's commands, answering help and version requests without importing it. This is the `clippy` executable.
+
+    The first argument may instead be `--index`, to index every command in a source tree, or `--run`, to run a command from that index by
+    name alone; see `project_index.py`. These are spelled as options so that they never hide a module named `index` or `run`.
+
+    :param arguments: The module name followed by its arguments. Optional. Defaults to `sys.argv[1:]`.
+    """
+    if arguments is None:
+        arguments = sys.argv[1:]
+
+    if not arguments or arguments[0] in ("-h", "--help"):
+        print(USAGE)
+        sys.exit(0 if arguments else 1)
+
+    # the current directory is importable, as with `python -m`
+    if "" not in sys.path and os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+
+    # a project's commands are indexed once, and then run without knowing the module that owns them
+    if arguments[0] in ("--index", "--run"):
+        from .project_index import index_main, resolve_command  # pylint: disable=import-outside-toplevel,cyclic-import
+
+        if arguments[0] == "--index":
+            status, message = index_main(arguments[1:])
+            print(message)
+            sys.exit(status)
+
+        status, message, found = resolve_command(arguments[1:])
+
+        if found is None:
+            print(message)
+            sys.exit(status)
+
+        module_name, root, arguments = found
+        sys.path.insert(0, root)
+        arguments = [module_name] + arguments
+
+    module_name, filename = find_module_file(arguments[0])
+    output = static_output(module_name, filename, arguments[1:])
+
+    if output is not None:
+        print(output[1])
+        sys.exit(output[0])
+
+    run_module(module_name, filename, arguments[1:])
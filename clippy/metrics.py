@@ -0,0 +1,317 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Records per-command invocation counts, error counts, and latency histograms for each phase of an invocation.
+
+Metrics are disabled unless `enable_metrics` is called, `--clippy-metrics=<path>` is given, or the CLIPPY_METRICS environment variable is set
+to a path. Once enabled, they are written to that path as a JSON snapshot or, for paths ending in `.prom`, in the Prometheus text format; this
+happens on exit and, if CLIPPY_METRICS_INTERVAL is set, every that many seconds.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+PHASES = ["parse", "validate", "call", "output"]
+
+# upper bounds, in seconds, of the latency histogram buckets
+BUCKETS = [0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0]
+
+PROMETHEUS_SUFFIX = ".prom"
+
+
+class Histogram:
+    """A latency histogram with fixed buckets."""
+
+    @property
+    def count(self) -> int:
+        """The number of observations."""
+        return self._count
+
+    @property
+    def total(self) -> float:
+        """The sum of all observations, in seconds."""
+        return self._total
+
+    @property
+    def buckets(self) -> List[int]:
+        """The number of observations in each bucket of `BUCKETS`, followed by the number larger than every bucket."""
+        return list(self._buckets)
+
+    def __init__(self):
+        """Creates a new, empty histogram."""
+        self._count = 0
+        self._total = 0.0
+        self._buckets = [0] * (len(BUCKETS) + 1)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.count} observations, {self.total:.6f}s)"
+
+    def observe(self, seconds: float) -> None:
+        """
+        Add an observation.
+
+        :param seconds: The observed latency.
+        """
+        self._count += 1
+        self._total += seconds
+
+        for (idx, bound) in enumerate(BUCKETS):
+            if seconds <= bound:
+                self._buckets[idx] += 1
+                return
+
+        self._buckets[-1] += 1
+
+    def cumulative(self) -> List[int]:
+        """Returns the number of observations less than or equal to each bucket, followed by the total count."""
+        result = list()
+        running = 0
+
+        for count in self._buckets:
+            running += count
+            result.append(running)
+
+        return result
+
+
+class MetricsRegistry:
+    """Thread-safe storage for the counters and histograms of all commands."""
+
+    def __init__(self):
+        """Creates a new registry with no recorded metrics."""
+        self._lock = threading.Lock()
+        self._invocations: Dict[str, int] = dict()
+        self._errors: Dict[Tuple[str, str], int] = dict()
+        self._phases: Dict[Tuple[str, str], Histogram] = dict()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self._invocations)} commands)"
+
+    def count_invocation(self, command: str) -> None:
+        """
+        Count one invocation of a command.
+
+        :param command: The name of the command.
+        """
+        with self._lock:
+            self._invocations[command] = self._invocations.get(command, 0) + 1
+
+    def count_error(self, command: str, error: str) -> None:
+        """
+        Count one error raised by a command.
+
+        :param command: The name of the command.
+        :param error: The name of the exception type.
+        """
+        with self._lock:
+            self._errors[(command, error)] = self._errors.get((command, error), 0) + 1
+
+    def observe(self, command: str, phase: str, seconds: float) -> None:
+        """
+        Record the duration of one phase of an invocation.
+
+        :param command: The name of the command.
+        :param phase: One of `PHASES`.
+        :param seconds: The duration of the phase.
+        """
+        with self._lock:
+            histogram = self._phases.get((command, phase))
+
+            if histogram is None:
+                histogram = self._phases[(command, phase)] = Histogram()
+
+            histogram.observe(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns all recorded metrics as a dictionary suitable for JSON serialization."""
+        with self._lock:
+            commands: Dict[str, Any] = {name: {"invocations": count, "errors": dict(), "phases": dict()} for (name, count) in self._invocations.items()}
+
+            for ((name, error), count) in self._errors.items():
+                commands.setdefault(name, {"invocations": 0, "errors": dict(), "phases": dict()})["errors"][error] = count
+
+            for ((name, phase), histogram) in self._phases.items():
+                commands.setdefault(name, {"invocations": 0, "errors": dict(), "phases": dict()})["phases"][phase] = {
+                    "count": histogram.count,
+                    "sum": histogram.total,
+                    "buckets": dict(zip([str(bound) for bound in BUCKETS] + ["+Inf"], histogram.cumulative()))
+                }
+
+        return {"timestamp": time.time(), "commands": commands}
+
+    def prometheus(self) -> str:
+        """Returns all recorded metrics in the Prometheus text exposition format."""
+        lines = ["# HELP clippy_invocations_total Number of times each command was invoked.",
+                 "# TYPE clippy_invocations_total counter"]
+
+        with self._lock:
+            for (name, count) in sorted(self._invocations.items()):
+                lines.append(f"clippy_invocations_total{{command=\"{_escape(name)}\"}} {count}")
+
+            lines += ["# HELP clippy_errors_total Number of errors raised by each command, by exception type.",
+                      "# TYPE clippy_errors_total counter"]
+
+            for ((name, error), count) in sorted(self._errors.items()):
+                lines.append(f"clippy_errors_total{{command=\"{_escape(name)}\",type=\"{_escape(error)}\"}} {count}")
+
+            lines += ["# HELP clippy_phase_seconds Time spent in each phase of a command invocation.",
+                      "# TYPE clippy_phase_seconds histogram"]
+
+            for ((name, phase), histogram) in sorted(self._phases.items()):
+                labels = f"command=\"{_escape(name)}\",phase=\"{phase}\""
+
+                for (bound, count) in zip([repr(bound) for bound in BUCKETS] + ["+Inf"], histogram.cumulative()):
+                    lines.append(f"clippy_phase_seconds_bucket{{{labels},le=\"{bound}\"}} {count}")
+
+                lines.append(f"clippy_phase_seconds_sum{{{labels}}} {histogram.total!r}")
+                lines.append(f"clippy_phase_seconds_count{{{labels}}} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> None:
+        """
+        Write all recorded metrics to a file, replacing it atomically so that collectors never read a partial file.
+
+        :param path: The file to write; Prometheus text if it ends in `.prom`, otherwise JSON.
+        """
+        if path.endswith(PROMETHEUS_SUFFIX):
+            text = self.prometheus()
+        else:
+            text = json.dumps(self.snapshot(), indent=1, sort_keys=True)
+
+        temporary = f"{path}.{os.getpid()}.tmp"
+
+        with open(temporary, "w") as file:
+            file.write(text)
+
+        os.replace(temporary, path)
+
+
+class PhaseTimer:
+    """Times one phase of an invocation and counts any error raised within it; used as a context manager."""
+
+    def __init__(self, registry: MetricsRegistry, command: str, phase: str):
+        """
+        Creates a new timer. Timing begins when the context is entered.
+
+        :param registry: The registry in which to record the timing.
+        :param command: The name of the command.
+        :param phase: One of `PHASES`.
+        """
+        self._registry = registry
+        self._command = command
+        self._phase = phase
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._registry.observe(self._command, self._phase, time.perf_counter() - self._start)
+
+        if exc_type is not None:
+            self._registry.count_error(self._command, exc_type.__name__)
+
+
+class NullTimer:
+    """A timer that does nothing, used when metrics are disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+_LOCK = threading.Lock()
+_REGISTRY: Optional[MetricsRegistry] = None
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def enable_metrics(path: Optional[str] = None, interval: Optional[float] = None) -> MetricsRegistry:
+    """
+    Start recording metrics. Calling this again returns the registry that is already recording.
+
+    :param path: The file to which metrics are written on exit. Optional. Defaults to not writing metrics.
+    :param interval: Also write metrics every this many seconds. Optional. Defaults to only writing on exit.
+    :returns: The registry in which metrics are recorded.
+    """
+    global _REGISTRY  # pylint: disable=global-statement
+
+    with _LOCK:
+        if _REGISTRY is not None:
+            return _REGISTRY
+
+        registry = MetricsRegistry()
+
+        if path:
+            atexit.register(registry.export, path)
+
+            if interval:
+                _start_exporter(registry, path, interval)
+
+        _REGISTRY = registry
+        return registry
+
+
+def disable_metrics() -> None:
+    """Stop recording metrics. Metrics that were already recorded are still written on exit, if a path was given."""
+    global _REGISTRY  # pylint: disable=global-statement
+
+    with _LOCK:
+        _REGISTRY = None
+
+
+def get_metrics(path: Optional[str] = None) -> Optional[MetricsRegistry]:
+    """
+    Get the registry in which metrics are being recorded, enabling metrics if a path is given or the CLIPPY_METRICS environment variable is set.
+
+    :param path: The file to which metrics should be written, such as from `--clippy-metrics`. Optional.
+    :returns: The registry, or None if metrics are disabled.
+    """
+    if _REGISTRY is not None:
+        return _REGISTRY
+
+    path = path or os.environ.get("CLIPPY_METRICS")
+
+    if not path:
+        return None
+
+    interval = os.environ.get("CLIPPY_METRICS_INTERVAL")
+    return enable_metrics(path, float(interval) if interval else None)
+
+
+def phase_timer(registry: Optional[MetricsRegistry], command: str, phase: str):
+    """
+    Get a context manager that times one phase of an invocation.
+
+    :param registry: The registry from `get_metrics`, or None if metrics are disabled.
+    :param command: The name of the command.
+    :param phase: One of `PHASES`.
+    :returns: A timer, or a shared timer that does nothing if metrics are disabled.
+    """
+    if registry is None:
+        return NULL_TIMER
+
+    return PhaseTimer(registry, command, phase)
+
+
+def _start_exporter(registry: MetricsRegistry, path: str, interval: float) -> None:
+    def export_periodically():
+        while True:
+            time.sleep(interval)
+            registry.export(path)
+
+    thread = threading.Thread(target=export_periodically, name="clippy-metrics", daemon=True)
+    thread.start()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Defines an in-process cache of parsed modules, so that repeated invocations from a long-running host do not re-parse unchanged files.
+"""
+
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from types import ModuleType
+from typing import Callable, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .command_module import CommandModule  # pylint: disable=cyclic-import
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+# the number of modules kept by default; most hosts only ever invoke one or two
+DEFAULT_MAXSIZE = 32
+
+
+def file_stamp(filename: str) -> Optional[Tuple[int, int]]:
+    """
+    Get the modification time and size of a file, which together identify a revision of that file.
+
+    :param filename: The name of the file.
+    :returns: A tuple of modification time (in nanoseconds) and size, or None if the file cannot be read.
+    """
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+class CommandModuleCache:
+    """A bounded, thread-safe, least-recently-used cache of `CommandModule` objects keyed by module name and source file."""
+
+    @property
+    def maxsize(self) -> int:
+        """The maximum number of modules held by this cache."""
+        return self._maxsize
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        """
+        Creates a new, empty cache.
+
+        :param maxsize: The maximum number of modules to hold. Optional. Defaults to 32. Zero disables caching.
+        """
+        if not isinstance(maxsize, int):
+            raise TypeError(f"Parameter maxsize must be an integer, received {type(maxsize)}.")
+
+        if maxsize < 0:
+            raise ValueError(f"Parameter maxsize must be zero or greater, received {maxsize}.")
+
+        self._maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        return self.__repr__()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.info()})"
+
+    def get_or_create(self,
+                      imported_module: ModuleType,
+                      module_name: str,
+                      filename: str,
+                      factory: Callable[[], "CommandModule"]) -> "CommandModule":
+        """
+        Get the cached module for the given file, calling `factory` to build it if it is not cached or the file has changed since it was cached.
+
+        :param imported_module: The imported module; entries built from a different module object are not reused.
+        :param module_name: The name of the module.
+        :param filename: The name of the file containing the module.
+        :param factory: Builds the module on a cache miss.
+        :returns: The cached or newly-built module.
+        """
+        key = (module_name, os.path.abspath(filename))
+        stamp = file_stamp(filename)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] == stamp and entry[1] is imported_module:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[2]
+
+            self._misses += 1
+
+        # build outside the lock, so that a slow parse does not block other threads; concurrent misses may both build
+        command_module = factory()
+
+        if stamp is None or not self._maxsize:
+            return command_module
+
+        with self._lock:
+            self._entries[key] = (stamp, imported_module, command_module)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+        return command_module
+
+    def info(self) -> CacheInfo:
+        """Returns the hit and miss counts, maximum size, and current size of this cache."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._maxsize, len(self._entries))
+
+    def clear(self) -> None:
+        """Remove all modules from this cache and reset its statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+
+# the cache used by `create_command_module` and `create_command_module_for_file`
+COMMAND_MODULE_CACHE = CommandModuleCache()
+
+
+def cache_info() -> CacheInfo:
+    """Returns statistics for the shared module cache."""
+    return COMMAND_MODULE_CACHE.info()
+
+
+def cache_clear() -> None:
+    """Remove all modules from the shared module cache."""
+    COMMAND_MODULE_CACHE.clear()
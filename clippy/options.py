@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Defines options that control Clippy itself rather than a command. These are given on the command line with a `--clippy-` prefix.
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+OPTION_PREFIX = "--clippy-"
+
+# the output formats, which are named here so that `--clippy-format` is checked before a command runs, without importing the writers
+TEXT_FORMAT = "text"
+JSON_FORMAT = "json"
+JSONL_FORMAT = "jsonl"
+CSV_FORMAT = "csv"
+NPY_FORMAT = "npy"
+RAW_FORMAT = "raw"
+
+FORMATS = [TEXT_FORMAT, JSON_FORMAT, JSONL_FORMAT, CSV_FORMAT, NPY_FORMAT, RAW_FORMAT]
+
+# the kinds of profile, which are named here so that `--clippy-profile` is checked before a command runs, without importing the profiler
+CPU_PROFILE = "cpu"
+MEMORY_PROFILE = "memory"
+
+PROFILE_MODES = [CPU_PROFILE, MEMORY_PROFILE]
+
+# the number of lines listed in memory reports, unless overridden by the CLIPPY_PROFILE_TOP environment variable
+DEFAULT_PROFILE_TOP = 25
+
+# the name of each option, mapped to whether that option requires a value
+KNOWN_OPTIONS = {
+    "format": True,
+    "no-cache": False,
+    "metrics": True,
+    "profile": True,
+    "profile-output": True,
+    "profile-load": False,
+    "zygote": True,
+    "serve": True,
+    "rpc": False,
+    "rpc-workers": True,
+    "complete": True,
+    "jobs": True,
+    "search": True,
+    "batch": True,
+    "journal": True,
+    "resume": False,
+}
+
+# the options whose values must be positive integers, which are checked before a command runs
+INTEGER_OPTIONS = ["rpc-workers", "jobs"]
+
+
+class ClippyOptions:
+    """The Clippy options given on the command line, with their values."""
+
+    @property
+    def format(self) -> Optional[str]:
+        """The output format requested with `--clippy-format`, if provided."""
+        return self.get("format")
+
+    @property
+    def no_cache(self) -> bool:
+        """Returns true if `--clippy-no-cache` was given, to ignore stored results."""
+        return self.get("no-cache") == "True"
+
+    @property
+    def metrics(self) -> Optional[str]:
+        """The file to which metrics are written, from `--clippy-metrics`, if provided."""
+        return self.get("metrics")
+
+    @property
+    def profile(self) -> Optional[str]:
+        """The kind of profile requested with `--clippy-profile`, either "cpu" or "memory", if provided."""
+        return self.get("profile")
+
+    @property
+    def profile_top(self) -> int:
+        """The number of lines listed in memory reports, from the CLIPPY_PROFILE_TOP environment variable, if set when profiling."""
+        return self._profile_top
+
+    @property
+    def profile_output(self) -> Optional[str]:
+        """The file to which a profile is written, from `--clippy-profile-output`, if provided."""
+        return self.get("profile-output")
+
+    @property
+    def profile_load(self) -> bool:
+        """Returns true if `--clippy-profile-load` was given, to profile parsing the module as well as the command."""
+        return self.get("profile-load") == "True"
+
+    @property
+    def zygote(self) -> Optional[str]:
+        """The Unix domain socket on which to serve commands from pre-forked workers, from `--clippy-zygote`, if provided."""
+        return self.get("zygote")
+
+    @property
+    def serve(self) -> Optional[str]:
+        """The address on which to serve commands over HTTP, from `--clippy-serve`, if provided."""
+        return self.get("serve")
+
+    @property
+    def rpc(self) -> bool:
+        """Returns true if `--clippy-rpc` was given, to serve commands as a JSON-RPC co-process over standard input and output."""
+        return self.get("rpc") == "True"
+
+    @property
+    def rpc_workers(self) -> Optional[str]:
+        """The number of JSON-RPC requests that may run at once, from `--clippy-rpc-workers`, if provided."""
+        return self.get("rpc-workers")
+
+    @property
+    def complete(self) -> Optional[str]:
+        """The partial command or option to complete, from `--clippy-complete`, if provided; this may be an empty string."""
+        return self.get("complete")
+
+    @property
+    def jobs(self) -> Optional[str]:
+        """The number of processes among which the input of a command marked `@clippy(split=...)` is divided, from `--clippy-jobs`."""
+        return self.get("jobs")
+
+    @property
+    def search(self) -> Optional[str]:
+        """The words for which to search the module's commands and their documentation, from `--clippy-search`, if provided."""
+        return self.get("search")
+
+    @property
+    def batch(self) -> Optional[str]:
+        """The file of command lines to run, one per record, from `--clippy-batch`, if provided; `-` reads standard input."""
+        return self.get("batch")
+
+    @property
+    def journal(self) -> Optional[str]:
+        """The file in which completed batch records are journaled, from `--clippy-journal`, if provided."""
+        return self.get("journal")
+
+    @property
+    def resume(self) -> bool:
+        """Returns true if `--clippy-resume` was given, to skip the batch records completed by an earlier run."""
+        return self.get("resume") == "True"
+
+    def __init__(self, values: Optional[Dict[str, str]] = None):
+        """
+        Creates a new object to hold Clippy options.
+
+        :param values: Option values keyed by option name, without the `--clippy-` prefix. Optional. Defaults to no options.
+        """
+        if values is not None:
+            if not isinstance(values, dict):
+                raise TypeError(f"Parameter values must be a dict if provided, received {type(values)}")
+
+            for name in values.keys():
+                if name not in KNOWN_OPTIONS:
+                    raise ValueError(f"Unrecognized option {OPTION_PREFIX}{name}")
+
+            if values.get("format") is not None and values["format"] not in FORMATS:
+                raise ValueError(f"Unrecognized output format {values['format']}, expected one of {', '.join(FORMATS)}")
+
+            for name in INTEGER_OPTIONS:
+                if values.get(name) is not None and (not values[name].isdigit() or int(values[name]) < 1):
+                    raise ValueError(f"Option {OPTION_PREFIX}{name} must be a positive integer, received {values[name]}")
+
+        self._values = dict(values) if values else dict()
+        self._profile_top = DEFAULT_PROFILE_TOP
+
+        # the environment is only read when profiling, so that a stray variable cannot break commands that are not profiled
+        mode = self._values.get("profile") or os.environ.get("CLIPPY_PROFILE")
+
+        if mode:
+            if mode not in PROFILE_MODES:
+                raise ValueError(f"Unrecognized profile mode {mode}, expected one of {', '.join(PROFILE_MODES)}")
+
+            top = os.environ.get("CLIPPY_PROFILE_TOP")
+
+            if top is not None:
+                if not top.isdigit() or int(top) < 1:
+                    raise ValueError(f"Environment variable CLIPPY_PROFILE_TOP must be a positive integer, received {top}")
+
+                self._profile_top = int(top)
+
+    def __eq__(self, other):
+        return isinstance(other, ClippyOptions) and self._values == other._values
+
+    def __str__(self):
+        return self.__repr__()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._values!r})"
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """
+        Get the value of an option.
+
+        :param name: The name of the option, without the `--clippy-` prefix.
+        :param default: The value to return if the option was not given. Optional. Defaults to None.
+        :returns: The value of the option, "True" for flags that were given without a value, or the default.
+        """
+        return self._values.get(name, default)
+
+
+def split_clippy_options(arguments: List[str]) -> Tuple[ClippyOptions, List[str]]:
+    """
+    Separate Clippy options from the arguments intended for a command. Options may appear anywhere in the arguments.
+
+    :param arguments: Command-line arguments, possibly including options such as `--clippy-format=json` or `--clippy-format json`.
+    :returns: A tuple of the options found and the remaining arguments, in their original order.
+    """
+    values = dict()
+    remaining = list()
+    idx = 0
+
+    while idx < len(arguments):
+        argument = arguments[idx]
+        idx += 1
+
+        if not argument.startswith(OPTION_PREFIX):
+            remaining.append(argument)
+            continue
+
+        name, separator, value = argument[len(OPTION_PREFIX):].partition("=")
+
+        if name not in KNOWN_OPTIONS:
+            raise ValueError(f"Unrecognized option {OPTION_PREFIX}{name}")
+
+        if not separator:
+            if not KNOWN_OPTIONS[name]:
+                value = "True"
+            elif idx < len(arguments):
+                value = arguments[idx]
+                idx += 1
+            else:
+                raise ValueError(f"Option {OPTION_PREFIX}{name} requires a value")
+
+        values[name] = value
+
+    return ClippyOptions(values), remaining
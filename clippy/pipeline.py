@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Runs several commands in one process, as in `python -m tools a --x 1 :: b :: c --y 2`.
+
+The value returned by each stage is passed, as a Python object, to the first positional parameter of the next stage; nothing is converted
+to or from text between stages. If a stage returns an iterator, such as a generator, it runs in a background thread and its items are
+handed to the next stage through a bounded buffer as they are produced, so stages overlap and no stage's whole output is held in memory.
+Only the value of the last stage is written.
+"""
+
+import os
+import queue
+import threading
+from collections.abc import Iterator
+from typing import Any, Dict, List, Optional, Tuple
+
+from .command_method import CommandMethod
+from .command_module import CommandModule
+from .dispatch import DispatchResult, STAGE_SEPARATOR, call_command, enabled_metrics, phase_timer
+from .options import ClippyOptions
+from .prefix_index import AmbiguousPrefixError
+
+# the number of items each stage may produce before waiting for the next stage to consume them
+DEFAULT_BUFFER_SIZE = 1024
+
+# the most items handed between threads at once; fewer are handed over whenever the next stage is waiting
+CHUNK_SIZE = 64
+
+# how often, in seconds, a waiting stage checks whether the next stage has stopped reading
+POLL_INTERVAL = 0.1
+
+
+def split_stages(arguments: List[str]) -> List[List[str]]:
+    """
+    Split arguments into stages at each `::`.
+
+    :param arguments: The command-line arguments, with any Clippy options removed.
+    :returns: The arguments for each stage, beginning with the command name.
+    """
+    stages: List[List[str]] = [list()]
+
+    for argument in arguments:
+        if argument == STAGE_SEPARATOR:
+            stages.append(list())
+        else:
+            stages[-1].append(argument)
+
+    return stages
+
+
+class BufferedIterator:  # pylint: disable=too-many-instance-attributes
+    """
+    Consumes an iterator in a background thread, holding at most a fixed number of items until they are read.
+
+    Items are handed over one at a time while the reader is waiting for them, and in chunks while the reader is behind, so that a fast
+    stage does not pay for a thread handoff per item and a slow stage's items are not held back.
+    """
+
+    @property
+    def buffer_size(self) -> int:
+        """The number of items that may be produced ahead of the reader."""
+        return self._buffer.maxsize * self._chunk_size
+
+    def __init__(self, source: Iterator, buffer_size: Optional[int] = None):
+        """
+        Creates a new buffer, and starts consuming the given iterator.
+
+        :param source: The iterator to consume.
+        :param buffer_size: The number of items that may be produced ahead of the reader. Optional. Defaults to the `CLIPPY_PIPELINE_BUFFER`
+                            environment variable if set, otherwise 1024.
+        """
+        # set first, so that an object that fails validation can still be closed when it is collected
+        self._stopped = threading.Event()
+
+        if not isinstance(source, Iterator):
+            raise TypeError(f"Parameter source must be an iterator, received {type(source)}")
+
+        if buffer_size is None:
+            buffer_size = int(os.environ.get("CLIPPY_PIPELINE_BUFFER", DEFAULT_BUFFER_SIZE))
+
+        if not isinstance(buffer_size, int):
+            raise TypeError(f"Parameter buffer_size must be an integer, received {type(buffer_size)}")
+
+        if buffer_size < 1:
+            raise ValueError(f"Parameter buffer_size must be positive, received {buffer_size}")
+
+        self._chunk_size = min(CHUNK_SIZE, buffer_size)
+        self._buffer: queue.Queue = queue.Queue(maxsize=buffer_size // self._chunk_size)
+        self._chunk: List[Any] = list()
+        self._position = 0
+        self._error: Optional[Exception] = None
+        self._finished = False
+        self._thread = threading.Thread(target=self._produce, args=(source,), daemon=True)
+        self._thread.start()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while self._position >= len(self._chunk):
+            if self._finished:
+                if self._error is not None:
+                    error, self._error = self._error, None
+                    raise error
+
+                raise StopIteration
+
+            self._chunk, finished, self._error = self._buffer.get()
+            self._finished = finished
+            self._position = 0
+
+        item = self._chunk[self._position]
+        self._position += 1
+        return item
+
+    def __del__(self):
+        self.close()
+
+    def __str__(self):
+        return self.__repr__()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.buffer_size})"
+
+    def close(self) -> None:
+        """Stop producing items, as when the reader stops early."""
+        self._stopped.set()
+
+    def _produce(self, source: Iterator) -> None:
+        chunk: List[Any] = list()
+
+        try:
+            for item in source:
+                chunk.append(item)
+
+                if len(chunk) >= self._chunk_size or self._buffer.empty():
+                    if not self._put(chunk):
+                        return
+
+                    chunk = list()
+        except Exception as exc:  # pylint: disable=broad-except
+            # the error is raised to the reader once it has read every item produced before it
+            self._put(chunk, True, exc)
+            return
+
+        self._put(chunk, True)
+
+    def _put(self, chunk: List[Any], finished: bool = False, error: Optional[Exception] = None) -> bool:
+        while not self._stopped.is_set():
+            try:
+                self._buffer.put((chunk, finished, error), timeout=POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+
+        return False
+
+
+def _first_positional(command: CommandMethod) -> Optional[str]:
+    for param in command.params.values():
+        if param.is_positional:
+            return param.name
+
+    return None
+
+
+def run_pipeline(command_module: CommandModule, arguments: List[str], options: Optional[ClippyOptions] = None) -> DispatchResult:
+    """
+    Run each stage of a pipeline, passing the value returned by each stage to the next.
+
+    Every stage is found and its arguments parsed before any stage runs, so a mistake in a later stage does not leave an earlier one half
+    finished. Help for any stage is shown instead of running the pipeline.
+
+    :param command_module: The module containing the commands.
+    :param arguments: The stages, separated by `::`, with any Clippy options already removed.
+    :param options: The Clippy options for this invocation. Optional. Defaults to no options.
+    :returns: A `DispatchResult` holding the value of the last stage, or the text to show and exit status if the pipeline did not run.
+    """
+    if options is None:
+        options = ClippyOptions()
+
+    metrics = enabled_metrics(options)
+    stages: List[Tuple[CommandMethod, Dict[str, Any], Optional[str]]] = list()
+
+    for (idx, stage) in enumerate(split_stages(arguments)):
+        if not stage:
+            return DispatchResult(status=1, output=f"Pipeline stage {idx + 1} is empty")
+
+        try:
+            command = command_module.find_command(stage[0])
+        except AmbiguousPrefixError as error:
+            return DispatchResult(status=1, output=str(error))
+
+        if command is None:
+            return DispatchResult(status=1, output=f"Unrecognized command {stage[0]}")
+
+        # every stage after the first receives the previous value as its first positional parameter
+        target = _first_positional(command) if idx > 0 else None
+
+        if idx > 0 and target is None:
+            return DispatchResult(status=1, output=f"Command {command.name} has no positional parameter to receive the output of {stages[-1][0].name}")
+
+        if metrics is not None:
+            metrics.count_invocation(command.name)
+
+        try:
+            with phase_timer(metrics, command.name, "parse"):
+                param_pairs = command.parse_arguments(list(stage[1:]), 1 if target is not None else 0)
+        except (ValueError, TypeError) as error:
+            return DispatchResult(status=1, output=str(error))
+
+        if "help" in param_pairs:
+            return DispatchResult(status=0, output=command.help(command_module.name))
+
+        # the value for the target is given once the stage before it has run
+        try:
+            with phase_timer(metrics, command.name, "validate"):
+                command.validate_arguments(dict(param_pairs, **{target: None}) if target is not None else param_pairs)
+        except (ValueError, TypeError) as error:
+            return DispatchResult(status=1, output=str(error))
+
+        stages.append((command, param_pairs, target))
+
+    value = None
+
+    for (command, param_pairs, target) in stages:
+        if target is not None:
+            param_pairs[target] = BufferedIterator(value) if isinstance(value, Iterator) else value
+
+        with phase_timer(metrics, command.name, "call"):
+            value = call_command(command, param_pairs, options)
+
+    return DispatchResult(value=value, invoked=True, command=stages[-1][0])
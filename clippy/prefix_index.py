@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Resolves abbreviated command and option names, such as `doc_one_t` for `documented_one_typed_parameter` or `--ar` for `--arg`.
+"""
+
+from typing import Iterable, List, Optional
+
+# the character that separates the words of a name, each of which may be abbreviated
+SEPARATOR = "_"
+
+
+class AmbiguousPrefixError(ValueError):
+    """Raised when an abbreviation could refer to more than one name."""
+
+    @property
+    def prefix(self) -> str:
+        """The abbreviation that was given."""
+        return self._prefix
+
+    @property
+    def candidates(self) -> List[str]:
+        """Every name to which the abbreviation could refer, sorted."""
+        return self._candidates
+
+    def __init__(self, prefix: str, candidates: List[str], kind: str = "name"):
+        """
+        Creates a new error for an ambiguous abbreviation.
+
+        :param prefix: The abbreviation that was given.
+        :param candidates: Every name to which the abbreviation could refer.
+        :param kind: What the names are, such as "command" or "option", for the error message. Optional. Defaults to "name".
+        """
+        super().__init__(f"Ambiguous {kind} {prefix} could be any of: {', '.join(sorted(candidates))}")
+        self._prefix = prefix
+        self._candidates = sorted(candidates)
+
+
+class _Node:
+    """A single character position within the index, shared by every name that begins with the same characters."""
+
+    __slots__ = ("children", "name", "count", "first")
+
+    def __init__(self):
+        self.children = dict()
+        # the full name ending at this node, if any
+        self.name = None
+        # the number of names at or below this node, and one of them, so a unique prefix resolves without walking the subtree
+        self.count = 0
+        self.first = None
+
+
+class PrefixIndex:
+    """A trie of names that resolves unambiguous prefixes, and abbreviations of each word, to full names."""
+
+    @property
+    def names(self) -> List[str]:
+        """Every name in this index, sorted."""
+        return self.with_prefix("")
+
+    def __init__(self, names: Iterable[str], kind: str = "name"):
+        """
+        Creates a new index over the given names.
+
+        :param names: The names to index.
+        :param kind: What the names are, such as "command" or "option", for error messages. Optional. Defaults to "name".
+        """
+        if isinstance(names, str):
+            raise TypeError("Parameter names must be an iterable of strings, not a single string")
+
+        self._root = _Node()
+        self._kind = kind
+        self._size = 0
+
+        for name in names:
+            if not isinstance(name, str):
+                raise TypeError(f"Names must be strings, received {type(name)}")
+
+            self._insert(name)
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, name):
+        node = self._find(name) if isinstance(name, str) else None
+        return node is not None and node.name is not None
+
+    def __str__(self):
+        return self.__repr__()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._kind!r}, {self._size} names)"
+
+    def resolve(self, key: str) -> Optional[str]:
+        """
+        Find the single name to which the given key refers.
+
+        A name matches exactly, or if it is the only name beginning with the key, which takes time proportional to the length of the key.
+        Otherwise, each word of the key, separated by underscores, may abbreviate the same word of the name, as `doc_one_t` does for
+        `documented_one_typed_parameter`; this also visits the names that begin with the first word of the key.
+
+        :param key: A full name or abbreviation.
+        :returns: The full name, or None if no name matches; an empty key matches nothing.
+        """
+        if not isinstance(key, str):
+            raise TypeError(f"Parameter key must be a string, received {type(key)}")
+
+        if not key:
+            return None
+
+        node = self._find(key)
+
+        if node is not None:
+            if node.name is not None or node.count == 1:
+                return node.name if node.name is not None else node.first
+
+            raise AmbiguousPrefixError(key, self._collect(node), self._kind)
+
+        if SEPARATOR not in key:
+            return None
+
+        candidates = self._abbreviated(key.split(SEPARATOR))
+
+        if len(candidates) > 1:
+            raise AmbiguousPrefixError(key, candidates, self._kind)
+
+        return candidates[0] if candidates else None
+
+    def with_prefix(self, prefix: str) -> List[str]:
+        """
+        List the names that begin with the given prefix, visiting only those names.
+
+        :param prefix: The beginning of a name; an empty string lists every name.
+        :returns: The matching names, sorted.
+        """
+        if not isinstance(prefix, str):
+            raise TypeError(f"Parameter prefix must be a string, received {type(prefix)}")
+
+        node = self._find(prefix)
+        return self._collect(node) if node is not None else list()
+
+    def _insert(self, name: str) -> None:
+        if name in self:
+            return
+
+        path = [self._root]
+
+        for char in name:
+            path.append(path[-1].children.setdefault(char, _Node()))
+
+        path[-1].name = name
+        self._size += 1
+
+        for node in path:
+            node.count += 1
+
+            if node.first is None:
+                node.first = name
+
+    def _find(self, prefix: str) -> Optional[_Node]:
+        node = self._root
+
+        for char in prefix:
+            node = node.children.get(char)
+
+            if node is None:
+                return None
+
+        return node
+
+    @staticmethod
+    def _collect(node: _Node) -> List[str]:
+        result = list()
+        stack = [node]
+
+        # children are visited in reverse order so that names come off the stack sorted
+        while stack:
+            current = stack.pop()
+
+            if current.name is not None:
+                result.append(current.name)
+
+            stack.extend(current.children[char] for char in sorted(current.children.keys(), reverse=True))
+
+        return result
+
+    def _abbreviated(self, words: List[str]) -> List[str]:
+        result: List[str] = list()
+        self._match_words(self._root, words, 0, result)
+        return sorted(result)
+
+    def _match_words(self, node: _Node, words: List[str], idx: int, result: List[str]) -> None:
+        for char in words[idx]:
+            node = node.children.get(char)
+
+            if node is None:
+                return
+
+        if idx == len(words) - 1:
+            result.extend(self._collect(node))
+            return
+
+        # skip the rest of this word of the name, then match the next word of the key against the next word of the name
+        stack = [node]
+
+        while stack:
+            for (char, child) in stack.pop().children.items():
+                if char == SEPARATOR:
+                    self._match_words(child, words, idx + 1, result)
+                else:
+                    stack.append(child)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Profiles only the invoked command, rather than Clippy's own parsing, with `--clippy-profile=cpu` or `--clippy-profile=memory`.
+
+CPU profiles are written as `.pstats` files for `pstats` or other viewers. Memory profiles are written as a text report of peak memory and the
+lines that allocated the most memory. The CLIPPY_PROFILE and CLIPPY_PROFILE_OUTPUT environment variables may be used instead of the options.
+"""
+
+import os
+import sys
+from typing import Optional
+
+from .options import CPU_PROFILE, DEFAULT_PROFILE_TOP, PROFILE_MODES, ClippyOptions
+
+
+def default_profile_path(mode: str, name: str) -> str:
+    """
+    Get the file to which a profile is written if no output path was given.
+
+    :param mode: One of `PROFILE_MODES`.
+    :param name: The name of the profiled command.
+    :returns: A file name in the current directory.
+    """
+    if mode == CPU_PROFILE:
+        return f"clippy-{name}.pstats"
+
+    return f"clippy-{name}.memory.txt"
+
+
+class Profiler:
+    """Profiles the code run between entering and exiting this context manager, then writes a report."""
+
+    @property
+    def mode(self) -> str:
+        """The kind of profile; one of `PROFILE_MODES`."""
+        return self._mode
+
+    @property
+    def path(self) -> str:
+        """The file to which the report is written."""
+        return self._path
+
+    def __init__(self, mode: str, path: str, top: int = DEFAULT_PROFILE_TOP):
+        """
+        Creates a new profiler. Profiling begins when the context is entered.
+
+        :param mode: One of `PROFILE_MODES`.
+        :param path: The file to which the report is written.
+        :param top: The number of lines listed in memory reports. Optional. Defaults to 25.
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unrecognized profile mode {mode}, expected one of {', '.join(PROFILE_MODES)}")
+
+        if not path:
+            raise ValueError("Parameter path is required.")
+
+        self._mode = mode
+        self._path = path
+        self._top = top
+        self._profile = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.mode!r}, {self.path!r})"
+
+    def __enter__(self):
+        if self.mode == CPU_PROFILE:
+            import cProfile  # pylint: disable=import-outside-toplevel
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            import tracemalloc  # pylint: disable=import-outside-toplevel
+            tracemalloc.start()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.mode == CPU_PROFILE:
+            self._profile.disable()
+            self._profile.dump_stats(self.path)
+            print(f"Wrote CPU profile to {self.path}", file=sys.stderr)
+        else:
+            self._write_memory_report()
+            print(f"Wrote memory profile to {self.path}", file=sys.stderr)
+
+    def _write_memory_report(self):
+        import linecache  # pylint: disable=import-outside-toplevel
+        import tracemalloc  # pylint: disable=import-outside-toplevel
+
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        lines = [f"Peak memory: {peak / 1024:.1f} KiB",
+                 f"Memory at exit: {current / 1024:.1f} KiB",
+                 "",
+                 f"Top {self._top} lines by memory allocated and not yet freed:"]
+
+        for (idx, stat) in enumerate(snapshot.statistics("lineno")[:self._top]):
+            frame = stat.traceback[0]
+            lines.append(f"#{idx + 1}: {frame.filename}:{frame.lineno}: {stat.size / 1024:.1f} KiB in {stat.count} blocks")
+            source = linecache.getline(frame.filename, frame.lineno).strip()
+
+            if source:
+                lines.append(f"    {source}")
+
+        with open(self.path, "w") as file:
+            file.write("\n".join(lines) + "\n")
+
+
+def create_profiler(options: ClippyOptions, name: str) -> Optional[Profiler]:
+    """
+    Create a profiler if one was requested with `--clippy-profile` or the CLIPPY_PROFILE environment variable.
+
+    :param options: The Clippy options for this invocation.
+    :param name: The name of the command being profiled, used in the default output path.
+    :returns: A profiler, or None if profiling was not requested.
+    """
+    mode = options.profile or os.environ.get("CLIPPY_PROFILE")
+
+    if not mode:
+        return None
+
+    path = options.profile_output or os.environ.get("CLIPPY_PROFILE_OUTPUT") or default_profile_path(mode, name)
+    return Profiler(mode, path, options.profile_top)
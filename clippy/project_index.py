@@ -0,0 +1,438 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Finds the module that owns a command across a whole source tree, as for `clippy --index <paths>` and `clippy --run <command> [arguments]`.
+These are spelled as options so that they never hide a project module named `index` or `run`, which `clippy <module>` runs as usual.
+
+`clippy --index` scans the given directories, in parallel, for modules that use `@clippy`, and writes one index of every module, its
+commands, and their usage. Modules are read from their source, as for help, so none are imported. `clippy --run` reads that index, finds
+the one module that owns the command, and runs only that module, so nobody needs to know, or import, which module a command lives in.
+
+A module whose commands cannot be found from its source alone, such as one that takes its decorator from a star import, is listed in the
+index as skipped, with the reason, and reported by `clippy --index`; its commands must be run with `clippy <module>`.
+
+The index is written to `.clippy-index.json` in the current directory by default. `clippy --run` reads the file named by the
+`CLIPPY_INDEX` environment variable, or else the nearest `.clippy-index.json` in the current directory or any directory above it.
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .common import parse_ast, top_level_functions
+from .launcher import NotStaticError, clippy_definitions, static_command_method
+from .module_cache import file_stamp
+from .prefix_index import AmbiguousPrefixError, PrefixIndex
+
+# the version of the saved index, which must be rebuilt if it was saved in another format
+INDEX_FORMAT = 1
+
+# the name of the file to which the index is written, and which is searched for when running a command
+INDEX_FILENAME = ".clippy-index.json"
+
+# directories that never hold a project's own modules
+SKIPPED_DIRECTORIES = {"__pycache__", "build", "dist", "node_modules", "site-packages", "venv"}
+
+# the fewest files worth scanning in separate processes; fewer are scanned in this process, as starting processes would take longer
+PARALLEL_THRESHOLD = 64
+
+# the separator between a module and a command, as in `tools.files:copy`, when a command name alone is ambiguous
+QUALIFIER = ":"
+
+
+def module_name_for(root: str, filename: str) -> Optional[str]:
+    """
+    Get the name by which a source file is imported when a directory is on the import path.
+
+    :param root: The directory on the import path.
+    :param filename: A source file within that directory.
+    :returns: The dotted module name, which names the package for an `__init__.py` file, or None if the file cannot be imported by name.
+    """
+    parts = os.path.splitext(os.path.relpath(filename, root))[0].split(os.sep)
+
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+
+    if not parts or not all(part.isidentifier() for part in parts):
+        return None
+
+    return ".".join(parts)
+
+
+def find_source_files(paths: Iterable[str]) -> List[Tuple[str, str]]:
+    """
+    List the Python source files under the given paths, skipping hidden directories and those that hold builds or dependencies.
+
+    :param paths: Directories, each of which is treated as a directory on the import path, or single source files.
+    :returns: Each file, paired with the directory on the import path from which it is named, sorted by file.
+    """
+    result = list()
+
+    for path in paths:
+        path = os.path.abspath(path)
+
+        if os.path.isfile(path):
+            result.append((os.path.dirname(path), path))
+            continue
+
+        if not os.path.isdir(path):
+            raise FileNotFoundError(f"Path not found: {path}")
+
+        for (directory, directories, files) in os.walk(path):
+            # directories are pruned in place, so their contents are never listed
+            directories[:] = sorted(name for name in directories
+                                    if not name.startswith(".") and name not in SKIPPED_DIRECTORIES and not name.endswith(".egg-info"))
+            result += [(path, os.path.join(directory, name)) for name in files if name.endswith(".py")]
+
+    return sorted(set(result), key=lambda pair: pair[1])
+
+
+def index_source_file(root: str, filename: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Read the commands of one source file, without importing it.
+
+    :param root: The directory on the import path from which the file is named.
+    :param filename: The source file.
+    :returns: The module name and its entry in the index, or None if the file defines no commands or cannot be read. A module with decorated
+              functions that cannot be told apart from commands without importing it is returned with no commands and a `skipped` reason.
+    """
+    module_name = module_name_for(root, filename)
+
+    if module_name is None:
+        return None
+
+    try:
+        with open(filename, "rb") as file:
+            # most files never mention Clippy, and are not worth parsing, unless a star import may bring in the decorator
+            data = file.read()
+
+            if b"clippy" not in data and b"import *" not in data:
+                return None
+
+        tree = parse_ast(filename)
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+    try:
+        definitions = clippy_definitions(tree)
+    except NotStaticError as error:
+        # only a module with decorated functions may define commands
+        if any(definition.decorator_list for definition in top_level_functions(tree.body)):
+            return module_name, {"root": root, "filename": filename, "stamp": file_stamp(filename), "commands": dict(), "skipped": str(error)}
+
+        definitions = list()
+
+    if not definitions:
+        return None
+
+    commands: Dict[str, Optional[str]] = dict()
+
+    for definition in definitions:
+        # a command whose defaults are not literals is still indexed, only without its usage
+        try:
+            commands[definition.name] = static_command_method(definition).short_params
+        except (NotStaticError, SyntaxError):
+            commands[definition.name] = None
+
+    return module_name, {"root": root, "filename": filename, "stamp": file_stamp(filename), "commands": commands}
+
+
+def _index_pair(pair: Tuple[str, str]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    return index_source_file(*pair)
+
+
+class ProjectIndex:
+    """An index of the modules in a source tree, and of the commands each defines."""
+
+    @property
+    def modules(self) -> Dict[str, Dict[str, Any]]:
+        """Each module, keyed by name, with its import path directory, source file, and command usage."""
+        return self._modules
+
+    @property
+    def skipped(self) -> Dict[str, str]:
+        """Each module whose commands could not be found from its source alone, keyed by name, with the reason."""
+        return {module_name: entry["skipped"] for (module_name, entry) in sorted(self._modules.items()) if entry.get("skipped")}
+
+    @property
+    def commands(self) -> Dict[str, List[str]]:
+        """Each command name, mapped to the names of the modules that define a command by that name."""
+        return self._commands
+
+    def __init__(self, modules: Dict[str, Dict[str, Any]]):
+        """
+        Creates a new index. Use `build` to scan a source tree.
+
+        :param modules: Each module, keyed by name, with `root`, `filename`, `stamp`, and `commands` entries.
+        """
+        if not isinstance(modules, dict):
+            raise TypeError(f"Parameter modules must be a dict, received {type(modules)}")
+
+        self._modules = modules
+        self._commands: Dict[str, List[str]] = dict()
+
+        for (module_name, entry) in sorted(modules.items()):
+            for command in entry["commands"].keys():
+                self._commands.setdefault(command, list()).append(module_name)
+
+        self._command_index = PrefixIndex(self._commands.keys(), "command")
+
+    def __len__(self):
+        return len(self._modules)
+
+    def __str__(self):
+        return self.__repr__()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self._modules)} modules, {len(self._commands)} commands)"
+
+    @staticmethod
+    def build(paths: Iterable[str], jobs: Optional[int] = None) -> "ProjectIndex":
+        """
+        Scan source trees for modules that define commands.
+
+        :param paths: Directories, each of which is treated as a directory on the import path, or single source files.
+        :param jobs: The number of processes that scan files at once. Optional. Defaults to the number of processors; fewer than
+                     `PARALLEL_THRESHOLD` files are always scanned in this process.
+        :returns: The index.
+        """
+        if jobs is not None:
+            if not isinstance(jobs, int):
+                raise TypeError(f"Parameter jobs must be an integer if provided, received {type(jobs)}")
+
+            if jobs < 1:
+                raise ValueError(f"Parameter jobs must be positive if provided, received {jobs}")
+
+        pairs = find_source_files(paths)
+        jobs = jobs if jobs is not None else os.cpu_count() or 1
+
+        if jobs == 1 or len(pairs) < PARALLEL_THRESHOLD:
+            results = [_index_pair(pair) for pair in pairs]
+        else:
+            from concurrent.futures import ProcessPoolExecutor  # pylint: disable=import-outside-toplevel
+
+            with ProcessPoolExecutor(jobs) as executor:
+                results = list(executor.map(_index_pair, pairs, chunksize=max(1, len(pairs) // (jobs * 4))))
+
+        modules = dict()
+
+        # a module found under more than one path keeps the first, as the import system would
+        for result in results:
+            if result is not None and result[0] not in modules:
+                modules[result[0]] = result[1]
+
+        return ProjectIndex(modules)
+
+    def find(self, name: str) -> Tuple[str, str]:
+        """
+        Find the module that owns a command.
+
+        The command may be abbreviated, as when running a module directly, or qualified by its module, as in `tools.files:copy`, if more than
+        one module defines a command by that name. Raises a `ValueError` if no module, or more than one, owns the command.
+
+        :param name: The command name, abbreviation, or qualified name.
+        :returns: A tuple of the module name and the full command name.
+        """
+        if not isinstance(name, str):
+            raise TypeError(f"Parameter name must be a string, received {type(name)}")
+
+        module_name, separator, command = name.rpartition(QUALIFIER)
+
+        if separator:
+            if module_name not in self._modules:
+                raise ValueError(f"Unrecognized module {module_name}")
+
+            if command not in self._modules[module_name]["commands"]:
+                raise ValueError(f"Unrecognized command {command} in module {module_name}")
+
+            return module_name, command
+
+        resolved = self._command_index.resolve(command)
+
+        if resolved is None and self.skipped:
+            raise ValueError(f"Unrecognized command {command}; the commands of {', '.join(self.skipped)} were not indexed, and must be run "
+                             f"with `clippy <module>`")
+
+        if resolved is None:
+            raise ValueError(f"Unrecognized command {command}")
+
+        owners = self._commands[resolved]
+
+        if len(owners) > 1:
+            raise AmbiguousPrefixError(command, [f"{owner}{QUALIFIER}{resolved}" for owner in owners], "command")
+
+        return owners[0], resolved
+
+    def usage(self) -> str:
+        """Build a help message listing every command and the module that owns it."""
+        result = "Usage:"
+
+        for (command, owners) in sorted(self._commands.items()):
+            for owner in owners:
+                # an ambiguous command is listed by its qualified name, which is how it must be run
+                name = f"{owner}{QUALIFIER}{command}" if len(owners) > 1 else command
+                usage = self._modules[owner]["commands"][command]
+                result += f"\n\tclippy --run {name} {usage if usage is not None else '[arguments]'}".rstrip()
+
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the contents of this index as data that can be written as JSON."""
+        return {"format": INDEX_FORMAT, "modules": self._modules}
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "ProjectIndex":
+        """
+        Read an index from the data returned by `to_dict`.
+
+        :param data: The contents of an index.
+        :returns: The index.
+        """
+        if not isinstance(data, dict) or data.get("format") != INDEX_FORMAT or not isinstance(data.get("modules"), dict):
+            raise ValueError("Project index is not in a supported format; run `clippy --index` again")
+
+        return ProjectIndex(data["modules"])
+
+
+def save_project_index(index: ProjectIndex, path: str) -> None:
+    """
+    Write an index, replacing any written before.
+
+    :param index: The index to write.
+    :param path: The file to write.
+    """
+    temporary = f"{path}.{os.getpid()}.tmp"
+
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump(index.to_dict(), file, indent=1, sort_keys=True)
+
+    # a command run while the index is being written reads the old index rather than part of the new one
+    os.replace(temporary, path)
+
+
+def load_project_index(path: str) -> ProjectIndex:
+    """
+    Read an index written by `save_project_index`.
+
+    :param path: The file to read.
+    :returns: The index.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        return ProjectIndex.from_dict(json.load(file))
+
+
+def find_project_index(start: Optional[str] = None) -> Optional[str]:
+    """
+    Find the index to use for running commands.
+
+    :param start: The directory from which to search. Optional. Defaults to the current directory.
+    :returns: The file named by the `CLIPPY_INDEX` environment variable, if set, or else the nearest `.clippy-index.json` in the directory or
+              any directory above it, or None if there is none.
+    """
+    if os.environ.get("CLIPPY_INDEX"):
+        return os.environ["CLIPPY_INDEX"]
+
+    directory = os.path.abspath(start if start is not None else os.getcwd())
+
+    while True:
+        path = os.path.join(directory, INDEX_FILENAME)
+
+        if os.path.isfile(path):
+            return path
+
+        parent = os.path.dirname(directory)
+
+        if parent == directory:
+            return None
+
+        directory = parent
+
+
+def _option_value(arguments: List[str], name: str) -> Tuple[Optional[str], List[str]]:
+    # read `--name=value` or `--name value` from the arguments, returning the value and the other arguments
+    remaining = list()
+    value = None
+    idx = 0
+
+    while idx < len(arguments):
+        argument = arguments[idx]
+        idx += 1
+
+        if argument.startswith(f"--{name}="):
+            value = argument[len(f"--{name}="):]
+        elif argument == f"--{name}":
+            if idx >= len(arguments):
+                raise ValueError(f"Option --{name} requires a value")
+
+            value = arguments[idx]
+            idx += 1
+        else:
+            remaining.append(argument)
+
+    return value, remaining
+
+
+def index_main(arguments: List[str]) -> Tuple[int, str]:
+    """
+    Scan source trees and write their index, as for `clippy --index <paths>... [--output=<file>] [--jobs=<count>]`.
+
+    :param arguments: The arguments after `--index`: the directories or files to scan, which default to the current directory.
+    :returns: A tuple of exit status and text to print.
+    """
+    output, arguments = _option_value(arguments, "output")
+    jobs, paths = _option_value(arguments, "jobs")
+
+    if jobs is not None and (not jobs.isdigit() or int(jobs) < 1):
+        return 1, f"Option --jobs must be a positive integer, received {jobs}"
+
+    unknown = [path for path in paths if path.startswith("--")]
+
+    if unknown:
+        return 1, f"Unrecognized option {unknown[0]}"
+
+    index = ProjectIndex.build(paths or [os.curdir], int(jobs) if jobs is not None else None)
+    path = output if output is not None else INDEX_FILENAME
+    save_project_index(index, path)
+    skipped = index.skipped
+    message = f"Indexed {len(index.commands)} commands in {len(index) - len(skipped)} modules to {path}"
+
+    if skipped:
+        message += f"\nSkipped {len(skipped)} modules whose commands cannot be found without importing them; run them with `clippy <module>`:"
+        message += "".join(f"\n\t{module_name}: {reason}" for (module_name, reason) in skipped.items())
+
+    return 0, message
+
+
+def resolve_command(arguments: List[str]) -> Tuple[int, str, Optional[Tuple[str, str, List[str]]]]:
+    """
+    Find the module that owns the command to run, as for `clippy --run <command> [arguments]`.
+
+    :param arguments: The arguments after `--run`: the command, which may be abbreviated or qualified by its module, and its arguments.
+    :returns: A tuple of exit status, text to print, and if the command was found, the module's name, the directory from which it is imported,
+              and the arguments to run it with, which begin with the full command name.
+    """
+    path = find_project_index()
+
+    if path is None:
+        return 1, f"No {INDEX_FILENAME} was found here or above; run `clippy --index <paths>` first", None
+
+    try:
+        index = load_project_index(path)
+    except (OSError, ValueError) as error:
+        return 1, f"Cannot read {path}: {error}", None
+
+    if not arguments or arguments[0] in ("-h", "--help"):
+        return (0 if arguments else 1), index.usage(), None
+
+    try:
+        module_name, command = index.find(arguments[0])
+    except ValueError as error:
+        return 1, str(error), None
+
+    entry = index.modules[module_name]
+
+    if not os.path.isfile(entry["filename"]):
+        return 1, f"Module {module_name} was moved or deleted since {path} was written; run `clippy --index` again", None
+
+    return 0, "", (module_name, entry["root"], [command] + list(arguments[1:]))
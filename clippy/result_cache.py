@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Stores the results of commands marked with `@clippy(cache=True)` on disk, so that calling a command again with the same arguments skips the call.
+
+Each result is keyed on the command's arguments, its default values, and its compiled code, so editing a command invalidates its stored
+results. Once the store grows past its size limit, the least recently used results are removed; a running total of its size is kept, so
+that the store is only scanned when it may have grown too large.
+"""
+
+import hashlib
+import marshal
+import os
+import pickle
+import tempfile
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# the largest total size of stored results, in bytes, unless overridden by the CLIPPY_CACHE_MAX_BYTES environment variable
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+ENTRY_SUFFIX = ".pickle"
+
+# the file holding the running total of bytes stored, so that the store is only scanned once it may have grown past its limit
+USAGE_FILE = "usage"
+
+# the fraction of `max_bytes` to which eviction shrinks the store, so that the next scan is not only one result away
+EVICT_TARGET = 0.9
+
+
+def default_cache_directory() -> str:
+    """
+    Get the directory in which results are stored: the CLIPPY_CACHE_DIR environment variable if set, or `clippy` in the user's cache directory.
+    """
+    if os.environ.get("CLIPPY_CACHE_DIR"):
+        return os.environ["CLIPPY_CACHE_DIR"]
+
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "clippy")
+
+
+def function_fingerprint(func: Callable) -> bytes:
+    """
+    Get bytes that identify the compiled code of a function, including any functions or classes nested within it.
+
+    :param func: The function to identify.
+    :returns: The marshalled code object, or the qualified name of the function if it has no code object.
+    """
+    code = getattr(func, "__code__", None)
+
+    if code is None:
+        return f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', repr(func))}".encode("utf-8")
+
+    return marshal.dumps(code)
+
+
+class ResultCache:
+    """A directory of pickled command results with size-bounded, least-recently-used eviction."""
+
+    @property
+    def directory(self) -> str:
+        """The directory in which results are stored."""
+        return self._directory
+
+    @property
+    def max_bytes(self) -> int:
+        """The largest total size of stored results, in bytes."""
+        return self._max_bytes
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        """
+        Creates a new object to read and write stored results. The directory is created when the first result is stored.
+
+        :param directory: The directory in which results are stored. Optional. Defaults to `default_cache_directory()`.
+        :param max_bytes: The largest total size of stored results. Optional. Defaults to CLIPPY_CACHE_MAX_BYTES, or 256 MiB.
+        """
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("CLIPPY_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+
+        if not isinstance(max_bytes, int):
+            raise TypeError(f"Parameter max_bytes must be an integer if provided, received {type(max_bytes)}.")
+
+        if max_bytes < 0:
+            raise ValueError(f"Parameter max_bytes must be zero or greater, received {max_bytes}.")
+
+        self._directory = directory if directory else default_cache_directory()
+        self._max_bytes = max_bytes
+
+    def __str__(self):
+        return self.__repr__()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.directory!r}, {self.max_bytes!r})"
+
+    def key(self, func: Callable, arguments: Dict[str, Any]) -> Optional[str]:
+        """
+        Get the key under which the result of calling a function with the given arguments is stored.
+
+        :param func: The function implementing a command.
+        :param arguments: The converted arguments to the function, as returned by `CommandMethod.parse_arguments`.
+        :returns: A hex digest, or None if the arguments or the function's default values cannot be pickled, and so the result cannot be cached.
+        """
+        # default values are part of the key, so that changing a default does not return results computed with the old one
+        defaults = (getattr(func, "__defaults__", None), getattr(func, "__kwdefaults__", None))
+
+        try:
+            pickled = pickle.dumps((sorted(arguments.items()), defaults), protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return None
+
+        digest = hashlib.sha256(function_fingerprint(func))
+        digest.update(pickled)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ENTRY_SUFFIX)
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Tuple[bool, Any]:
+        """
+        Read a stored result.
+
+        :param key: The key returned by `key`.
+        :param ttl: The number of seconds for which a result may be reused. Optional. Defaults to no limit.
+        :returns: A tuple of whether a result was found and the result, if found.
+        """
+        path = self._path(key)
+
+        try:
+            with open(path, "rb") as file:
+                created, value = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError, AttributeError, ImportError):
+            return False, None
+
+        if ttl is not None and time.time() - created > ttl:
+            self._remove(path)
+            return False, None
+
+        # the modification time records when the result was last used, for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return True, value
+
+    def put(self, key: str, value: Any) -> bool:
+        """
+        Store a result, then remove the least recently used results if the store is larger than `max_bytes`.
+
+        :param key: The key returned by `key`.
+        :param value: The result to store.
+        :returns: True if the result was stored, or false if it cannot be pickled (such as a generator) or is larger than the store.
+        """
+        try:
+            data = pickle.dumps((time.time(), value), protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+
+        if len(data) > self.max_bytes:
+            return False
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # write to a temporary file first, so that concurrent readers never see a partial result
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+
+        try:
+            with os.fdopen(handle, "wb") as file:
+                file.write(data)
+
+            os.replace(temporary, path)
+        except OSError:
+            self._remove(temporary)
+            return False
+
+        # the store is only scanned once the running total says it may be too large
+        if self._add_usage(len(data)) > self.max_bytes:
+            self.evict()
+
+        return True
+
+    def evict(self) -> None:
+        """Remove the least recently used results until the store is no larger than 90% of `max_bytes`, and record its size."""
+        entries = list()
+        total = 0
+
+        for (root, _, files) in os.walk(self.directory):
+            for name in files:
+                if name.endswith(ENTRY_SUFFIX):
+                    path = os.path.join(root, name)
+
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+
+        entries.sort()
+        target = int(self.max_bytes * EVICT_TARGET)
+
+        for (_, size, path) in entries:
+            if total <= target:
+                break
+
+            self._remove(path)
+            total -= size
+
+        self._write_usage(total)
+
+    def clear(self) -> None:
+        """Remove all stored results."""
+        for (root, _, files) in os.walk(self.directory):
+            for name in files:
+                if name.endswith(ENTRY_SUFFIX):
+                    self._remove(os.path.join(root, name))
+
+        self._remove(os.path.join(self.directory, USAGE_FILE))
+
+    def _add_usage(self, size: int) -> int:
+        # the total is approximate: replaced results are counted twice and concurrent writers may lose an update, which only brings the next
+        # scan forward or back; a missing total is treated as too large, so that the store is scanned and the total recorded
+        try:
+            with open(os.path.join(self.directory, USAGE_FILE), "r", encoding="utf-8") as file:
+                total = int(file.read()) + size
+        except (OSError, ValueError):
+            return self.max_bytes + 1
+
+        self._write_usage(total)
+        return total
+
+    def _write_usage(self, total: int) -> None:
+        try:
+            with open(os.path.join(self.directory, USAGE_FILE), "w", encoding="utf-8") as file:
+                file.write(str(total))
+        except OSError:
+            pass
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
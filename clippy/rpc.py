@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Serves commands as a long-lived co-process speaking JSON-RPC 2.0 over standard input and output, started with `--clippy-rpc`.
+
+Each line of input is a request, or a batch of requests, naming a command as its method. Parameters may be given by name or by position and are
+converted through each parameter's type annotation, just as on the command line. Requests may be sent without waiting for earlier responses.
+With `--clippy-rpc-workers=N`, up to N requests run at once and each response is written as soon as it is ready, so responses may arrive out
+of order and are matched to requests by id. Anything a command prints is sent to standard error, so that standard output only carries responses.
+"""
+
+import json
+import sys
+import threading
+from typing import Any, Dict, List, Optional, TextIO, Union
+
+from .command_method import CommandMethod
+from .command_module import CommandModule
+from .command_output import is_records, to_serializable
+from .dispatch import call_command
+from .metrics import get_metrics, phase_timer
+from .options import ClippyOptions
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+COMMAND_ERROR = -32000
+
+
+class RPCError(Exception):
+    """An error to report to the client as a JSON-RPC error object."""
+
+    @property
+    def code(self) -> int:
+        """The JSON-RPC error code."""
+        return self._code
+
+    def __init__(self, code: int, message: str):
+        """
+        Creates a new error.
+
+        :param code: The JSON-RPC error code, such as `METHOD_NOT_FOUND`.
+        :param message: A description of the error.
+        """
+        super().__init__(message)
+        self._code = code
+
+
+def error_response(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+    """
+    Build a JSON-RPC error response.
+
+    :param request_id: The id of the failed request, or None if it could not be read.
+    :param code: The JSON-RPC error code.
+    :param message: A description of the error.
+    """
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+def encode_response(response: Dict[str, Any]) -> str:
+    """
+    Encode a response as JSON.
+
+    :param response: The response to encode.
+    :returns: The encoded response, or an error response for the same request if its result cannot be encoded, such as a dict with tuple keys.
+    """
+    try:
+        return json.dumps(response, default=to_serializable)
+    except (TypeError, ValueError) as error:
+        return json.dumps(error_response(response.get("id"), COMMAND_ERROR, f"Result cannot be encoded as JSON: {error}"), default=str)
+
+
+def named_params(command: CommandMethod, params: Union[None, List[Any], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Get the parameters of a request by name.
+
+    :param command: The command being called.
+    :param params: The `params` member of a request: an object, an array in parameter order, or None.
+    :returns: Values keyed by parameter name.
+    """
+    if params is None:
+        return dict()
+
+    if isinstance(params, dict):
+        return params
+
+    if isinstance(params, list):
+        names = [param.name for param in sorted(command.params.values(), key=lambda x: x.index)]
+
+        if len(params) > len(names):
+            raise RPCError(INVALID_PARAMS, f"Command {command.name} takes at most {len(names)} parameters, received {len(params)}")
+
+        return dict(zip(names, params))
+
+    raise RPCError(INVALID_REQUEST, "Member params must be an object or an array")
+
+
+class RPCServer:
+    """Reads JSON-RPC requests from a stream, calls the named commands, and writes responses to another stream."""
+
+    @property
+    def workers(self) -> int:
+        """The number of requests that may run at once."""
+        return self._workers
+
+    def __init__(self,  # pylint: disable=too-many-arguments
+                 command_module: CommandModule,
+                 input_stream: Optional[TextIO] = None,
+                 output_stream: Optional[TextIO] = None,
+                 workers: int = 1,
+                 options: Optional[ClippyOptions] = None):
+        """
+        Creates a new server. Nothing is read until `serve` is called.
+
+        :param command_module: The module whose commands are served.
+        :param input_stream: The stream from which requests are read. Optional. Defaults to standard input.
+        :param output_stream: The stream to which responses are written. Optional. Defaults to standard output.
+        :param workers: The number of requests that may run at once; with more than one, responses may be written out of order. Optional.
+                        Defaults to one.
+        :param options: The Clippy options applied to every request. Optional. Defaults to no options.
+        """
+        if not isinstance(command_module, CommandModule):
+            raise TypeError(f"Parameter command_module must be a CommandModule, received {type(command_module)}")
+
+        if not isinstance(workers, int):
+            raise TypeError(f"Parameter workers must be an integer, received {type(workers)}.")
+
+        if workers < 1:
+            raise ValueError(f"Parameter workers must be one or greater, received {workers}.")
+
+        self._command_module = command_module
+        self._input = input_stream if input_stream is not None else sys.stdin
+        self._output = output_stream if output_stream is not None else sys.stdout
+        self._workers = workers
+        self._options = options if options is not None else ClippyOptions()
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return self.__repr__()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._command_module.name!r}, {self.workers!r})"
+
+    def serve(self) -> None:
+        """Handle requests until the input stream is closed, then wait for any requests still running."""
+        output = self._output
+
+        # commands that print would corrupt the responses, so their output is sent to standard error while serving
+        previous, sys.stdout = sys.stdout, sys.stderr
+
+        try:
+            if self.workers == 1:
+                for line in self._input:
+                    self._write(self.respond(line), output)
+            else:
+                from concurrent.futures import ThreadPoolExecutor  # pylint: disable=import-outside-toplevel
+
+                with ThreadPoolExecutor(self.workers, thread_name_prefix="clippy-rpc") as executor:
+                    for line in self._input:
+                        executor.submit(lambda text: self._write(self.respond(text), output), line)
+        finally:
+            sys.stdout = previous
+
+    def respond(self, line: str) -> Optional[str]:
+        """
+        Handle one line of input, and encode the response as it is written.
+
+        :param line: The line to handle.
+        :returns: The response or batch of responses as a line of JSON, or None if nothing should be written.
+        """
+        response = self.handle_line(line)
+
+        if response is None:
+            return None
+
+        # each response is encoded on its own, so that a result that cannot be encoded fails only its own request
+        if isinstance(response, list):
+            return "[" + ", ".join(map(encode_response, response)) + "]\n"
+
+        return encode_response(response) + "\n"
+
+    def handle_line(self, line: str) -> Optional[Union[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Handle one line of input, holding a request or a batch of requests.
+
+        :param line: The line to handle.
+        :returns: The response or batch of responses, or None if nothing should be written, as for notifications and blank lines.
+        """
+        if not line.strip():
+            return None
+
+        try:
+            message = json.loads(line)
+        except ValueError as error:
+            return error_response(None, PARSE_ERROR, f"Parse error: {error}")
+
+        if isinstance(message, list):
+            if not message:
+                return error_response(None, INVALID_REQUEST, "Batch must not be empty")
+
+            responses = [response for response in map(self.handle, message) if response is not None]
+            return responses if responses else None
+
+        return self.handle(message)
+
+    def handle(self, message: Any) -> Optional[Dict[str, Any]]:
+        """
+        Handle one request.
+
+        :param message: The decoded request.
+        :returns: The response, or None if the request was a notification, which has no id.
+        """
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0" or not isinstance(message.get("method"), str):
+            return error_response(message.get("id") if isinstance(message, dict) else None, INVALID_REQUEST,
+                                  "Request must be an object with jsonrpc \"2.0\" and a method name")
+
+        request_id = message.get("id")
+
+        try:
+            result = self._call(message["method"], message.get("params"))
+        except RPCError as error:
+            response = error_response(request_id, error.code, str(error))
+        except Exception as error:  # pylint: disable=broad-except
+            # any error raised by a command is reported to the client rather than ending the co-process
+            response = error_response(request_id, COMMAND_ERROR, f"{type(error).__name__}: {error}")
+        else:
+            response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+        return response if "id" in message else None
+
+    def _call(self, name: str, params: Any) -> Any:
+        if name not in self._command_module.commands.keys():
+            raise RPCError(METHOD_NOT_FOUND, f"Unrecognized command {name}")
+
+        command = self._command_module.commands[name]
+        metrics = get_metrics(self._options.metrics)
+
+        if metrics is not None:
+            metrics.count_invocation(name)
+
+        try:
+            with phase_timer(metrics, name, "parse"):
+                arguments = command.bind_arguments(named_params(command, params))
+
+            with phase_timer(metrics, name, "validate"):
+                command.validate_arguments(arguments)
+        except (ValueError, TypeError) as error:
+            raise RPCError(INVALID_PARAMS, str(error)) from error
+
+        with phase_timer(metrics, name, "call"):
+            value = call_command(command, arguments, self._options)
+
+            # iterators are consumed here, so that errors raised while producing them are reported for this request
+            if is_records(value) and not isinstance(value, (list, tuple)):
+                value = list(value)
+
+        return value
+
+    def _write(self, text: Optional[str], output: TextIO) -> None:
+        if text is None:
+            return
+
+        with self._lock:
+            output.write(text)
+            output.flush()
+
+
+def serve(command_module: CommandModule, options: Optional[ClippyOptions] = None) -> None:
+    """
+    Serve a module's commands over standard input and output until standard input is closed.
+
+    :param command_module: The module whose commands are served.
+    :param options: The Clippy options for the co-process, including `--clippy-rpc-workers`. Optional. Defaults to no options.
+    """
+    options = options if options is not None else ClippyOptions()
+    RPCServer(command_module, workers=int(options.rpc_workers or 1), options=options).serve()
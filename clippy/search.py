@@ -0,0 +1,381 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Finds commands by the words in their names and documentation, as with `python -m tools --help csv parse` or `--clippy-search "csv parse"`.
+
+An inverted index maps each word to the commands whose name, description, parameter documentation, or return documentation contains it. It
+also holds the usage line and summary of each command, so search results are shown from the index alone: the module is not imported, its
+source is not parsed, and no `CommandMethod` is created. The index is saved beside the module's compiled files in `__pycache__`, and is rebuilt
+whenever the module's source changes.
+"""
+
+import bisect
+import json
+import math
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .command_method import CommandMethod
+from .command_module import CommandModule
+from .command_protocols import NO_DOCUMENTATION
+from .module_cache import file_stamp
+
+# the version of the saved index, which is rebuilt if it was saved in another format
+INDEX_FORMAT = 1
+
+# the suffix of the saved index, after the name of the module's source file
+INDEX_SUFFIX = ".clippy-search.json"
+
+# how much a word counts toward a command's score, by where it appears
+FIELD_WEIGHTS = {
+    "name": 4.0,
+    "documentation": 2.0,
+    "parameters": 1.0,
+    "return": 1.0,
+}
+
+# how much a word that only begins with a search term counts, relative to one that matches it exactly
+PREFIX_WEIGHT = 0.5
+
+# words too common to distinguish one command from another
+STOP_WORDS = {"a", "an", "and", "are", "as", "be", "by", "for", "from", "if", "in", "is", "it", "of", "on", "or", "the", "this", "to", "with"}
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Split text into lowercase words, ignoring punctuation, underscores, and common words.
+
+    :param text: The text to split, such as documentation, a command name, or search terms.
+    :returns: The words, in order, with repeats.
+    """
+    if not text:
+        return list()
+
+    return [word for word in _WORD_PATTERN.findall(text.lower()) if word not in STOP_WORDS]
+
+
+def _documented(text: str) -> str:
+    # the placeholder for missing documentation would otherwise match every undocumented command
+    return text if text != NO_DOCUMENTATION else ""
+
+
+def command_fields(command: CommandMethod) -> Dict[str, str]:
+    """
+    Get the text of a command that is searched, by where it appears.
+
+    :param command: The command to read.
+    :returns: The text of each field in `FIELD_WEIGHTS`, leaving out missing documentation.
+    """
+    return {
+        "name": command.name,
+        "documentation": _documented(command.documentation),
+        "parameters": " ".join(f"{param.name} {_documented(param.documentation)}" for param in command.params.values()),
+        "return": _documented(command.return_value.documentation),
+    }
+
+
+def _usage(command_module: CommandModule, command: CommandMethod) -> str:
+    try:
+        return f"python -m {command_module.name} {command.name} {command.short_params}".strip()
+    except ValueError:
+        # an annotation that cannot be resolved fails only the command that uses it, so the command is still listed, without its parameters
+        return f"python -m {command_module.name} {command.name}"
+
+
+class SearchIndex:
+    """An inverted index from words to the commands whose names or documentation contain them."""
+
+    @property
+    def module_name(self) -> str:
+        """The name of the module whose commands are indexed."""
+        return self._module_name
+
+    @property
+    def commands(self) -> List[str]:
+        """The names of every indexed command, in the order they are defined."""
+        return [name for (name, _, _) in self._commands]
+
+    @property
+    def stamp(self) -> Optional[Tuple[int, int]]:
+        """The modification time and size of the module's source when the index was built, if known."""
+        return self._stamp
+
+    def __init__(self,
+                 module_name: str,
+                 commands: List[Tuple[str, str, str]],
+                 postings: Dict[str, List[Tuple[int, float]]],
+                 stamp: Optional[Tuple[int, int]] = None):
+        """
+        Creates a new index. Use `build` to create one from a module.
+
+        :param module_name: The name of the module whose commands are indexed.
+        :param commands: The name, usage line, and summary of each command.
+        :param postings: For each word, the position in `commands` of each command containing it, paired with the word's weight in that command.
+        :param stamp: The modification time and size of the module's source when the index was built. Optional. Defaults to unknown.
+        """
+        if not isinstance(module_name, str):
+            raise TypeError(f"Parameter module_name must be a string, received {type(module_name)}")
+
+        if not isinstance(commands, list):
+            raise TypeError(f"Parameter commands must be a list, received {type(commands)}")
+
+        if not isinstance(postings, dict):
+            raise TypeError(f"Parameter postings must be a dict, received {type(postings)}")
+
+        self._module_name = module_name
+        self._commands = [tuple(command) for command in commands]
+        self._postings = postings
+        self._terms = sorted(postings.keys())
+        self._stamp = (stamp[0], stamp[1]) if stamp is not None else None
+
+    def __len__(self):
+        return len(self._commands)
+
+    def __str__(self):
+        return self.__repr__()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._module_name!r}, {len(self._commands)} commands, {len(self._terms)} words)"
+
+    @staticmethod
+    def build(command_module: CommandModule) -> "SearchIndex":
+        """
+        Index every command in a module.
+
+        :param command_module: The module to index.
+        :returns: The index, stamped with the module's source file, if known.
+        """
+        commands = list()
+        weights: Dict[str, Dict[int, float]] = dict()
+
+        for (idx, command) in enumerate(command_module.commands.values()):
+            documentation = _documented(command.documentation).strip()
+            summary = documentation.splitlines()[0] if documentation else ""
+            commands.append((command.name, _usage(command_module, command), summary))
+
+            for (field, text) in command_fields(command).items():
+                # a word counts once per field, so long documentation does not outweigh a name
+                for word in set(tokenize(text)):
+                    weights.setdefault(word, dict())
+                    weights[word][idx] = weights[word].get(idx, 0.0) + FIELD_WEIGHTS[field]
+
+        postings = {word: sorted(found.items()) for (word, found) in weights.items()}
+        stamp = file_stamp(command_module.filename) if command_module.filename else None
+        return SearchIndex(command_module.name, commands, postings, stamp)  # type: ignore
+
+    def search(self, terms: str, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Find the commands that match every search term, best first.
+
+        A term matches a word that it equals or begins, so `pars` finds `parse` and `parser`, though an exact match scores higher. Words found in
+        fewer commands, and words in names rather than documentation, count for more.
+
+        :param terms: The words to search for, separated by spaces or punctuation.
+        :param limit: The most results to return. Optional. Defaults to every match.
+        :returns: The name and score of each matching command, from the highest score; commands with equal scores are in the order defined.
+        """
+        if not isinstance(terms, str):
+            raise TypeError(f"Parameter terms must be a string, received {type(terms)}")
+
+        words = tokenize(terms)
+
+        if not words:
+            return list()
+
+        scores: Optional[Dict[int, float]] = None
+
+        for word in dict.fromkeys(words):
+            found = self._match(word)
+            scores = found if scores is None else {idx: score + found[idx] for (idx, score) in scores.items() if idx in found}
+
+            if not scores:
+                return list()
+
+        ranked = sorted(scores.items(), key=lambda pair: (-pair[1], pair[0]))  # type: ignore
+        return [(self._commands[idx][0], score) for (idx, score) in ranked[:limit]]
+
+    def render(self, terms: str, limit: Optional[int] = None) -> Optional[str]:
+        """
+        Build a help message listing only the commands that match the search terms.
+
+        :param terms: The words to search for.
+        :param limit: The most commands to list. Optional. Defaults to every match.
+        :returns: The usage and summary of each matching command, best first, or None if no command matches.
+        """
+        results = self.search(terms, limit)
+
+        if not results:
+            return None
+
+        details = {name: (usage, summary) for (name, usage, summary) in self._commands}
+        result = f"Commands matching {terms!r}:"
+
+        for (name, _) in results:
+            usage, summary = details[name]
+            result += f"\n\t{usage}"
+
+            if summary:
+                result += f"\n\t\t{summary}"
+
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the contents of this index as data that can be written as JSON."""
+        return {
+            "format": INDEX_FORMAT,
+            "module": self._module_name,
+            "stamp": list(self._stamp) if self._stamp is not None else None,
+            "commands": [list(command) for command in self._commands],
+            "postings": {word: [list(posting) for posting in found] for (word, found) in self._postings.items()},
+        }
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "SearchIndex":
+        """
+        Read an index from the data returned by `to_dict`.
+
+        :param data: The contents of an index.
+        :returns: The index.
+        """
+        if not isinstance(data, dict) or data.get("format") != INDEX_FORMAT:
+            raise ValueError("Search index is not in a supported format")
+
+        postings = {word: [tuple(posting) for posting in found] for (word, found) in data["postings"].items()}
+        return SearchIndex(data["module"], data["commands"], postings, data.get("stamp"))
+
+    def _match(self, word: str) -> Dict[int, float]:
+        # each command scores the best of the words the term matches, so a short term does not add up every word it begins
+        result: Dict[int, float] = dict()
+        start = bisect.bisect_left(self._terms, word)
+
+        for term in self._terms[start:]:
+            if not term.startswith(word):
+                break
+
+            found = self._postings[term]
+            rarity = math.log(1.0 + len(self._commands) / len(found))
+            factor = 1.0 if term == word else PREFIX_WEIGHT
+
+            for (idx, weight) in found:
+                result[idx] = max(result.get(idx, 0.0), weight * rarity * factor)
+
+        return result
+
+
+def index_path(filename: str) -> str:
+    """
+    Get the path at which the search index of a module's source file is saved.
+
+    :param filename: The module's source file.
+    :returns: A path in the `__pycache__` directory beside the source file.
+    """
+    directory, name = os.path.split(os.path.abspath(filename))
+    return os.path.join(directory, "__pycache__", os.path.splitext(name)[0] + INDEX_SUFFIX)
+
+
+def load_search_index(filename: str, module_name: Optional[str] = None) -> Optional[SearchIndex]:
+    """
+    Read the saved search index of a module's source file, if it is current.
+
+    :param filename: The module's source file.
+    :param module_name: The name under which the module is run, which appears in usage lines. Optional. Defaults to any name.
+    :returns: The index, or None if none was saved, it cannot be read, or the source has changed since it was built.
+    """
+    stamp = file_stamp(filename)
+
+    if stamp is None:
+        return None
+
+    try:
+        with open(index_path(filename), "r", encoding="utf-8") as file:
+            index = SearchIndex.from_dict(json.load(file))
+    except (OSError, ValueError, TypeError, KeyError):
+        return None
+
+    if index.stamp != stamp or (module_name is not None and index.module_name != module_name):
+        return None
+
+    return index
+
+
+def save_search_index(index: SearchIndex, filename: str) -> bool:
+    """
+    Save a search index beside a module's source file, replacing any saved before.
+
+    :param index: The index to save.
+    :param filename: The module's source file.
+    :returns: True if the index was saved; false if it could not be written, as in a read-only directory.
+    """
+    path = index_path(filename)
+    temporary = f"{path}.{os.getpid()}.tmp"
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(index.to_dict(), file, separators=(",", ":"))
+
+        # readers never see a partly written index
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+
+        return False
+
+    return True
+
+
+def search_index_for(command_module: CommandModule) -> SearchIndex:
+    """
+    Get the search index of a module, reading it if it was saved and is current, or building and saving it otherwise.
+
+    :param command_module: The module to search.
+    :returns: The index.
+    """
+    filename = command_module.filename
+
+    if filename is None:
+        return SearchIndex.build(command_module)
+
+    index = load_search_index(filename, command_module.name)
+
+    if index is None:
+        index = SearchIndex.build(command_module)
+        save_search_index(index, filename)
+
+    return index
+
+
+def search_output(index: SearchIndex, terms: Iterable[str]) -> Tuple[int, str]:
+    """
+    Search an index, as for `--help <terms>`.
+
+    :param index: The index to search.
+    :param terms: The search terms.
+    :returns: A tuple of exit status and text to show; the status is non-zero if no command matches.
+    """
+    text = " ".join(terms)
+    output = index.render(text)
+
+    if output is None:
+        return 1, f"No commands match {text!r}"
+
+    return 0, output
+
+
+def search_commands(command_module: CommandModule, terms: Iterable[str]) -> Tuple[int, str]:
+    """
+    Search a module's commands, using its saved index if it is current.
+
+    :param command_module: The module to search.
+    :param terms: The search terms.
+    :returns: A tuple of exit status and text to show; the status is non-zero if no command matches.
+    """
+    return search_output(search_index_for(command_module), terms)
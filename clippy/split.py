@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Runs a command marked `@clippy(split="lines")` on parts of its input file at once, in separate processes, as with `--clippy-jobs 8`.
+
+The file is memory-mapped and cut into byte ranges that end between lines. Each worker is forked with the command and its arguments already
+in memory, receives only the offsets of a range, and maps the same file itself, so no file data is copied between processes. The results of
+each range are combined, in order, with the command's `reduce` function.
+
+A file that cannot be mapped, such as standard input from a pipe, or that is compressed, is read by a single call to the command instead.
+"""
+
+import functools
+import io
+import mmap
+import os
+import stat
+from collections.abc import Iterator
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from .command_input import closing_input_streams, detect_compression, is_input_annotation, MAGIC_LENGTH, STDIN_ARGUMENT
+from .command_method import CommandMethod
+from .command_param import CommandParam
+from .options import ClippyOptions
+
+# the number of ranges per process, so that a process that finishes early can take another range
+RANGES_PER_JOB = 4
+
+# the command and arguments being split, set in each worker by `_start_worker`; this is only ever set within a worker process
+_JOB: Optional[Tuple[CommandMethod, Dict[str, Any], CommandParam, str]] = None
+
+
+def split_jobs(command: CommandMethod, options: ClippyOptions) -> int:
+    """
+    Get the number of processes among which to split a command's input.
+
+    :param command: The command to run.
+    :param options: The Clippy options for this invocation, including `--clippy-jobs`.
+    :returns: The number of processes, or one if the command is not marked with `@clippy(split=...)` or `--clippy-jobs` was not given.
+    """
+    # the value is checked to be a positive integer when the options are read
+    if options.jobs is None or not command.settings.get("split"):
+        return 1
+
+    return int(options.jobs)
+
+
+def input_parameter(command: CommandMethod) -> Optional[CommandParam]:
+    """
+    Find the parameter whose file is split.
+
+    :param command: The command to run.
+    :returns: The first parameter annotated as `bytes`, `memoryview`, `typing.BinaryIO`, or `typing.TextIO`, if any.
+    """
+    for param in command.params.values():
+        if is_input_annotation(param.annotation):
+            return param
+
+    return None
+
+
+def line_ranges(data: Any, parts: int) -> List[Tuple[int, int]]:
+    """
+    Cut data into about the given number of byte ranges of similar size, each of which ends just after a newline or at the end of the data.
+
+    :param data: The data to cut, such as an `mmap`; anything with a length and a `find` method like that of `bytes`.
+    :param parts: The number of ranges to cut; fewer are returned if there are too few lines.
+    :returns: The start and end offsets of each range, in order, covering all of the data.
+    """
+    if not isinstance(parts, int):
+        raise TypeError(f"Parameter parts must be an integer, received {type(parts)}")
+
+    if parts < 1:
+        raise ValueError(f"Parameter parts must be positive, received {parts}")
+
+    size = len(data)
+    bounds = [0]
+
+    for idx in range(1, parts):
+        newline = data.find(b"\n", max(size * idx // parts, bounds[-1]))
+
+        if newline < 0 or newline + 1 >= size:
+            break
+
+        if newline + 1 > bounds[-1]:
+            bounds.append(newline + 1)
+
+    bounds.append(size)
+    return [(start, end) for (start, end) in zip(bounds, bounds[1:]) if end > start]
+
+
+def file_ranges(path: str, parts: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Cut a file into ranges between lines, if it can be split.
+
+    :param path: The path to the file, or `-` for standard input.
+    :param parts: The number of ranges to cut.
+    :returns: The ranges, or None if the file is standard input, is not a regular file, is empty, or is compressed.
+    """
+    if path == STDIN_ARGUMENT or not os.path.isfile(path):
+        return None
+
+    with open(path, "rb") as file:
+        status = os.fstat(file.fileno())
+
+        if not stat.S_ISREG(status.st_mode) or status.st_size == 0 or detect_compression(file.read(MAGIC_LENGTH)) is not None:
+            return None
+
+        # only the pages around each boundary are read
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return line_ranges(data, parts)
+
+
+def run_split(command: CommandMethod, arguments: Dict[str, Any], jobs: int) -> Any:
+    """
+    Run a command on ranges of its input file in separate processes, and combine the results.
+
+    :param command: The command to run, marked with `@clippy(split=...)`.
+    :param arguments: The arguments to the command, from `parse_arguments` with the input file left as a path.
+    :param jobs: The number of processes to run at once.
+    :returns: The results of each range, combined with the command's `reduce` function, or the result of a single call if the file cannot be
+              split.
+    """
+    import multiprocessing  # pylint: disable=import-outside-toplevel
+
+    param = input_parameter(command)
+
+    if param is None:
+        raise ValueError(f"Command {command.name} is marked to split its input, but has no file parameter")
+
+    path = arguments.get(param.name)
+    ranges = file_ranges(path, jobs * RANGES_PER_JOB) if isinstance(path, str) else None
+
+    # workers inherit the job by forking, which is not available everywhere
+    if path is None or not ranges or len(ranges) == 1 or "fork" not in multiprocessing.get_all_start_methods():
+        opened = command.open_inputs(arguments)
+        return closing_input_streams(command.call(opened), opened)
+
+    # forked workers inherit the job as the initializer's arguments, rather than receiving it pickled, and no state is shared between calls
+    job = (command, arguments, param, path)
+
+    with multiprocessing.get_context("fork").Pool(min(jobs, len(ranges)), initializer=_start_worker, initargs=(job,)) as pool:
+        results = pool.starmap(_run_range, ranges, chunksize=1)
+
+    return functools.reduce(command.settings["reduce"], results)
+
+
+def _start_worker(job: Tuple[CommandMethod, Dict[str, Any], CommandParam, str]) -> None:
+    global _JOB  # pylint: disable=global-statement
+    _JOB = job
+
+
+def _run_range(start: int, end: int) -> Any:
+    if _JOB is None:
+        raise RuntimeError("No split command is running")
+
+    command, arguments, param, path = _JOB
+
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        value = command.call(dict(arguments, **{param.name: _range_argument(param.annotation, memoryview(data)[start:end])}))
+
+        # generators cannot be returned from another process, and must finish reading before the file is unmapped
+        return list(value) if isinstance(value, Iterator) else value
+
+
+def _range_argument(annotation: Any, view: memoryview) -> Any:
+    if annotation is memoryview:
+        return view
+
+    if annotation is bytes:
+        return view.tobytes()
+
+    stream = io.BufferedReader(_ViewReader(view))
+    return io.TextIOWrapper(stream, encoding="utf-8") if annotation is TextIO else stream
+
+
+class _ViewReader(io.RawIOBase):
+    """A stream that reads from a view of memory, such as part of a memory-mapped file."""
+
+    def __init__(self, view: memoryview):
+        super().__init__()
+        self._view = view
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = min(len(buffer), len(self._view))
+        buffer[:count] = self._view[:count]
+        self._view = self._view[count:]
+        return count
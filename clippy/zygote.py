@@ -0,0 +1,390 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Serves commands from a pool of pre-forked worker processes, started with `--clippy-zygote=<socket path>`.
+
+The parent process imports the module and builds its `CommandModule` once, then forks workers that share that state copy-on-write. Each worker
+accepts requests on a Unix domain socket and runs them on its own interpreter, so concurrent requests use every core. Workers are replaced
+after handling a number of requests or once their resident memory passes a limit. Available on Unix only.
+
+A request is one line of JSON, `{"arguments": ["command", "--param", "value"]}`, and the response is one line of JSON holding the exit
+status and everything the command wrote to standard output, `{"status": 0, "output": "..."}`. Output that is not UTF-8 text, such as from
+`--clippy-format=npy`, is sent encoded as base64, with `"encoding": "base64"`. Run `python -m clippy.zygote <socket path> <command>
+[arguments]` to send a request from a shell; the client does not import the parsing machinery, so it starts quickly.
+"""
+
+import io
+import json
+import os
+import signal
+import socket
+import stat
+import sys
+import traceback
+from contextlib import redirect_stdout
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+TYPE_CHECKING = False
+
+if TYPE_CHECKING:
+    from .command_module import CommandModule  # pylint: disable=unused-import
+
+# the number of requests a worker handles before it is replaced, unless overridden by the CLIPPY_ZYGOTE_MAX_REQUESTS environment variable
+DEFAULT_MAX_REQUESTS = 1000
+
+# the number of connections that may wait to be accepted
+BACKLOG = 128
+
+
+def current_rss() -> Optional[int]:
+    """
+    Get the resident set size of this process.
+
+    :returns: The size in bytes, or None if it cannot be determined on this platform.
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+
+    # without /proc, fall back to the peak size; this is in kilobytes on Linux, but in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_request(command_module: "CommandModule", arguments: List[str]) -> Dict[str, Any]:
+    """
+    Run one request against a module, capturing everything written to standard output.
+
+    :param command_module: The module containing the commands.
+    :param arguments: The command name followed by its arguments. May include Clippy options.
+    :returns: The response, holding the exit status and output; see `encode_output`.
+    """
+    from .command_output import default_format, write_output  # pylint: disable=import-outside-toplevel
+    from .dispatch import dispatch_arguments  # pylint: disable=import-outside-toplevel
+    from .options import split_clippy_options  # pylint: disable=import-outside-toplevel
+
+    # binary formats are written to the buffer beneath the text stream, as they would be to standard output
+    output = io.BytesIO()
+    buffer = io.TextIOWrapper(output, encoding="utf-8", newline="\n", write_through=True)
+
+    try:
+        with redirect_stdout(buffer):
+            options, remaining = split_clippy_options(list(arguments))
+            result = dispatch_arguments(command_module, remaining, options)
+
+            if result.invoked:
+                write_output(result.value, options.format or default_format(result.command.return_value if result.command else None), buffer)
+            else:
+                print(result.output, file=buffer)
+
+        status = result.status
+    except SystemExit as error:
+        # as the interpreter does, no code means success, and any other value is printed and means failure
+        if error.code is None or isinstance(error.code, int):
+            status = error.code or 0
+        else:
+            print(error.code, file=buffer)
+            status = 1
+    except Exception:  # pylint: disable=broad-except
+        # any error raised by a command is reported to the client rather than ending the worker
+        buffer.write(traceback.format_exc())
+        status = 1
+
+    buffer.flush()
+    return dict(status=status, **encode_output(output.getvalue()))
+
+
+def encode_output(output: bytes) -> Dict[str, str]:
+    """
+    Encode a command's output for a response, which is JSON and so can only hold text.
+
+    :param output: Everything the command wrote to standard output.
+    :returns: The output as text, keyed by `output`, if it is UTF-8; otherwise, the output encoded as base64, with `encoding` set to "base64".
+    """
+    try:
+        return {"output": output.decode("utf-8")}
+    except UnicodeDecodeError:
+        import base64  # pylint: disable=import-outside-toplevel
+        return {"output": base64.b64encode(output).decode("ascii"), "encoding": "base64"}
+
+
+def remove_socket(path: str) -> None:
+    """
+    Remove a Unix domain socket left at a path, so a new one can be bound there.
+
+    :param path: The socket path. Nothing is done if nothing is there.
+    :raises FileExistsError: If the path is something other than a socket.
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+
+    # a mistyped path must not delete the user's file
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"Path {path} already exists and is not a socket")
+
+    os.remove(path)
+
+
+class ZygoteServer:
+    """A parent process that forks and supervises workers serving one module's commands over a Unix domain socket."""
+
+    @property
+    def path(self) -> str:
+        """The path of the Unix domain socket on which requests are accepted."""
+        return self._path
+
+    @property
+    def workers(self) -> int:
+        """The number of worker processes."""
+        return self._workers
+
+    @property
+    def max_requests(self) -> int:
+        """The number of requests a worker handles before it is replaced, or zero for no limit."""
+        return self._max_requests
+
+    @property
+    def max_rss(self) -> int:
+        """The resident set size, in bytes, past which a worker is replaced after its current request, or zero for no limit."""
+        return self._max_rss
+
+    def __init__(self,  # pylint: disable=too-many-arguments
+                 command_module: "CommandModule",
+                 path: str,
+                 workers: Optional[int] = None,
+                 max_requests: Optional[int] = None,
+                 max_rss: Optional[int] = None):
+        """
+        Creates a new server. Nothing is forked until `serve_forever` is called.
+
+        :param command_module: The module whose commands are served.
+        :param path: The path of the Unix domain socket to create.
+        :param workers: The number of worker processes. Optional. Defaults to CLIPPY_ZYGOTE_WORKERS, or the number of processors.
+        :param max_requests: The number of requests after which a worker is replaced. Optional. Defaults to CLIPPY_ZYGOTE_MAX_REQUESTS, or 1000.
+        :param max_rss: The resident set size, in bytes, past which a worker is replaced. Optional. Defaults to CLIPPY_ZYGOTE_MAX_RSS_BYTES, or
+                        no limit.
+        """
+        from .command_module import CommandModule  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+        if not hasattr(os, "fork") or not hasattr(socket, "AF_UNIX"):
+            raise RuntimeError("The zygote server requires fork and Unix domain sockets, which are not available on this platform")
+
+        if not isinstance(command_module, CommandModule):
+            raise TypeError(f"Parameter command_module must be a CommandModule, received {type(command_module)}")
+
+        if not path:
+            raise ValueError("Parameter path is required.")
+
+        if workers is None:
+            workers = int(os.environ.get("CLIPPY_ZYGOTE_WORKERS", 0)) or os.cpu_count() or 1
+
+        if max_requests is None:
+            max_requests = int(os.environ.get("CLIPPY_ZYGOTE_MAX_REQUESTS", DEFAULT_MAX_REQUESTS))
+
+        if max_rss is None:
+            max_rss = int(os.environ.get("CLIPPY_ZYGOTE_MAX_RSS_BYTES", 0))
+
+        for (name, value) in (("workers", workers), ("max_requests", max_requests), ("max_rss", max_rss)):
+            if not isinstance(value, int):
+                raise TypeError(f"Parameter {name} must be an integer if provided, received {type(value)}.")
+
+        if workers < 1:
+            raise ValueError(f"Parameter workers must be one or greater, received {workers}.")
+
+        if max_requests < 0 or max_rss < 0:
+            raise ValueError("Parameters max_requests and max_rss must be zero or greater.")
+
+        self._command_module = command_module
+        self._path = path
+        self._workers = workers
+        self._max_requests = max_requests
+        self._max_rss = max_rss
+        self._children: List[int] = list()
+
+    def __str__(self):
+        return self.__repr__()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._command_module.name!r}, {self.path!r}, {self.workers!r})"
+
+    def serve_forever(self) -> None:
+        """
+        Fork the workers and replace any that exit, until this process receives SIGTERM or SIGINT. The socket is removed on exit.
+
+        A socket left at the path by an earlier server is replaced, but anything else at the path is left alone and raises `FileExistsError`.
+        """
+        remove_socket(self.path)
+
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        previous = signal.signal(signal.SIGTERM, _exit_on_signal)
+
+        try:
+            listener.bind(self.path)
+            listener.listen(BACKLOG)
+            print(f"Serving {self._command_module.name} on {self.path} with {self.workers} workers", file=sys.stderr)
+
+            for _ in range(self.workers):
+                self._spawn(listener)
+
+            while True:
+                try:
+                    pid, _ = os.wait()
+                except ChildProcessError:
+                    pid = 0
+
+                if pid in self._children:
+                    self._children.remove(pid)
+
+                while len(self._children) < self.workers:
+                    self._spawn(listener)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+            self._stop_children()
+            listener.close()
+            remove_socket(self.path)
+
+    def _spawn(self, listener: socket.socket) -> None:
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        # a signal that arrives while fork runs its own handlers would be ignored there, leaving the server running, so it is held until after
+        mask = signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTERM, signal.SIGINT})
+        pid = os.fork()
+
+        if pid:
+            self._children.append(pid)
+            signal.pthread_sigmask(signal.SIG_SETMASK, mask)
+            return
+
+        # the worker never returns into the caller's stack; it leaves through os._exit so that the parent's cleanup does not run twice
+        status = 0
+
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.pthread_sigmask(signal.SIG_SETMASK, mask)
+            self._work(listener)
+        except BaseException:  # pylint: disable=broad-except
+            traceback.print_exc()
+            status = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)  # pylint: disable=protected-access
+
+    def _work(self, listener: socket.socket) -> None:
+        handled = 0
+
+        while True:
+            connection, _ = listener.accept()
+
+            with connection:
+                self._handle(connection)
+
+            handled += 1
+
+            if self.max_requests and handled >= self.max_requests:
+                return
+
+            if self.max_rss and (current_rss() or 0) > self.max_rss:
+                return
+
+    def _handle(self, connection: socket.socket) -> None:
+        with connection.makefile("rwb") as stream:
+            line = stream.readline()
+
+            try:
+                request = json.loads(line.decode("utf-8"))
+                arguments = request.get("arguments") if isinstance(request, dict) else None
+
+                if not isinstance(arguments, list) or not all(isinstance(argument, str) for argument in arguments):
+                    raise ValueError("expected an object with a list of strings named arguments")
+
+                response = run_request(self._command_module, arguments)
+            except ValueError as error:
+                response = {"status": 1, "output": f"Invalid request: {error}\n"}
+
+            stream.write(json.dumps(response).encode("utf-8") + b"\n")
+
+    def _stop_children(self) -> None:
+        for pid in self._children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        for pid in self._children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+
+        self._children = list()
+
+
+def _exit_on_signal(signum, frame):  # pylint: disable=unused-argument
+    raise KeyboardInterrupt()
+
+
+def request(path: str, arguments: List[str], timeout: Optional[float] = None) -> Tuple[int, Union[str, bytes]]:
+    """
+    Send a request to a zygote server and wait for the response.
+
+    :param path: The path of the server's Unix domain socket.
+    :param arguments: The command name followed by its arguments. May include Clippy options.
+    :param timeout: The number of seconds to wait for the response. Optional. Defaults to waiting indefinitely.
+    :returns: A tuple of the exit status and the command's output, which is text, or bytes if it is not UTF-8, as for binary formats.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(path)
+
+        with connection.makefile("rwb") as stream:
+            stream.write(json.dumps({"arguments": list(arguments)}).encode("utf-8") + b"\n")
+            stream.flush()
+            response = json.loads(stream.readline().decode("utf-8"))
+
+    if response.get("encoding") == "base64":
+        import base64  # pylint: disable=import-outside-toplevel
+        return response["status"], base64.b64decode(response["output"])
+
+    return response["status"], response["output"]
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    """
+    Send the command line to a zygote server, print its output, and exit with its status.
+
+    :param arguments: The socket path followed by the command and its arguments. Optional. Defaults to `sys.argv[1:]`.
+    """
+    if arguments is None:
+        arguments = sys.argv[1:]
+
+    if not arguments:
+        print("Usage: python -m clippy.zygote <socket path> <command> [arguments]", file=sys.stderr)
+        sys.exit(1)
+
+    status, output = request(arguments[0], arguments[1:])
+
+    if isinstance(output, bytes):
+        sys.stdout.buffer.write(output)
+    else:
+        sys.stdout.write(output)
+
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,73 +3,211 @@
 
 """
 A simple script to convert docstrings to markdown format.
+
+Each module's rendered markdown is cached alongside a hash of its source, so later runs only re-render modules that changed.
 """
 
 import ast
-import importlib
+import hashlib
+import json
 import os
 from ast import FunctionDef, ClassDef
+from typing import Dict, List, Optional
 
-from clippy.command_method import CommandMethod, create_command_method
-from clippy.command_module import create_command_module_for_file
 from clippy.common import parse_ast, function_docs_from_string
 
-all_modules = sorted(map(lambda x: os.path.join("clippy", x), os.listdir("clippy")))
+CACHE_FILE = os.path.join("docs", ".doc_cache.json")
+OUTPUT_FILE = os.path.join("docs", "index.md")
+
+
+def renderer_hash() -> str:
+    """
+    Hash the source of this script and of Clippy, which together render the docs, so that cached fragments are discarded whenever either changes.
+
+    :returns: A hex digest identifying this revision of the renderer.
+    """
+    package = os.path.join(os.path.dirname(os.path.abspath(__file__)), "clippy")
+    filenames = [__file__] + sorted(os.path.join(package, name) for name in os.listdir(package) if name.endswith(".py"))
+    digest = hashlib.sha256()
+
+    for filename in filenames:
+        digest.update(os.path.basename(filename).encode("utf-8"))
+
+        with open(filename, "rb") as file:
+            digest.update(file.read())
+
+    return digest.hexdigest()
+
+
+def source_hash(filename: str, version: str) -> str:
+    """
+    Hash the contents of the given file together with the revision of the renderer.
+
+    :param filename: The name of the file to hash.
+    :param version: The hash of the renderer, from `renderer_hash`.
+    :returns: A hex digest identifying this revision of the file.
+    """
+    digest = hashlib.sha256(version.encode("utf-8"))
+
+    with open(filename, "rb") as file:
+        digest.update(file.read())
+
+    return digest.hexdigest()
+
+
+def load_cache(filename: str = CACHE_FILE) -> Dict[str, Dict[str, str]]:
+    """
+    Load previously rendered fragments, keyed by filename. Returns an empty cache if none exists or it is unreadable.
+
+    :param filename: The name of the cache file. Optional. Defaults to `CACHE_FILE`.
+    """
+    try:
+        with open(filename, "r") as file:
+            cache = json.load(file)
+    except (OSError, ValueError):
+        return dict()
+
+    return cache if isinstance(cache, dict) else dict()
+
+
+def save_cache(cache: Dict[str, Dict[str, str]], filename: str = CACHE_FILE) -> None:
+    """
+    Write rendered fragments to disk for use in the next run.
 
-docs = list()
+    :param cache: Fragments keyed by filename.
+    :param filename: The name of the cache file. Optional. Defaults to `CACHE_FILE`.
+    """
+    directory = os.path.dirname(filename)
 
-for filename in all_modules:
-    if not os.path.isfile(filename) or "__" in filename:
-        print(f"Skipping {filename}")
-        continue
+    if directory:
+        os.makedirs(directory, exist_ok=True)
 
-    print(f"Parsing {filename}...")
-    module = create_command_module_for_file(filename)
-    docs.append(module.markdown())
+    with open(filename, "w") as file:
+        json.dump(cache, file, indent=1, sort_keys=True)
 
-    module_name = filename[:-3].replace(os.path.sep, ".")
-    imported_module = importlib.import_module(module_name)
+
+def render_function(item: FunctionDef, level: int, title: Optional[str] = None) -> str:
+    """
+    Render the documentation for a function or method.
+
+    :param item: A function from the AST.
+    :param level: The level of the function's heading.
+    :param title: The heading. Optional. Defaults to the function's name.
+    :returns: Markdown for the function.
+    """
+    result = f"{'#' * level} {title or item.name}\n"
+    method, params, ret = function_docs_from_string(ast.get_docstring(item))
+
+    if method:
+        result += f"\n{method}\n"
+
+    if params:
+        result += f"\n{'#' * (level + 1)} Parameters"
+
+        for (key, val) in params.items():
+            result += f"\n* {key}: {val}"
+
+    if ret and not method:
+        result += f"\n{ret}"
+    elif ret:
+        result += f"\n\n{'#' * level} Returns: {ret}"
+
+    return f"{result}\n"
+
+
+def render_class(item: ClassDef) -> str:
+    """
+    Render the documentation for a class and its methods.
+
+    :param item: A class from the AST.
+    :returns: Markdown for the class.
+    """
+    docs = [f"## {item.name}\n\n{ast.get_docstring(item)}\n"]
+    props = sorted(filter(lambda x: isinstance(x, FunctionDef), item.body), key=lambda x: x.name)
+
+    for prop in props:
+        docs.append(render_function(prop, 3, "Constructor" if prop.name == "__init__" else None))
+
+    return "\n".join(docs)
+
+
+def render_file(filename: str) -> str:
+    """
+    Render the documentation for a single module from its source, without importing it.
+
+    :param filename: The name of the file to render.
+    :returns: Markdown for the module.
+    """
     parsed = parse_ast(filename)
+    module_name = os.path.splitext(filename)[0].replace(os.path.sep, ".")
+    docs = [f"# {module_name}\n"]
+
+    if ast.get_docstring(parsed):
+        docs.append(f"{ast.get_docstring(parsed)}\n")
 
     for item in parsed.body:
         if isinstance(item, FunctionDef):
-            meth = create_command_method(item, imported_module)
-            docs.append(meth.markdown())
+            docs.append(render_function(item, 2))
         elif isinstance(item, ClassDef):
-            docs.append(f"## {item.name}\n\n{ast.get_docstring(item)}\n")
-            props = sorted(filter(lambda x: isinstance(x, FunctionDef), item.body), key=lambda x: x.name)
+            docs.append(render_class(item))
+
+    return "\n".join(docs)
+
+
+def build_docs(package: str = "clippy", output_file: str = OUTPUT_FILE, cache_file: str = CACHE_FILE) -> List[str]:
+    """
+    Render every module in a package, reusing cached fragments for modules whose source has not changed.
+
+    :param package: The directory of the package. Optional. Defaults to `clippy`.
+    :param output_file: The name of the markdown file to write. Optional. Defaults to `OUTPUT_FILE`.
+    :param cache_file: The name of the cache file. Optional. Defaults to `CACHE_FILE`.
+    :returns: The names of the files that were rendered, rather than read from the cache.
+    """
+    all_modules = sorted(map(lambda x: os.path.join(package, x), os.listdir(package)))
+    version = renderer_hash()
+    cache = load_cache(cache_file)
+    updated = dict()
+    rendered = list()
+    docs = list()
+
+    for filename in all_modules:
+        if not os.path.isfile(filename) or not filename.endswith(".py") or "__" in filename:
+            print(f"Skipping {filename}")
+            continue
+
+        key = source_hash(filename, version)
+        entry = cache.get(filename)
+
+        if entry and entry.get("hash") == key:
+            print(f"Unchanged {filename}")
+            fragment = entry["markdown"]
+        else:
+            print(f"Parsing {filename}...")
+            fragment = render_file(filename)
+            rendered.append(filename)
 
-            for prop in props:
-                if isinstance(prop, FunctionDef):
-                    if prop.name != "__init__":
-                        result = f"### {prop.name}\n"
-                    else:
-                        result = f"### Constructor\n"
+        updated[filename] = {"hash": key, "markdown": fragment}
+        docs.append(fragment)
 
-                    method, params, ret = function_docs_from_string(ast.get_docstring(prop))
+    directory = os.path.dirname(output_file)
 
-                    print(prop.name)
-                    print(method)
-                    print(params)
-                    print(ret)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
 
-                    if method:
-                        result += f"\n{method}\n"
+    with open(output_file, "w") as file:
+        file.write("\n".join(docs))
 
-                    if params:
-                        result += "\n#### Parameters"
+    # entries for deleted modules are dropped, since only modules seen in this run are kept
+    save_cache(updated, cache_file)
+    return rendered
 
-                        for (key, val) in params.items():
-                            result += f"\n* {key}: {val}"
 
-                    if ret and not method:
-                        result += f"\n{ret}"
-                    elif ret:
-                        result += f"\n\n### Returns: {ret}"
+def main() -> None:
+    """
+    Render every module in the package to `OUTPUT_FILE`.
+    """
+    build_docs()
 
-                    docs.append(f"{result}\n")
-        else:
-            print(f"Skipping AST type {item}")
 
-with open("docs/index.md", "w") as file:
-    file.write("\n".join(docs))
+if __name__ == "__main__":
+    main()
@@ -49,5 +49,6 @@ setuptools.setup(
     python_requires=">=3.6",
     entry_points="""
         [console_scripts]
+        clippy=clippy.launcher:main
     """
 )
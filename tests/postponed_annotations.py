@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Commands whose annotations are postponed, so they are strings until resolved.
+"""
+
+from __future__ import annotations
+
+from typing import Dict
+
+from clippy import clippy, begin_clippy
+
+
+@clippy
+def add(first: int, second: int = 1, *rest: float) -> int:
+    """
+    Add numbers.
+
+    :param first: The first number.
+    :param second: The second number.
+    :param rest: Any other numbers.
+    :return: The sum.
+    """
+    return first + second + sum(rest)
+
+
+@clippy
+def scores(name: str, score: float = 0.0) -> Dict[str, float]:
+    return {name: score}
+
+
+@clippy
+def broken(value: Missing) -> Missing:  # noqa: F821
+    return value
+
+
+if __name__ == "__main__":
+    begin_clippy()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for batch.py
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from hypothesis import given
+import hypothesis.strategies as st
+
+from clippy import clippy
+from clippy.batch import BatchJournal, JOURNAL_HEADER, load_journal, parse_record, read_records, record_checksum, result_checksum, run_batch
+from clippy.command_module import create_command_module_for_module
+from clippy.options import split_clippy_options
+
+CALLS = list()
+
+
+@clippy
+def add(first: int, second: int = 1):
+    CALLS.append(first)
+    return first + second
+
+
+@clippy
+def count(limit: int):
+    return (idx for idx in range(limit))
+
+
+@clippy
+def shout(arg: str):
+    print("shouting")
+    return arg.upper()
+
+
+@clippy
+def fail(arg: str):
+    raise RuntimeError(f"failed on {arg}")
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.command_module = create_command_module_for_module(sys.modules[__name__])
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.directory.name, "records.txt")
+        CALLS.clear()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_records(self, lines):
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write("".join(f"{line}\n" for line in lines))
+
+    def run_batch(self, *arguments):
+        options, _ = split_clippy_options(["--clippy-batch", self.path] + list(arguments))
+        output = io.StringIO()
+        status = run_batch(self.command_module, options, output)
+        return status, [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_results(self):
+        self.write_records(["add 1", "# a comment", "", "add 2 --second 5", "count 3"])
+        status, results = self.run_batch()
+        self.assertEqual(0, status)
+        self.assertEqual([(0, 2), (19, 7), (36, [0, 1, 2])], [(result["offset"], result["result"]) for result in results])
+        self.assertEqual([result_checksum(json.dumps(result["result"])) for result in results], [result["checksum"] for result in results])
+        self.assertEqual({0, 19, 36}, set(load_journal(self.path + ".journal").keys()))
+
+    def test_resume(self):
+        self.write_records([f"add {idx}" for idx in range(10)])
+        self.run_batch()
+        self.assertEqual(list(range(10)), CALLS)
+
+        self.write_records([f"add {idx}" for idx in range(12)])
+        status, results = self.run_batch("--clippy-resume")
+        self.assertEqual(0, status)
+        self.assertEqual([11, 12], [result["result"] for result in results])
+        self.assertEqual(list(range(12)), CALLS)
+
+    def test_without_resume(self):
+        self.write_records(["add 1", "add 2"])
+        self.run_batch()
+        _, results = self.run_batch()
+        self.assertEqual([2, 3], [result["result"] for result in results])
+        self.assertEqual([1, 2, 1, 2], CALLS)
+
+    def test_changed_record(self):
+        self.write_records(["add 1", "add 2"])
+        self.run_batch()
+        self.write_records(["add 1", "add 3"])
+        _, results = self.run_batch("--clippy-resume")
+        self.assertEqual([4], [result["result"] for result in results])
+
+    def test_failures(self):
+        self.write_records(["add 1", "fail now", "unknown", "add x"])
+        status, results = self.run_batch()
+        self.assertEqual(1, status)
+        self.assertEqual("RuntimeError: failed on now", results[1]["error"])
+        self.assertEqual("ValueError: Unrecognized command unknown", results[2]["error"])
+        self.assertIn("error", results[3])
+        self.assertEqual([0], list(load_journal(self.path + ".journal").keys()))
+
+        self.write_records(["add 1", "add 5", "add 6", "add 7"])
+        status, results = self.run_batch("--clippy-resume")
+        self.assertEqual(0, status)
+        self.assertEqual([6, 7, 8], [result["result"] for result in results])
+
+    def test_unparsable_records(self):
+        self.write_records(["add 1", 'add "2', "add 3"])
+
+        with open(self.path, "ab") as file:
+            file.write(b"add \xff\nadd 4\n")
+
+        status, results = self.run_batch()
+        self.assertEqual(1, status)
+        self.assertEqual([0, 6, 13, 19, 25], [result["offset"] for result in results])
+        self.assertEqual("ValueError: No closing quotation", results[1]["error"])
+        self.assertTrue(results[3]["error"].startswith("UnicodeDecodeError"))
+        self.assertEqual([2, 4, 5], [result["result"] for result in results if "result" in result])
+
+    def test_custom_journal(self):
+        journal = os.path.join(self.directory.name, "custom.journal")
+        self.write_records(["add 1"])
+        self.run_batch("--clippy-journal", journal)
+        self.assertEqual([0], list(load_journal(journal).keys()))
+        self.assertFalse(os.path.exists(self.path + ".journal"))
+
+    def test_print_goes_to_stderr(self):
+        self.write_records(["shout hi"])
+        stderr = io.StringIO()
+
+        with redirect_stderr(stderr):
+            _, results = self.run_batch()
+
+        self.assertEqual(["HI"], [result["result"] for result in results])
+        self.assertEqual("shouting\n", stderr.getvalue())
+
+    def test_resume_stdin(self):
+        options, _ = split_clippy_options(["--clippy-batch", "-", "--clippy-resume"])
+
+        with self.assertRaises(ValueError):
+            run_batch(self.command_module, options, io.StringIO())
+
+
+class TestBatchJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.directory.name, "records.journal")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self):
+        with open(self.path, "r", encoding="utf-8") as file:
+            return file.read()
+
+    def test_groups(self):
+        output = io.StringIO()
+
+        with BatchJournal(self.path, output_stream=output, group_size=3, group_interval=3600) as journal:
+            journal.append(0, b"add 1\n", "a")
+            journal.append(6, b"add 2\n", "b")
+            self.assertEqual(JOURNAL_HEADER, self.read())
+            journal.append(12, b"add 3\n", "c")
+            self.assertEqual(3, len(load_journal(self.path)))
+            journal.append(18, b"add 4\n", "d")
+            self.assertEqual(3, len(load_journal(self.path)))
+
+        self.assertEqual(4, len(load_journal(self.path)))
+
+    def test_interval(self):
+        with BatchJournal(self.path, group_size=1000, group_interval=0) as journal:
+            journal.append(0, b"add 1\n", "a")
+            self.assertEqual({0: (record_checksum(b"add 1"), "a")}, load_journal(self.path))
+
+    def test_torn_entry(self):
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write(JOURNAL_HEADER + f"0 {record_checksum(b'add 1')} a\n6 0000")
+
+        with BatchJournal(self.path, resume=True) as journal:
+            self.assertTrue(journal.is_completed(0, b"add 1\n"))
+            self.assertFalse(journal.is_completed(6, b"add 2\n"))
+            journal.append(6, b"add 2\n", "b")
+
+        self.assertEqual({0, 6}, set(load_journal(self.path).keys()))
+
+    def test_other_format(self):
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write("something else\n0 00000000 a\n")
+
+        self.assertEqual(dict(), load_journal(self.path))
+
+    def test_missing(self):
+        self.assertEqual(dict(), load_journal(self.path))
+
+    @given(st.integers(max_value=0))
+    def test_invalid_group_size(self, num):
+        with self.assertRaises(ValueError):
+            BatchJournal(self.path, group_size=num)
+
+    def test_invalid_path(self):
+        with self.assertRaises(TypeError):
+            BatchJournal(None)  # type: ignore
+
+
+class TestReadRecords(unittest.TestCase):
+    def test_records(self):
+        data = b"add 1\n\n  # comment\nshout 'a b' # trailing\nadd 2"
+        self.assertEqual([(0, ["add", "1"]), (19, ["shout", "a b"]), (42, ["add", "2"])],
+                         [(offset, parse_record(line)) for (offset, line) in read_records(io.BytesIO(data))])
+
+    @given(st.lists(st.text(alphabet="abc xyz", min_size=1).filter(str.strip)))
+    def test_offsets(self, lines):
+        data = "".join(f"{line}\n" for line in lines).encode("utf-8")
+
+        for (offset, line) in read_records(io.BytesIO(data)):
+            self.assertEqual(line, data[offset:offset + len(line)])
+
+
+if __name__ == "__main__":
+    unittest.main()
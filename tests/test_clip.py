@@ -5,7 +5,10 @@
 Tests for clip.py
 """
 
+import io
+import json
 import unittest
+from contextlib import redirect_stdout
 from hypothesis import given
 import hypothesis.strategies as st
 
@@ -32,6 +35,27 @@ class TestClip(unittest.TestCase):
 
         self.assertFalse(is_clippy_command(not_clippy_function))
 
+    def test_split_settings(self):
+        @clippy(split="lines", reduce=max)
+        def split_function(data):
+            return data
+
+        self.assertEqual({"cache": False, "ttl": None, "split": "lines", "reduce": max}, getattr(split_function, "clippy_settings"))
+
+    @given(st.text().filter(lambda x: x != "lines"))
+    def test_invalid_split(self, text):
+        with self.assertRaises(ValueError):
+            clippy(lambda data: data, split=text)
+
+    @given(st.integers())
+    def test_invalid_reduce(self, num):
+        with self.assertRaises(TypeError):
+            clippy(lambda data: data, split="lines", reduce=num)
+
+    def test_split_requires_reduce(self):
+        with self.assertRaises(ValueError):
+            clippy(lambda data: data, split="lines")
+
     def test_begin_no_arguments(self):
         with self.assertRaises(SystemExit) as err:
             begin_clippy()
@@ -81,6 +105,28 @@ class TestClip(unittest.TestCase):
     def test_call_function(self, text):
         begin_clippy(["test_clip", "top_level_function", text])
 
+    def test_call_function_json(self):
+        with redirect_stdout(io.StringIO()) as output:
+            begin_clippy(["test_clip", "top_level_function", "--clippy-format=json", "text"])
+
+        self.assertEqual("top_level_function: text", json.loads(output.getvalue()))
+
+    def test_call_function_invalid_format(self):
+        with redirect_stdout(io.StringIO()) as output:
+            with self.assertRaises(SystemExit) as err:
+                begin_clippy(["test_clip", "top_level_function", "--clippy-format=bogus", "text"])
+
+        self.assertEqual(1, err.exception.code)
+        self.assertIn("Unrecognized output format bogus", output.getvalue())
+
+    def test_call_function_invalid_jobs(self):
+        with redirect_stdout(io.StringIO()) as output:
+            with self.assertRaises(SystemExit) as err:
+                begin_clippy(["test_clip", "top_level_function", "--clippy-jobs", "0", "text"])
+
+        self.assertEqual(1, err.exception.code)
+        self.assertIn("Option --clippy-jobs must be a positive integer, received 0", output.getvalue())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for command_input.py
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import mmap
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from typing import BinaryIO, TextIO
+from hypothesis import given, settings
+import hypothesis.strategies as st
+
+from clippy import clippy
+from clippy.command_input import detect_compression, is_input_annotation, map_stream, open_input_stream, peek_prefix, read_input_argument, \
+    read_into_buffer, ReadaheadReader
+from clippy.dispatch import dispatch
+
+COMPRESSORS = {"gzip": gzip.compress, "bz2": bz2.compress, "lzma": lzma.compress}
+
+STREAMS = list()
+
+
+@clippy
+def view_length(data: memoryview, scale: int = 1):
+    return len(data) * scale
+
+
+@clippy
+def first_bytes(data: bytes, count: int = 2):
+    return data[:count]
+
+
+@clippy
+def stream_length(data: BinaryIO):
+    STREAMS.append(data)
+    return len(data.read())
+
+
+@clippy
+def line_count(data: TextIO):
+    STREAMS.append(data)
+    return sum(1 for _ in data)
+
+
+@clippy
+def stripped_lines(data: TextIO):
+    STREAMS.append(data)
+    return (line.strip() for line in data)
+
+
+@clippy
+def fail_reading(data: BinaryIO):
+    STREAMS.append(data)
+    raise RuntimeError("failed on purpose")
+
+
+class TestCommandInput(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "data.bin")
+
+        with open(self.path, "wb") as file:
+            file.write(bytes(range(256)) * 64)
+
+        self.stdin = sys.stdin
+        STREAMS.clear()
+
+    def tearDown(self):
+        sys.stdin = self.stdin
+        self.directory.cleanup()
+
+    def set_stdin(self, data):
+        sys.stdin = io.TextIOWrapper(io.BytesIO(data))
+
+    def test_is_input_annotation(self):
+        self.assertTrue(is_input_annotation(bytes))
+        self.assertTrue(is_input_annotation(memoryview))
+        self.assertTrue(is_input_annotation(BinaryIO))
+        self.assertTrue(is_input_annotation(TextIO))
+        self.assertFalse(is_input_annotation(str))
+        self.assertFalse(is_input_annotation(None))
+
+    def test_bytes_from_file(self):
+        self.assertEqual(bytes(range(256)) * 64, read_input_argument(bytes, self.path))
+
+    def test_memoryview_maps_file(self):
+        view = read_input_argument(memoryview, self.path)
+        self.assertIsInstance(view.obj, mmap.mmap)
+        self.assertEqual(bytes(range(256)) * 64, view.tobytes())
+
+    def test_memoryview_maps_from_offset(self):
+        with open(self.path, "rb") as file:
+            file.read(10)
+            self.assertEqual(256 * 64 - 10, len(map_stream(file)))
+
+    def test_memoryview_from_pipe(self):
+        read_end, write_end = os.pipe()
+        data = os.urandom(300000)
+
+        def write():
+            with os.fdopen(write_end, "wb") as writer:
+                writer.write(data)
+
+        thread = threading.Thread(target=write)
+        thread.start()
+
+        with os.fdopen(read_end, "rb") as reader:
+            view = read_input_argument(memoryview, "-", reader)
+
+        thread.join()
+        self.assertIsInstance(view.obj, bytearray)
+        self.assertEqual(data, view.tobytes())
+
+    def test_stream(self):
+        stream = read_input_argument(BinaryIO, self.path)
+        self.assertFalse(stream.closed)
+        self.assertEqual(256 * 64, len(stream.read()))
+        stream.close()
+
+    @given(st.binary(), st.integers(min_value=1, max_value=64))
+    def test_read_into_buffer(self, data, size):
+        self.assertEqual(data, read_into_buffer(io.BytesIO(data), size).tobytes())
+
+    @given(st.integers(max_value=0))
+    def test_read_into_buffer_size(self, size):
+        with self.assertRaises(ValueError):
+            read_into_buffer(io.BytesIO(b""), size)
+
+    def test_invalid_annotation(self):
+        with self.assertRaises(ValueError):
+            read_input_argument(str, self.path)
+
+    def test_missing_argument_reads_stdin(self):
+        self.set_stdin(b"abcdef")
+        self.assertEqual(6, dispatch(sys.modules[__name__], ["view_length"]).value)
+
+    def test_dash_reads_stdin(self):
+        self.set_stdin(b"abcdef")
+        self.assertEqual(b"abc", dispatch(sys.modules[__name__], ["first_bytes", "-", "--count", "3"]).value)
+
+    def test_options_with_stdin(self):
+        self.set_stdin(b"abcdef")
+        self.assertEqual(12, dispatch(sys.modules[__name__], ["view_length", "--scale", "2"]).value)
+
+    def test_path_argument(self):
+        self.assertEqual(256 * 64, dispatch(sys.modules[__name__], ["stream_length", self.path]).value)
+
+    def write(self, name, data):
+        path = os.path.join(self.directory.name, name)
+
+        with open(path, "wb") as file:
+            file.write(data)
+
+        return path
+
+    def test_detect_compression(self):
+        for (name, compress) in COMPRESSORS.items():
+            self.assertEqual(name, detect_compression(compress(b"data")))
+
+        self.assertIsNone(detect_compression(b"plain text"))
+        self.assertIsNone(detect_compression(b""))
+
+    # the first call imports each decompressor, which can exceed the default deadline
+    @settings(deadline=None)
+    @given(st.binary(max_size=10000))
+    def test_decompress_paths(self, data):
+        for (name, compress) in COMPRESSORS.items():
+            with open_input_stream(self.write(name, compress(data))) as stream:
+                self.assertEqual(data, stream.read())
+
+    # the first call imports each decompressor, which can exceed the default deadline
+    @settings(deadline=None)
+    @given(st.binary(max_size=10000).filter(lambda x: detect_compression(x) is None))
+    def test_decompress_stdin(self, data):
+        for compress in COMPRESSORS.values():
+            self.assertEqual(data, open_input_stream("-", stdin=io.BytesIO(compress(data))).read())
+
+        self.assertEqual(data, open_input_stream("-", stdin=io.BytesIO(data)).read())
+
+    def test_decompress_text(self):
+        path = self.write("lines.gz", gzip.compress(b"one\ntwo\nthree\n"))
+        self.assertEqual(3, dispatch(sys.modules[__name__], ["line_count", path]).value)
+
+        self.set_stdin(bz2.compress(b"one\ntwo\n"))
+        self.assertEqual(2, dispatch(sys.modules[__name__], ["line_count"]).value)
+
+    def test_plain_text(self):
+        self.assertEqual(2, dispatch(sys.modules[__name__], ["line_count", self.write("lines.txt", b"one\ntwo\n")]).value)
+
+    def test_streams_closed(self):
+        self.assertEqual(256 * 64, dispatch(sys.modules[__name__], ["stream_length", self.path]).value)
+        self.assertTrue(STREAMS[0].closed)
+
+    def test_streams_closed_after_iterator(self):
+        value = dispatch(sys.modules[__name__], ["stripped_lines", self.write("lines.txt", "one\ntwo\u00e9\n".encode("utf-8"))]).value
+        self.assertFalse(STREAMS[0].closed)
+        self.assertEqual(["one", "two\u00e9"], list(value))
+        self.assertTrue(STREAMS[0].closed)
+
+    def test_streams_closed_on_error(self):
+        with self.assertRaises(RuntimeError):
+            dispatch(sys.modules[__name__], ["fail_reading", self.path])
+
+        self.assertTrue(STREAMS[0].closed)
+
+    def test_stdin_not_closed(self):
+        self.set_stdin(b"one\ntwo\n")
+        self.assertEqual(2, dispatch(sys.modules[__name__], ["line_count"]).value)
+        self.assertFalse(sys.stdin.closed)
+
+    def fifo(self, data):
+        path = os.path.join(self.directory.name, "fifo")
+        os.mkfifo(path)
+
+        def write():
+            with open(path, "wb") as file:
+                file.write(data)
+
+        thread = threading.Thread(target=write)
+        thread.start()
+        return path, thread
+
+    @unittest.skipUnless(hasattr(os, "mkfifo"), "named pipes are not available")
+    def test_fifo_read_once(self):
+        for data in [bytes(1000), b"\x1f", gzip.compress(b"one\ntwo\n")]:
+            path, thread = self.fifo(data)
+
+            with open_input_stream(path) as stream:
+                self.assertEqual(gzip.decompress(data) if detect_compression(data) else data, stream.read())
+
+            thread.join()
+            os.remove(path)
+
+    @unittest.skipUnless(hasattr(os, "mkfifo"), "named pipes are not available")
+    def test_fifo_dispatch(self):
+        path, thread = self.fifo(bytes(1000))
+        self.assertEqual(1000, dispatch(sys.modules[__name__], ["stream_length", path]).value)
+        thread.join()
+        self.assertTrue(STREAMS[0].closed)
+
+    def test_compressed_file_closed(self):
+        stream = open_input_stream(self.write("data.gz", gzip.compress(b"data")), text=True)
+        self.assertEqual("data", stream.read())
+        stream.close()
+        self.assertTrue(stream.buffer.raw._file.closed)  # pylint: disable=protected-access
+
+    def test_stdin_left_open(self):
+        stdin = io.BytesIO(gzip.compress(b"data"))
+        open_input_stream("-", stdin=stdin).close()
+        self.assertFalse(stdin.closed)
+
+    def test_peek_prefix(self):
+        stream = io.BufferedReader(io.BytesIO(b"\x1f\x8b rest"))
+        prefix, result = peek_prefix(stream, 6)
+        self.assertEqual(b"\x1f\x8b res", prefix)
+        self.assertIs(stream, result)
+        self.assertEqual(b"\x1f\x8b rest", result.read())
+
+    def test_peek_prefix_without_peek(self):
+        prefix, result = peek_prefix(io.BytesIO(b"abcdefgh"), 6)
+        self.assertEqual(b"abcdef", prefix)
+        self.assertEqual(b"abcdefgh", result.read())
+
+    def test_readahead(self):
+        data = os.urandom(100000)
+        os.environ["CLIPPY_READAHEAD"] = "2"
+
+        try:
+            with open_input_stream(self.write("data.xz", lzma.compress(data))) as stream:
+                self.assertEqual(data, stream.read())
+        finally:
+            del os.environ["CLIPPY_READAHEAD"]
+
+    @given(st.binary(max_size=5000), st.integers(min_value=1, max_value=100), st.integers(min_value=1, max_value=4))
+    def test_readahead_reader(self, data, chunk_size, chunks):
+        reader = io.BufferedReader(ReadaheadReader(io.BytesIO(data), chunks, chunk_size))
+        self.assertEqual(data, reader.read())
+        reader.close()
+
+    def test_readahead_reader_error(self):
+        reader = io.BufferedReader(ReadaheadReader(gzip.GzipFile(fileobj=io.BytesIO(b"\x1f\x8b not gzip")), 2))
+
+        with self.assertRaises(OSError):
+            reader.read()
+
+    def test_help_does_not_read(self):
+        sys.stdin = None
+        self.assertEqual(0, dispatch(sys.modules[__name__], ["view_length", "--help"]).status)
+
+
+if __name__ == "__main__":
+    unittest.main()
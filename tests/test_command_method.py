@@ -16,6 +16,9 @@ from hypothesis import given
 import hypothesis.strategies as st
 
 from clippy.command_method import create_command_method, CommandMethod
+from clippy.command_param import CommandParam
+from clippy.common import function_parameters
+from clippy.prefix_index import AmbiguousPrefixError
 from clippy.command_return import CommandReturn
 
 
@@ -39,6 +42,14 @@ def test_only_typed_optional(arg1: int = 0):
     return f"test_only_typed_optional: {arg1}"
 
 
+def test_keyword_only(arg, *, flag: bool = False, count: int):
+    return f"test_keyword_only: {arg} {flag} {count}"
+
+
+def test_var_args(first, *rest: int, scale: int = 1, **options: float):
+    return first, [val * scale for val in rest], options
+
+
 def test_function_docs(arg):
     """
     A function to test docs.
@@ -147,6 +158,26 @@ class TestCommandMethod(unittest.TestCase):
                                                module=module)
         self.assertEqual({"arg1": "test"}, command_method.parse_arguments(["test"]))
 
+    def test_parse_abbreviated_args(self):
+        definition, module = get_definition("test_method")
+        command_method = create_command_method(function_definition=definition,
+                                               module=module)
+        self.assertEqual({"help": "True"}, command_method.parse_arguments(["--he"]))
+
+        with self.assertRaises(AmbiguousPrefixError):
+            command_method.parse_arguments(["--ar=b"])
+
+        definition, module = get_definition("test_keyword_only")
+        command_method = create_command_method(function_definition=definition,
+                                               module=module)
+        self.assertEqual({"arg": "a", "count": 2, "flag": True}, command_method.parse_arguments(["a", "--co=2", "--fl"]))
+
+    def test_parse_abbreviated_args_kwargs(self):
+        definition, module = get_definition("test_var_args")
+        command_method = create_command_method(function_definition=definition,
+                                               module=module)
+        self.assertEqual({"first": "a", "sc": 2.0}, command_method.parse_arguments(["a", "--sc=2"]))
+
     def test_validate_args(self):
         definition, module = get_definition("test_method")
         command_method = create_command_method(function_definition=definition,
@@ -213,6 +244,88 @@ class TestCommandMethod(unittest.TestCase):
                                                module=module)
         self.assertEqual({"arg1": 12}, command_method.parse_arguments(["--arg1", "12"]))
 
+    def test_bind_args(self):
+        definition, module = get_definition("test_only_typed_optional")
+        command_method = create_command_method(function_definition=definition,
+                                               module=module)
+        self.assertEqual({"arg1": 12}, command_method.bind_arguments({"arg1": "12"}))
+        self.assertEqual({"arg1": 13}, command_method.bind_arguments({"arg1": 13}))
+
+    @given(st.sampled_from(["false", "False", "0", "no", "off"]))
+    def test_bind_false(self, value):
+        definition, module = get_definition("test_only_optional")
+        command_method = create_command_method(function_definition=definition,
+                                               module=module)
+        self.assertEqual({"arg1": False}, command_method.bind_arguments({"arg1": value}))
+        self.assertEqual({"arg1": True}, command_method.bind_arguments({"arg1": ""}))
+
+    def test_bind_unknown(self):
+        definition, module = get_definition("test_method")
+        command_method = create_command_method(function_definition=definition,
+                                               module=module)
+
+        def invalid():
+            command_method.bind_arguments({"arg3": "test"})
+
+        self.assertRaises(ValueError, invalid)
+
+    def test_keyword_only_parse(self):
+        definition, module = get_definition("test_keyword_only")
+        command_method = create_command_method(function_definition=definition,
+                                               module=module)
+        arguments = command_method.parse_arguments(["a", "--count", "2", "--flag"])
+        self.assertEqual({"arg": "a", "count": 2, "flag": True}, arguments)
+        self.assertEqual("test_keyword_only: a True 2", command_method.call(arguments))
+
+    def test_keyword_only_not_positional(self):
+        definition, module = get_definition("test_keyword_only")
+        command_method = create_command_method(function_definition=definition,
+                                               module=module)
+        self.assertRaises(ValueError, lambda: command_method.parse_arguments(["a", "2"]))
+
+    def test_keyword_only_required(self):
+        definition, module = get_definition("test_keyword_only")
+        command_method = create_command_method(function_definition=definition,
+                                               module=module)
+        self.assertEqual(["arg", "count"], [param.name for param in command_method.required_params])
+        self.assertEqual("<arg> [--flag] --count=<int>", command_method.short_params)
+        self.assertRaises(ValueError, lambda: command_method.validate_arguments({"arg": "a"}))
+
+    def test_var_args(self):
+        definition, module = get_definition("test_var_args")
+        command_method = create_command_method(function_definition=definition,
+                                               module=module)
+        arguments = command_method.parse_arguments(["a", "1", "2", "--scale", "3", "--ratio", "0.5"])
+        self.assertEqual({"first": "a", "rest": [1, 2], "scale": 3, "ratio": 0.5}, arguments)
+        self.assertEqual(("a", [3, 6], {"ratio": 0.5}), command_method.call(arguments))
+
+    def test_var_args_empty(self):
+        definition, module = get_definition("test_var_args")
+        command_method = create_command_method(function_definition=definition,
+                                               module=module)
+        self.assertEqual(("a", [], {}), command_method.call(command_method.parse_arguments(["a"])))
+        self.assertEqual("<first> [<rest>...] [--scale=<int>] [--<name>=<value>...]", command_method.short_params)
+        self.assertEqual(["first"], [param.name for param in command_method.required_params])
+
+    def test_var_args_bind(self):
+        definition, module = get_definition("test_var_args")
+        command_method = create_command_method(function_definition=definition,
+                                               module=module)
+        arguments = command_method.bind_arguments({"first": "a", "rest": ["1", 2], "other": "1.5"})
+        self.assertEqual({"first": "a", "rest": [1, 2], "other": 1.5}, arguments)
+        self.assertRaises(ValueError, lambda: command_method.bind_arguments({"rest": "1"}))
+
+    @unittest.skipUnless(sys.version_info >= (3, 8), "positional-only parameters require Python 3.8")
+    def test_positional_only(self):
+        namespace = dict()
+        exec("def positional_only(first, second: int = 2, /, third=3):\n    return first, second, third", namespace)  # pylint: disable=exec-used
+        command_method = CommandMethod(namespace["positional_only"], parameters=[
+            CommandParam(param.name, idx, annotation=param.annotation, default_args={param.name: param.default} if param.has_default else None,
+                         kind=param.kind)
+            for (idx, param) in enumerate(function_parameters(namespace["positional_only"]))])
+        self.assertEqual(("a", 5, 3), command_method.call(command_method.parse_arguments(["a", "5"])))
+        self.assertEqual(("a", 2, "4"), command_method.call(command_method.parse_arguments(["a", "--third", "4"])))
+
     def test_out_of_bounds(self):
         definition, module = get_definition("test_method")
         command_method = create_command_method(function_definition=definition,
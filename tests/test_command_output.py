@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for command_output.py
+"""
+
+import array
+import io
+import json
+import unittest
+from collections import namedtuple
+from hypothesis import given
+import hypothesis.strategies as st
+
+from clippy.command_output import write_output, default_format, is_array, FORMATS
+from clippy.command_return import CommandReturn
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+Point = namedtuple("Point", ["x", "y"])
+
+
+def render(value, output_format):
+    stream = io.StringIO()
+    write_output(value, output_format, stream)
+    return stream.getvalue()
+
+
+def render_bytes(value, output_format):
+    stream = io.BytesIO()
+    write_output(value, output_format, stream)  # type: ignore
+    return stream.getvalue()
+
+
+def records(count):
+    for idx in range(count):
+        yield {"index": idx, "name": f"record {idx}"}
+
+
+class TestCommandOutput(unittest.TestCase):
+    def test_text(self):
+        self.assertEqual("{'a': 1}\n", render({"a": 1}, "text"))
+        self.assertEqual("Done.\n", render(None, "text"))
+
+    def test_json(self):
+        self.assertEqual({"a": [1, 2]}, json.loads(render({"a": [1, 2]}, "json")))
+        self.assertEqual("null\n", render(None, "json"))
+
+    def test_json_generator(self):
+        self.assertEqual(list(records(3000)), json.loads(render(records(3000), "json")))
+        self.assertEqual([], json.loads(render(records(0), "json")))
+
+    def test_jsonl(self):
+        lines = render(records(3000), "jsonl").splitlines()
+        self.assertEqual(3000, len(lines))
+        self.assertEqual({"index": 2999, "name": "record 2999"}, json.loads(lines[-1]))
+
+    def test_jsonl_single(self):
+        self.assertEqual('{"a": 1}\n', render({"a": 1}, "jsonl"))
+        self.assertEqual("", render(None, "jsonl"))
+
+    def test_csv_dicts(self):
+        self.assertEqual("index,name\n0,record 0\n1,record 1\n", render(records(2), "csv"))
+
+    def test_csv_rows(self):
+        self.assertEqual("1,2\n3,4\n", render([Point(1, 2), Point(3, 4)], "csv"))
+        self.assertEqual("a\n", render("a", "csv"))
+
+    def test_unserializable(self):
+        self.assertEqual([1, 2], sorted(json.loads(render({1, 2}, "json"))))
+        self.assertEqual('"<object>"\n', render(type("Opaque", (), {"__str__": lambda self: "<object>"})(), "json"))
+
+    @given(st.text(alphabet="abcdefghijklmnopqrstuvwxyz").filter(lambda x: x not in FORMATS))
+    def test_unrecognized(self, output_format):
+        with self.assertRaises(ValueError):
+            _ = render(None, output_format)
+
+    def test_default_format(self):
+        self.assertEqual("json", default_format(CommandReturn(annotation=dict)))
+        self.assertEqual("text", default_format(CommandReturn(annotation=str)))
+        self.assertEqual("text", default_format(CommandReturn()))
+        self.assertEqual("text", default_format(None))
+
+    @given(st.binary())
+    def test_raw_bytes(self, data):
+        self.assertEqual(data, render_bytes(data, "raw"))
+        self.assertEqual(data, render_bytes(bytearray(data), "raw"))
+
+    @given(st.lists(st.integers(min_value=-2 ** 31, max_value=2 ** 31 - 1)))
+    def test_raw_buffer(self, values):
+        data = array.array("i", values)
+        self.assertEqual(data.tobytes(), render_bytes(data, "raw"))
+        self.assertEqual(data.tobytes()[::2], render_bytes(memoryview(data.tobytes())[::2], "raw"))
+
+    def test_raw_text_stream(self):
+        stream = io.TextIOWrapper(io.BytesIO())
+        stream.write("text ")
+        write_output(b"bytes", "raw", stream)
+        self.assertEqual(b"text bytes", stream.buffer.getvalue())
+
+    @given(st.one_of(st.text(), st.integers(), st.none()))
+    def test_raw_invalid(self, value):
+        with self.assertRaises(ValueError):
+            render_bytes(value, "raw")
+
+    def test_is_array(self):
+        self.assertFalse(is_array([1, 2]))
+        self.assertFalse(is_array(b"data"))
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestCommandOutputArrays(unittest.TestCase):
+    def arrays(self):
+        values = numpy.arange(60, dtype=numpy.float64).reshape(3, 4, 5) / 7
+        return [values, numpy.asfortranarray(values), values[:, ::2, 1:], values[0, 0], numpy.zeros((2, 0)), numpy.array(3.5),
+                numpy.arange(10, dtype=numpy.uint8), numpy.zeros(3, dtype=[("a", "i4"), ("b", "f8")])]
+
+    def test_npy(self):
+        for values in self.arrays():
+            loaded = numpy.load(io.BytesIO(render_bytes(values, "npy")))
+            self.assertEqual(values.dtype, loaded.dtype)
+            self.assertTrue(numpy.array_equal(values, loaded))
+
+    def test_npy_list(self):
+        self.assertTrue(numpy.array_equal([[1, 2], [3, 4]], numpy.load(io.BytesIO(render_bytes([[1, 2], [3, 4]], "npy")))))
+
+    def test_npy_objects(self):
+        with self.assertRaises(ValueError):
+            render_bytes(numpy.array([object()]), "npy")
+
+    def test_raw(self):
+        for values in self.arrays():
+            self.assertEqual(values.tobytes(), render_bytes(values, "raw"))
+
+    def test_text(self):
+        self.assertEqual("0.1 2.0\n3.0 4.0\n", render(numpy.array([[0.1, 2], [3, 4]]), "text"))
+        self.assertEqual("".join(f"{idx}\n" for idx in range(5000)), render(numpy.arange(5000), "text"))
+
+    def test_csv(self):
+        self.assertEqual("0,1,2\n3,4,5\n6,7,8\n9,10,11\n", render(numpy.arange(12).reshape(2, 2, 3), "csv"))
+        self.assertEqual("1.5\n", render(numpy.array(1.5), "csv"))
+
+    def test_json(self):
+        self.assertEqual([[0, 1], [2, 3]], json.loads(render(numpy.arange(4).reshape(2, 2), "json")))
+        self.assertEqual({"total": 6}, json.loads(render({"total": numpy.int64(6)}, "json")))
+        self.assertEqual("[0, 1]\n[2, 3]\n", render(numpy.arange(4).reshape(2, 2), "jsonl"))
+
+    def test_is_array(self):
+        self.assertTrue(is_array(numpy.arange(3)))
+        self.assertFalse(is_array(numpy.int64(3)))
+
+    def test_default_format(self):
+        self.assertEqual("npy", default_format(CommandReturn(annotation=numpy.ndarray)))
+
+
+if __name__ == "__main__":
+    unittest.main()
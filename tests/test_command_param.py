@@ -13,6 +13,10 @@ import hypothesis.strategies as st
 from clippy.command_param import CommandParam
 
 
+def sample_function(value: "int"):
+    return value
+
+
 class TestCommandParam(unittest.TestCase):
     @given(st.text().filter(lambda x: x))
     def test_create(self, text):
@@ -102,6 +106,32 @@ class TestCommandParam(unittest.TestCase):
 
         self.assertRaises(TypeError, create_invalid)
 
+    @given(st.text().filter(lambda x: x), st.integers())
+    def test_string_annotation(self, nam, idx):
+        command_param = CommandParam(name=nam,
+                                     index=idx,
+                                     annotation="int",
+                                     function=sample_function)
+        self.assertEqual("int", command_param.annotation_name)
+        self.assertEqual(int, command_param.annotation)
+
+    @given(st.text().filter(lambda x: x), st.integers())
+    def test_string_annotation_without_function(self, nam, idx):
+        command_param = CommandParam(name=nam,
+                                     index=idx,
+                                     annotation="int")
+        self.assertEqual("int", command_param.annotation)
+
+    @given(st.text().filter(lambda x: x), st.integers())
+    def test_unresolved_annotation(self, nam, idx):
+        command_param = CommandParam(name=nam,
+                                     index=idx,
+                                     annotation="Missing",
+                                     function=sample_function)
+
+        with self.assertRaises(ValueError):
+            _ = command_param.annotation
+
     @given(st.text().filter(lambda x: x), st.integers())
     def test_annotation_name(self, nam, idx):
         command_param = CommandParam(name=nam,
@@ -6,6 +6,7 @@ Tests for command_return.py
 """
 
 import unittest
+from typing import List
 
 from hypothesis import given
 import hypothesis.strategies as st
@@ -15,6 +16,10 @@ from clippy.command_return import CommandReturn
 from tests.test_command_method import any_type
 
 
+def sample_function() -> List[int]:
+    return list()
+
+
 class TestCommandReturn(unittest.TestCase):
     def test_create_empty(self):
         command_return = CommandReturn()
@@ -41,6 +46,18 @@ class TestCommandReturn(unittest.TestCase):
         self.assertEqual("No documentation provided.", command_return.documentation)
         self.assertEqual(str, command_return.annotation)
 
+    def test_create_with_string_annotation(self):
+        command_return = CommandReturn(annotation="dict", function=sample_function)
+        self.assertEqual(dict, command_return.annotation)
+
+    def test_create_with_string_generic(self):
+        command_return = CommandReturn(annotation="List[int]", function=sample_function)
+        self.assertIsNone(command_return.annotation)
+
+    def test_create_string_without_function(self):
+        with self.assertRaises(ValueError):
+            CommandReturn(annotation="dict")
+
     @given(st.integers())
     def test_create_invalid_documentation(self, idx):
         def create_invalid():
@@ -5,16 +5,22 @@
 Tests for common.py
 """
 
+import functools
+import gc
 import os
 import inspect
+import sys
 import unittest
+import weakref
+from typing import List
 
 from hypothesis import given
 import hypothesis.strategies as st
 
 from clippy import clippy
 from clippy.common import string_remove, is_clippy_command, right_pad, function_docs_from_string, read_param_pair, parse_ast, get_parent_stack_frame, \
-    get_module_impl, remove_optional_prefix
+    get_module_impl, remove_optional_prefix, scan_clippy_blocks, scan_function_definitions, top_level_functions, function_parameters, \
+    get_default_args, resolve_annotation, ParameterInfo, POSITIONAL_OR_KEYWORD, VAR_POSITIONAL, KEYWORD_ONLY, VAR_KEYWORD
 
 
 def not_clippy_method(arg):
@@ -26,6 +32,23 @@ def clippy_method(arg):
     print(arg)
 
 
+def every_kind(first, second: int = 2, *rest: str, flag: bool = False, required, **options) -> str:
+    return f"{first} {second} {rest} {flag} {required} {options}"
+
+
+class ParameterClass:
+    def __init__(self, name, documentation=None):
+        self.name = name
+        self.documentation = documentation
+
+
+def make_closure(default):
+    def closure(value=default):
+        return value
+
+    return closure
+
+
 class TestCommon(unittest.TestCase):
     @given(st.text().filter(lambda x: x))
     def test_string_remove(self, text):
@@ -235,6 +258,106 @@ class TestCommon(unittest.TestCase):
 
         self.assertRaises(ValueError, invalid)
 
+    def test_scan_clippy_blocks(self):
+        source = "import os\n\n@clippy\ndef first(arg):\n    return arg\n\n# comment\nX = 1\n\n@other\n@clippy.clippy\ndef second():\n    pass\n"
+        blocks = scan_clippy_blocks(source)
+        self.assertEqual([3, 11], [lineno for (lineno, _) in blocks])
+        self.assertEqual("@clippy\ndef first(arg):\n    return arg\n\n# comment\n", blocks[0][1])
+        self.assertEqual("@clippy.clippy\ndef second():\n    pass\n", blocks[1][1])
+
+    def test_scan_clippy_blocks_ambiguous(self):
+        self.assertIsNone(scan_clippy_blocks("@clippy(\n    cache=True\n)\ndef first(arg):\n    return arg\n"))
+        self.assertIsNone(scan_clippy_blocks("@clippy\nclass First:\n    pass\n"))
+
+    def test_scan_function_definitions(self):
+        import tests.test_common as this_module
+        definitions = scan_function_definitions(__file__, this_module)
+        self.assertEqual(["clippy_method"], [definition.name for definition in definitions])
+
+        expected = [func for func in top_level_functions(parse_ast(__file__).body) if func.name == "clippy_method"][0]
+        self.assertEqual(expected.lineno, definitions[0].lineno)
+
+    def test_function_parameters(self):
+        self.assertEqual((ParameterInfo("first", POSITIONAL_OR_KEYWORD, False, None, None),
+                          ParameterInfo("second", POSITIONAL_OR_KEYWORD, True, 2, int),
+                          ParameterInfo("rest", VAR_POSITIONAL, False, None, str),
+                          ParameterInfo("flag", KEYWORD_ONLY, True, False, bool),
+                          ParameterInfo("required", KEYWORD_ONLY, False, None, None),
+                          ParameterInfo("options", VAR_KEYWORD, False, None, None)), function_parameters(every_kind))
+
+    def test_function_parameters_match_inspect(self):
+        for func in [every_kind, clippy_method, not_clippy_method, string_remove, read_param_pair, make_closure(1)]:
+            expected = [(param.name, param.kind.name.lower(), param.default is not inspect.Parameter.empty)
+                        for param in inspect.signature(func).parameters.values()]
+            self.assertEqual(expected, [(param.name, param.kind, param.has_default) for param in function_parameters(func)])
+
+    def test_function_parameters_cached(self):
+        self.assertIs(function_parameters(every_kind), function_parameters(every_kind))
+
+    @given(st.integers(), st.integers())
+    def test_function_parameters_closures(self, first, second):
+        self.assertEqual(first, function_parameters(make_closure(first))[0].default)
+        self.assertEqual(second, function_parameters(make_closure(second))[0].default)
+
+    def test_function_parameters_released(self):
+        namespace = dict()
+        exec("def generated(first, second=2): pass", namespace)  # pylint: disable=exec-used
+        function_parameters(namespace["generated"])
+        reference = weakref.ref(namespace["generated"].__code__)
+        namespace.clear()
+        gc.collect()
+        self.assertIsNone(reference())
+
+    @unittest.skipUnless(sys.version_info >= (3, 8), "positional-only parameters require Python 3.8")
+    def test_function_parameters_positional_only(self):
+        namespace = dict()
+        exec("def positional_only(first, second=2, /, third=3, *, fourth): pass", namespace)  # pylint: disable=exec-used
+        self.assertEqual([("first", "positional_only"), ("second", "positional_only"), ("third", "positional_or_keyword"), ("fourth", "keyword_only")],
+                         [(param.name, param.kind) for param in function_parameters(namespace["positional_only"])])
+
+    def test_function_parameters_wrapped(self):
+        @functools.wraps(every_kind)
+        def wrapper(*args, **kwargs):
+            return every_kind(*args, **kwargs)
+
+        self.assertEqual(function_parameters(every_kind), function_parameters(wrapper))
+
+    def test_function_parameters_class(self):
+        self.assertEqual(["name", "documentation"], [param.name for param in function_parameters(ParameterClass)])
+
+    def test_resolve_annotation(self):
+        self.assertIs(int, resolve_annotation(every_kind, int))
+        self.assertIsNone(resolve_annotation(every_kind, None))
+        self.assertIs(ParameterClass, resolve_annotation(every_kind, "ParameterClass"))
+        self.assertEqual(List[int], resolve_annotation(every_kind, "List[int]"))
+
+    def test_resolve_annotation_cached(self):
+        self.assertIs(resolve_annotation(every_kind, "List[str]"), resolve_annotation(every_kind, "List[str]"))
+
+    def test_resolve_annotation_released(self):
+        namespace = dict()
+        exec("def generated(first: 'int'): pass", namespace)  # pylint: disable=exec-used
+        self.assertIs(int, resolve_annotation(namespace["generated"], "int"))
+        reference = weakref.ref(namespace["generated"])
+        namespace.clear()
+        gc.collect()
+        self.assertIsNone(reference())
+
+    def test_resolve_annotation_wrapped(self):
+        @functools.wraps(every_kind)
+        def wrapper(*args, **kwargs):
+            return every_kind(*args, **kwargs)
+
+        self.assertIs(ParameterClass, resolve_annotation(wrapper, "ParameterClass"))
+
+    @given(st.sampled_from(["Missing", "int(", "1 / 0"]))
+    def test_resolve_annotation_invalid(self, annotation):
+        with self.assertRaises(ValueError):
+            resolve_annotation(every_kind, annotation)
+
+    def test_default_args(self):
+        self.assertEqual({"second": 2, "flag": False}, get_default_args(every_kind))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for dispatch.py
+"""
+
+import os
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from hypothesis import given
+import hypothesis.strategies as st
+
+from clippy import clippy
+from clippy.command_module import create_command_module_for_file
+from clippy.dispatch import dispatch, DispatchResult
+
+__version__ = "0.0.1"
+
+
+@clippy
+def echo(arg, suffix: str = "!"):
+    return f"{arg}{suffix}"
+
+
+@clippy
+def nothing():
+    pass
+
+
+class TestDispatch(unittest.TestCase):
+    def setUp(self):
+        self.module = sys.modules[__name__]
+
+    def test_call(self):
+        result = dispatch(self.module, ["echo", "hello", "--suffix", "?"])
+        self.assertTrue(result.invoked)
+        self.assertEqual("hello?", result.value)
+        self.assertEqual(0, result.status)
+        self.assertIsNone(result.output)
+
+    def test_none_value(self):
+        result = dispatch(self.module, ["nothing"])
+        self.assertTrue(result.invoked)
+        self.assertIsNone(result.value)
+
+    def test_command_module(self):
+        command_module = create_command_module_for_file(os.path.join("examples", "simple.py"))
+        result = dispatch(command_module, ["one_parameter", "example"])
+        self.assertEqual("one_parameter arg: example", result.value)
+
+    def test_postponed_annotations(self):
+        command_module = create_command_module_for_file(os.path.join("tests", "postponed_annotations.py"))
+        self.assertEqual(6.5, dispatch(command_module, ["add", "2", "--second", "3", "1.5"]).value)
+        self.assertEqual({"a": 2.5}, dispatch(command_module, ["scores", "a", "--score", "2.5"]).value)
+        self.assertIn("--second", dispatch(command_module, ["add", "--help"]).output)
+
+    def test_postponed_annotations_resolved_lazily(self):
+        command_module = create_command_module_for_file(os.path.join("tests", "postponed_annotations.py"))
+        self.assertEqual(3, dispatch(command_module, ["add", "2"]).value)
+        self.assertEqual("Missing", command_module.commands["broken"].params["value"]._annotation)
+
+        result = dispatch(command_module, ["broken", "1"])
+        self.assertFalse(result.invoked)
+        self.assertEqual(1, result.status)
+        self.assertIn("Missing", result.output)
+
+    @given(st.text(alphabet="abcxyz.", min_size=1))
+    def test_invalid_argument(self, value):
+        command_module = create_command_module_for_file(os.path.join("tests", "postponed_annotations.py"))
+        result = dispatch(command_module, ["add", value])
+        self.assertFalse(result.invoked)
+        self.assertEqual(1, result.status)
+        self.assertIn(repr(value), result.output)
+
+    def test_missing_argument(self):
+        result = dispatch(self.module, ["echo"])
+        self.assertFalse(result.invoked)
+        self.assertEqual(1, result.status)
+        self.assertIn("missing required parameter", result.output)
+
+    def test_no_arguments(self):
+        result = dispatch(self.module, [])
+        self.assertFalse(result.invoked)
+        self.assertEqual(1, result.status)
+        self.assertIn("Usage:", result.output)
+
+    def test_help(self):
+        result = dispatch(self.module, ["--help"])
+        self.assertEqual(0, result.status)
+        self.assertIn("echo", result.output)
+
+    def test_command_help(self):
+        result = dispatch(self.module, ["echo", "--help"])
+        self.assertFalse(result.invoked)
+        self.assertEqual(0, result.status)
+        self.assertIn("--suffix", result.output)
+
+    def test_version(self):
+        result = dispatch(self.module, ["--version"])
+        self.assertEqual(0, result.status)
+        self.assertIn(__version__, result.output)
+
+    @given(st.text(alphabet=list("abcdef0123456789")).filter(lambda x: not "echo".startswith(x)))
+    def test_unrecognized(self, text):
+        result = dispatch(self.module, [text])
+        self.assertEqual(1, result.status)
+        self.assertIn("Unrecognized command", result.output)
+
+    def test_abbreviated_command(self):
+        result = dispatch(self.module, ["ec", "hello", "--suf", "?"])
+        self.assertEqual("hello?", result.value)
+
+    def test_abbreviated_command_help(self):
+        result = dispatch(self.module, ["ec", "--he"])
+        self.assertEqual(0, result.status)
+        self.assertIn("--suffix", result.output)
+
+    def test_ambiguous_command(self):
+        command_module = create_command_module_for_file(os.path.join("examples", "simple.py"))
+        result = dispatch(command_module, ["doc_one_t", "example"])
+        self.assertEqual(1, result.status)
+        self.assertEqual("Ambiguous command doc_one_t could be any of: documented_one_typed_documented_parameter, documented_one_typed_parameter",
+                         result.output)
+
+    def test_ambiguous_option(self):
+        command_module = create_command_module_for_file(os.path.join("examples", "simple.py"))
+        result = dispatch(command_module, ["documented_two_parameter_alt_syntax", "--arg=x"])
+        self.assertEqual(1, result.status)
+        self.assertFalse(result.invoked)
+        self.assertEqual("Ambiguous option arg could be any of: arg1, arg2", result.output)
+
+    def test_complete_commands(self):
+        self.assertEqual("echo", dispatch(self.module, ["--clippy-complete=e"]).output)
+        self.assertEqual("echo\nnothing\n--help\n--version", dispatch(self.module, ["--clippy-complete="]).output)
+
+    def test_complete_options(self):
+        self.assertEqual("--suffix", dispatch(self.module, ["echo", "--clippy-complete=--s"]).output)
+        self.assertEqual("", dispatch(self.module, ["missing", "--clippy-complete=--s"]).output)
+        self.assertEqual("", dispatch(self.module, ["echo", "--clippy-complete=s"]).output)
+
+    def test_threads(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda x: dispatch(self.module, ["echo", str(x)]).value, range(200)))
+
+        self.assertEqual([f"{x}!" for x in range(200)], results)
+
+    @given(st.integers())
+    def test_invalid_target(self, num):
+        with self.assertRaises(TypeError):
+            # noinspection PyTypeChecker
+            _ = dispatch(num, ["echo"])
+
+    def test_to_string(self):
+        self.assertEqual("DispatchResult('value')", str(DispatchResult(value="value", invoked=True)))
+        self.assertEqual("DispatchResult(1, 'text')", repr(DispatchResult(status=1, output="text")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the documentation builder and its cache of rendered fragments.
+"""
+
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+import doc_builder
+
+MODULE_SOURCE = '''"""
+A module to document.
+"""
+
+
+def add(first: int, second: int = 1) -> int:
+    """
+    Add two numbers.
+
+    :param first: The first number.
+    :param second: The second number.
+    :returns: The sum.
+    """
+    return first + second
+
+
+class Counter:
+    """Counts things."""
+
+    def __init__(self, start: int):
+        """
+        Create a counter.
+
+        :param start: The first value.
+        """
+        self.value = start
+'''
+
+
+class TestDocBuilder(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.package = os.path.join(self.directory.name, "package")
+        self.output_file = os.path.join(self.directory.name, "docs", "index.md")
+        self.cache_file = os.path.join(self.directory.name, "docs", ".doc_cache.json")
+        os.mkdir(self.package)
+        self.write("example.py", MODULE_SOURCE)
+        self.write("other.py", '"""Another module."""\n')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, source):
+        with open(os.path.join(self.package, name), "w", encoding="utf-8") as file:
+            file.write(source)
+
+    def build(self):
+        with redirect_stdout(StringIO()):
+            rendered = doc_builder.build_docs(self.package, self.output_file, self.cache_file)
+
+        return sorted(os.path.basename(filename) for filename in rendered)
+
+    def read_output(self):
+        with open(self.output_file, encoding="utf-8") as file:
+            return file.read()
+
+    def test_render_file(self):
+        output = doc_builder.render_file(os.path.join(self.package, "example.py"))
+        self.assertIn("A module to document.", output)
+        self.assertIn("## add\n\nAdd two numbers.", output)
+        self.assertIn("* first: The first number.", output)
+        self.assertIn("## Returns: The sum.", output)
+        self.assertIn("## Counter\n\nCounts things.", output)
+        self.assertIn("### Constructor\n\nCreate a counter.", output)
+
+    def test_cache_hit(self):
+        self.assertEqual(["example.py", "other.py"], self.build())
+        first = self.read_output()
+
+        with mock.patch.object(doc_builder, "render_file", wraps=doc_builder.render_file) as render_file:
+            self.assertEqual(list(), self.build())
+
+        render_file.assert_not_called()
+        self.assertEqual(first, self.read_output())
+        self.assertEqual({os.path.join(self.package, "example.py"), os.path.join(self.package, "other.py")},
+                         set(doc_builder.load_cache(self.cache_file)))
+
+    def test_source_changed(self):
+        self.build()
+        self.write("other.py", '"""A changed module."""\n')
+
+        self.assertEqual(["other.py"], self.build())
+        self.assertIn("A changed module.", self.read_output())
+        self.assertNotIn("Another module.", self.read_output())
+
+    def test_renderer_changed(self):
+        self.build()
+
+        with mock.patch.object(doc_builder, "renderer_hash", return_value="changed"):
+            self.assertEqual(["example.py", "other.py"], self.build())
+            self.assertEqual(list(), self.build())
+
+    def test_deleted_module(self):
+        self.build()
+        os.remove(os.path.join(self.package, "other.py"))
+
+        self.assertEqual(list(), self.build())
+        self.assertEqual([os.path.join(self.package, "example.py")], list(doc_builder.load_cache(self.cache_file)))
+
+    def test_unreadable_cache(self):
+        os.makedirs(os.path.dirname(self.cache_file))
+
+        with open(self.cache_file, "w", encoding="utf-8") as file:
+            file.write("not json")
+
+        self.assertEqual(dict(), doc_builder.load_cache(self.cache_file))
+        self.assertEqual(["example.py", "other.py"], self.build())
+
+    def test_source_hash(self):
+        filename = os.path.join(self.package, "example.py")
+        self.assertEqual(doc_builder.source_hash(filename, "a"), doc_builder.source_hash(filename, "a"))
+        self.assertNotEqual(doc_builder.source_hash(filename, "a"), doc_builder.source_hash(filename, "b"))
+
+    def test_renderer_hash(self):
+        self.assertEqual(doc_builder.renderer_hash(), doc_builder.renderer_hash())
+        self.assertEqual(64, len(doc_builder.renderer_hash()))
+
+
+if __name__ == "__main__":
+    unittest.main()
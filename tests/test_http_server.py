@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for http_server.py
+"""
+
+import http.client
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from hypothesis import given
+import hypothesis.strategies as st
+
+from clippy import clippy
+from clippy.command_module import create_command_module_for_module
+from clippy.http_server import CommandHTTPServer, describe_module, parse_address
+
+__version__ = "1.2.3"
+
+
+@clippy
+def add(first: int, second: int = 1):
+    return first + second
+
+
+@clippy
+def count(limit: int):
+    return (idx for idx in range(limit))
+
+
+@clippy
+def fail():
+    raise RuntimeError("failed on purpose")
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost")
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+class TestHTTPServer(unittest.TestCase):
+    def setUp(self):
+        self.command_module = create_command_module_for_module(sys.modules[__name__])
+        self.server = CommandHTTPServer(self.command_module, "127.0.0.1:0")
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.connections = list()
+
+    def tearDown(self):
+        for connection in self.connections:
+            connection.close()
+
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join(10)
+
+    def connect(self):
+        connection = http.client.HTTPConnection(*self.server.server_address, timeout=10)
+        self.connections.append(connection)
+        return connection
+
+    def get(self, connection, path, body=None):
+        if body is None:
+            connection.request("GET", path)
+        else:
+            connection.request("POST", path, json.dumps(body), {"Content-Type": "application/json"})
+
+        response = connection.getresponse()
+        return response.status, response.read().decode("utf-8")
+
+    def test_query(self):
+        status, body = self.get(self.connect(), "/add?first=2&second=3")
+        self.assertEqual(200, status)
+        self.assertEqual(5, json.loads(body))
+
+    def test_json_body(self):
+        status, body = self.get(self.connect(), "/add?second=10", {"first": 2})
+        self.assertEqual(200, status)
+        self.assertEqual(12, json.loads(body))
+
+    def test_keep_alive(self):
+        connection = self.connect()
+
+        for idx in range(20):
+            self.assertEqual((200, f"{idx + 1}\n"), self.get(connection, f"/add?first={idx}"))
+
+    def test_stream(self):
+        status, body = self.get(self.connect(), "/count?limit=3000")
+        self.assertEqual(200, status)
+        self.assertEqual(list(range(3000)), [json.loads(line) for line in body.splitlines()])
+
+    def test_concurrent(self):
+        def call(idx):
+            return self.get(self.connect(), f"/add?first={idx}&second={idx}")
+
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(call, range(64)))
+
+        self.assertEqual([(200, f"{idx * 2}\n") for idx in range(64)], results)
+
+    def test_index(self):
+        status, body = self.get(self.connect(), "/")
+        self.assertEqual(200, status)
+        self.assertEqual(describe_module(self.command_module), json.loads(body))
+        self.assertEqual("1.2.3", json.loads(body)["version"])
+
+    def test_unrecognized(self):
+        status, body = self.get(self.connect(), "/nope")
+        self.assertEqual(404, status)
+        self.assertIn("Unrecognized command nope", json.loads(body)["error"])
+
+    def test_missing_parameter(self):
+        status, _ = self.get(self.connect(), "/add?second=1")
+        self.assertEqual(400, status)
+
+    def test_invalid_value(self):
+        status, _ = self.get(self.connect(), "/add?first=one")
+        self.assertEqual(400, status)
+
+    def test_invalid_body(self):
+        status, _ = self.get(self.connect(), "/add", [1, 2])
+        self.assertEqual(400, status)
+
+    def test_unread_body_keep_alive(self):
+        connection = self.connect()
+
+        for path in ["/", "/nope", "/add"]:
+            self.get(connection, path, {"arg": "x"})
+            self.assertEqual((200, "2\n"), self.get(connection, "/add?first=1"))
+
+    def test_body_too_large(self):
+        with socket.create_connection(self.server.server_address, timeout=10) as connection:
+            connection.sendall(b"POST /add HTTP/1.1\r\nHost: localhost\r\nContent-Length: 999999999999\r\n\r\n{}")
+            response = http.client.HTTPResponse(connection)
+            response.begin()
+            self.assertEqual(413, response.status)
+            self.assertTrue(response.will_close)
+
+    def test_command_error(self):
+        connection = self.connect()
+        status, body = self.get(connection, "/fail")
+        self.assertEqual(500, status)
+        self.assertIn("failed on purpose", json.loads(body)["error"])
+        self.assertEqual(200, self.get(connection, "/add?first=1")[0])
+
+    def test_module_required(self):
+        with self.assertRaises(TypeError):
+            CommandHTTPServer("module", "127.0.0.1:0")
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "requires Unix domain sockets")
+class TestUnixHTTPServer(unittest.TestCase):
+    def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "http.sock")
+            server = CommandHTTPServer(create_command_module_for_module(sys.modules[__name__]), path)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+
+            try:
+                connection = UnixHTTPConnection(path)
+                connection.request("GET", "/add?first=4")
+                self.assertEqual(5, json.loads(connection.getresponse().read()))
+                connection.close()
+            finally:
+                server.shutdown()
+                server.server_close()
+                thread.join(10)
+
+            self.assertFalse(os.path.exists(path))
+
+    def test_existing_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "data.txt")
+
+            with open(path, "w", encoding="utf-8") as file:
+                file.write("data")
+
+            with self.assertRaises(FileExistsError):
+                CommandHTTPServer(create_command_module_for_module(sys.modules[__name__]), path)
+
+            with open(path, encoding="utf-8") as file:
+                self.assertEqual("data", file.read())
+
+    def test_existing_socket(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "http.sock")
+
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+                stale.bind(path)
+
+            server = CommandHTTPServer(create_command_module_for_module(sys.modules[__name__]), path)
+            server.server_close()
+            self.assertFalse(os.path.exists(path))
+
+
+class TestParseAddress(unittest.TestCase):
+    def test_unix(self):
+        self.assertEqual((socket.AF_UNIX, "/tmp/clippy.sock"), parse_address("/tmp/clippy.sock"))
+
+    def test_host_port(self):
+        self.assertEqual((socket.AF_INET, ("0.0.0.0", 8080)), parse_address("0.0.0.0:8080"))
+
+    @given(st.integers(min_value=0, max_value=65535))
+    def test_port(self, port):
+        self.assertEqual((socket.AF_INET, ("127.0.0.1", port)), parse_address(str(port)))
+
+    @given(st.text(alphabet="abcdefghijklmnopqrstuvwxyz:.", min_size=1).filter(lambda x: not x.rpartition(":")[2].isdigit()))
+    def test_invalid(self, address):
+        with self.assertRaises(ValueError):
+            parse_address(address)
+
+
+if __name__ == "__main__":
+    unittest.main()
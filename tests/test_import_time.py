@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the import cost of the clippy package.
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+# the cumulative time, in microseconds, that `from clippy import clippy` may take
+IMPORT_BUDGET_US = 5000
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(*args):
+    return subprocess.run([sys.executable] + list(args), cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True, check=True)
+
+
+def import_time_us():
+    output = run_python("-X", "importtime", "-c", "from clippy import clippy").stderr
+
+    for line in output.splitlines():
+        fields = line.split("|")
+
+        if len(fields) == 3 and fields[2].strip() == "clippy":
+            return int(fields[1].strip())
+
+    raise ValueError(f"No import time reported for clippy in {output}")
+
+
+class TestImportTime(unittest.TestCase):
+    def test_no_parsing_modules(self):
+        code = "import sys; before = set(sys.modules); from clippy import clippy; print(' '.join(set(sys.modules) - before))"
+        imported = run_python("-c", code).stdout.split()
+
+        for name in ["ast", "inspect", "re", "importlib", "typing", "clippy.command_module", "clippy.common"]:
+            self.assertNotIn(name, imported)
+
+    def test_command_run_modules(self):
+        code = "import sys; from examples import simple; from clippy.dispatch import dispatch; dispatch(simple, ['one_parameter', 'x']); " \
+               "print(' '.join(sys.modules))"
+        imported = run_python("-c", code).stdout.split()
+
+        # modules needed only by commands marked to be cached or split, or by options that were not given
+        for name in ["clippy.result_cache", "clippy.split", "clippy.profiling", "clippy.metrics", "pickle", "tempfile"]:
+            self.assertNotIn(name, imported)
+
+    def test_pipeline_modules(self):
+        code = "import sys; from examples import simple; from clippy.dispatch import dispatch; " \
+               "dispatch(simple, ['one_parameter', 'x', '::', 'one_parameter']); print(' '.join(sys.modules))"
+        imported = run_python("-c", code).stdout.split()
+        self.assertIn("clippy.pipeline", imported)
+        self.assertNotIn("clippy.metrics", imported)
+
+    def test_import_budget(self):
+        # take the best of a few runs, to smooth over noise from other processes
+        best = min(import_time_us() for _ in range(3))
+        self.assertLess(best, IMPORT_BUDGET_US)
+
+
+if __name__ == "__main__":
+    unittest.main()
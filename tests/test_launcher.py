@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for launcher.py
+"""
+
+import ast
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from clippy.common import VAR_POSITIONAL, KEYWORD_ONLY, VAR_KEYWORD
+from clippy.launcher import NotStaticError, clippy_definitions, find_module_file, is_help_request, static_command_method, static_command_module, static_output
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULE = '''"""
+A module that cannot be imported.
+"""
+
+from clippy import begin_clippy, clippy as command
+
+__version__ = "1.2.3"
+
+raise RuntimeError("imported")
+
+
+@command
+def greet(name: str, times: int = 2, *, loud: bool = False) -> str:
+    """
+    Greet someone.
+
+    :param name: Who to greet.
+    """
+    return name
+
+
+if __name__ == "__main__":
+    begin_clippy()
+'''
+
+DYNAMIC_MODULE = '''"""
+A module whose defaults are computed.
+"""
+
+from clippy import begin_clippy, clippy
+
+__version__ = "0.1"
+LIMIT = 3
+
+
+@clippy
+def count(limit=LIMIT * 2):
+    """Count."""
+    return limit
+
+
+if __name__ == "__main__":
+    begin_clippy()
+'''
+
+
+def run(arguments, cwd):
+    # clippy is importable from modules outside the repository
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.environ.get("PYTHONPATH", "")]))
+    process = subprocess.run([sys.executable, "-m"] + arguments, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True,
+                             timeout=30, cwd=cwd, env=environment)
+    return process.returncode, process.stdout
+
+
+def parse_function(source):
+    return ast.parse(source).body[0]
+
+
+class TestLauncher(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+        for (name, source) in [("heavy_module", HEAVY_MODULE), ("dynamic_module", DYNAMIC_MODULE)]:
+            with open(os.path.join(self.directory.name, f"{name}.py"), "w") as file:
+                file.write(source)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_matches_runtime(self):
+        for arguments in [[], ["--help"], ["--version"], ["one_parameter", "--help"], ["one_typed_optional_parameter", "--help"],
+                          ["documented_two_parameter_alt_syntax", "--help"], ["typed_return", "--help"], ["nope", "--help"]]:
+            self.assertEqual(run(["examples.simple"] + arguments, ROOT), run(["clippy", "examples.simple"] + arguments, ROOT))
+
+    def test_runs_commands(self):
+        self.assertEqual((0, "one_parameter arg: a\n"), run(["clippy", "examples.simple", "one_parameter", "a"], ROOT))
+
+    def test_help_without_import(self):
+        status, output = run(["clippy", "heavy_module", "greet", "--help"], self.directory.name)
+        self.assertEqual(0, status)
+        self.assertIn("python -m heavy_module greet <name> [--times=<int>] [--loud]", output)
+        self.assertIn("Who to greet.", output)
+        self.assertEqual((0, "heavy_module v1.2.3\n"), run(["clippy", "heavy_module", "--version"], self.directory.name))
+
+    def test_complete_without_import(self):
+        self.assertEqual((0, "greet\n"), run(["clippy", "heavy_module", "--clippy-complete=g"], self.directory.name))
+        self.assertEqual((0, "--loud\n"), run(["clippy", "heavy_module", "gr", "--clippy-complete=--l"], self.directory.name))
+
+    def test_search_without_import(self):
+        expected = "Commands matching 'greet':\n\tpython -m heavy_module greet <name> [--times=<int>] [--loud]\n\t\tGreet someone.\n"
+        self.assertEqual((0, expected), run(["clippy", "heavy_module", "--help", "greet"], self.directory.name))
+        self.assertTrue(os.path.isfile(os.path.join(self.directory.name, "__pycache__", "heavy_module.clippy-search.json")))
+
+        # the second search is answered from the saved index
+        status, output = run(["clippy", "heavy_module", "--clippy-search", "who"], self.directory.name)
+        self.assertEqual(0, status)
+        self.assertIn("heavy_module greet <name>", output)
+        self.assertEqual((1, "No commands match 'nothing'\n"), run(["clippy", "heavy_module", "--help", "nothing"], self.directory.name))
+
+    def test_command_imports(self):
+        status, output = run(["clippy", "heavy_module", "greet", "you"], self.directory.name)
+        self.assertNotEqual(0, status)
+        self.assertIn("RuntimeError: imported", output)
+
+    def test_fallback(self):
+        self.assertIsNone(static_output(*find_module_file("examples.simple"), ["one_parameter", "a"]))
+        expected = run(["dynamic_module", "count", "--help"], self.directory.name)
+        self.assertEqual(expected, run(["clippy", "dynamic_module", "count", "--help"], self.directory.name))
+        self.assertIn("--limit=<li>", run(["clippy", "dynamic_module", "count", "--help"], self.directory.name)[1])
+
+    def test_usage(self):
+        self.assertEqual(1, run(["clippy"], ROOT)[0])
+
+    def test_is_help_request(self):
+        self.assertTrue(is_help_request([]))
+        self.assertTrue(is_help_request(["--version"]))
+        self.assertTrue(is_help_request(["command", "value", "--help"]))
+        self.assertFalse(is_help_request(["command", "value"]))
+
+    def test_find_package(self):
+        self.assertEqual("clippy.__main__", find_module_file("clippy")[0])
+
+    def test_find_missing(self):
+        with self.assertRaises(ImportError):
+            find_module_file("no_such_module_here")
+
+    def test_static_command_method(self):
+        method = static_command_method(parse_function("def run(first: int, *rest: str, flag: bool = False, **extra) -> str:\n    pass\n"))
+        self.assertEqual("run", method.name)
+        self.assertEqual([("first", int), ("rest", str), ("flag", bool), ("extra", None)], [(param.name, param.annotation) for param in method.params.values()])
+        self.assertEqual([VAR_POSITIONAL, KEYWORD_ONLY, VAR_KEYWORD], [param.kind for param in list(method.params.values())[1:]])
+        self.assertEqual(False, method.params["flag"].default_value)
+
+        with self.assertRaises(NotStaticError):
+            method.call(dict())
+
+    def test_static_command_method_custom_annotation(self):
+        method = static_command_method(parse_function("def run(path: pathlib.Path, other: Custom = None):\n    pass\n"))
+        self.assertEqual(["Path", "Custom"], [param.annotation_name for param in method.params.values()])
+
+    def test_static_command_method_not_literal(self):
+        for source in ["def run(value=compute()):\n    pass\n", "def run(value: List[int]):\n    pass\n"]:
+            with self.assertRaises(NotStaticError):
+                static_command_method(parse_function(source))
+
+    def test_static_module_duplicate(self):
+        path = os.path.join(self.directory.name, "duplicate.py")
+
+        with open(path, "w") as file:
+            file.write('"""Duplicate."""\nfrom clippy import clippy\n\n\n@clippy\ndef run():\n    pass\n\n\ndef run():\n    pass\n')
+
+        with self.assertRaises(NotStaticError):
+            static_command_module("duplicate", path)
+
+    def test_clippy_definitions(self):
+        for source in ["import clippy as c\n\n@c.clippy\ndef run():\n    pass\n\n@other\ndef skip():\n    pass\n",
+                       "from clippy import clippy\nfrom functools import lru_cache\n\n@lru_cache()\n@clippy\ndef run():\n    pass\n"]:
+            self.assertEqual(["run"], [definition.name for definition in clippy_definitions(ast.parse(source))])
+
+    def test_clippy_definitions_unresolved(self):
+        for source in ["from clippy import *\n\n@clippy\ndef run():\n    pass\n",
+                       "from helpers import *\n\n@command\ndef run():\n    pass\n",
+                       "from clippy import clippy\ncommand = clippy\n\n@command\ndef run():\n    pass\n",
+                       "from helpers import clippy\n\n@clippy\ndef run():\n    pass\n",
+                       "try:\n    from clippy import clippy\nexcept ImportError:\n    clippy = print\n\n@clippy\ndef run():\n    pass\n"]:
+            with self.assertRaises(NotStaticError):
+                clippy_definitions(ast.parse(source))
+
+    def test_star_import_falls_back(self):
+        with open(os.path.join(self.directory.name, "helpers.py"), "w") as file:
+            file.write("from clippy import clippy as command\n")
+
+        with open(os.path.join(self.directory.name, "starred.py"), "w") as file:
+            file.write('"""Starred."""\nfrom clippy import begin_clippy\nfrom helpers import *\n\n\n@command\ndef hello():\n    """Say hello."""\n'
+                       '\n\nif __name__ == "__main__":\n    begin_clippy()\n')
+
+        self.assertIsNone(static_output("starred", os.path.join(self.directory.name, "starred.py"), ["--help"]))
+        status, output = run(["clippy", "starred", "--help"], self.directory.name)
+        self.assertEqual(0, status)
+        self.assertIn("hello", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for metrics.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from hypothesis import given
+import hypothesis.strategies as st
+
+from clippy import clippy
+from clippy.dispatch import dispatch
+from clippy.metrics import Histogram, MetricsRegistry, enable_metrics, disable_metrics, get_metrics, phase_timer, NULL_TIMER, BUCKETS
+
+
+@clippy
+def succeed(arg: int):
+    return arg
+
+
+@clippy
+def fail():
+    raise KeyError("failure")
+
+
+class TestMetrics(unittest.TestCase):
+    def tearDown(self):
+        disable_metrics()
+
+    @given(st.lists(st.floats(min_value=0, max_value=100)))
+    def test_histogram(self, values):
+        histogram = Histogram()
+
+        for value in values:
+            histogram.observe(value)
+
+        self.assertEqual(len(values), histogram.count)
+        self.assertEqual(len(values), histogram.cumulative()[-1])
+        self.assertEqual(len(BUCKETS) + 1, len(histogram.buckets))
+
+    def test_disabled(self):
+        self.assertIsNone(get_metrics())
+        self.assertIs(NULL_TIMER, phase_timer(None, "command", "call"))
+
+    def test_dispatch(self):
+        registry = enable_metrics()
+        module = sys.modules[__name__]
+        dispatch(module, ["succeed", "1"])
+        dispatch(module, ["succeed", "2"])
+
+        with self.assertRaises(KeyError):
+            dispatch(module, ["fail"])
+
+        commands = registry.snapshot()["commands"]
+        self.assertEqual(2, commands["succeed"]["invocations"])
+        self.assertEqual(2, commands["succeed"]["phases"]["call"]["count"])
+        self.assertEqual(["call", "parse", "validate"], sorted(commands["succeed"]["phases"].keys()))
+        self.assertEqual({"KeyError": 1}, commands["fail"]["errors"])
+
+    def test_prometheus(self):
+        registry = MetricsRegistry()
+        registry.count_invocation("some \"command\"")
+        registry.observe("some \"command\"", "call", 0.002)
+        text = registry.prometheus()
+        self.assertIn("clippy_invocations_total{command=\"some \\\"command\\\"\"} 1", text)
+        self.assertIn("clippy_phase_seconds_bucket{command=\"some \\\"command\\\"\",phase=\"call\",le=\"0.001\"} 0", text)
+        self.assertIn("clippy_phase_seconds_bucket{command=\"some \\\"command\\\"\",phase=\"call\",le=\"0.005\"} 1", text)
+        self.assertIn("clippy_phase_seconds_count{command=\"some \\\"command\\\"\",phase=\"call\"} 1", text)
+
+    def test_export(self):
+        registry = MetricsRegistry()
+        registry.count_invocation("command")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.json")
+            registry.export(path)
+
+            with open(path) as file:
+                self.assertEqual(1, json.load(file)["commands"]["command"]["invocations"])
+
+            path = os.path.join(directory, "metrics.prom")
+            registry.export(path)
+
+            with open(path) as file:
+                self.assertIn("# TYPE clippy_phase_seconds histogram", file.read())
+
+            self.assertEqual(["metrics.json", "metrics.prom"], sorted(os.listdir(directory)))
+
+
+if __name__ == "__main__":
+    unittest.main()
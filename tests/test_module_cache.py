@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for module_cache.py
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from hypothesis import given
+import hypothesis.strategies as st
+
+from clippy.command_module import CommandModule, create_command_module_for_file
+from clippy.module_cache import CommandModuleCache, COMMAND_MODULE_CACHE, cache_clear, cache_info
+
+FILENAME = os.path.join("examples", "simple.py")
+
+
+class TestModuleCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = CommandModuleCache(maxsize=2)
+        self.module = sys.modules[__name__]
+        self.built = 0
+
+    def factory(self):
+        self.built += 1
+        return CommandModule(name="module")
+
+    def test_hit(self):
+        first = self.cache.get_or_create(self.module, "module", __file__, self.factory)
+        second = self.cache.get_or_create(self.module, "module", __file__, self.factory)
+        self.assertIs(first, second)
+        self.assertEqual(1, self.built)
+        self.assertEqual((1, 1, 2, 1), tuple(self.cache.info()))
+
+    def test_file_changed(self):
+        with tempfile.NamedTemporaryFile(suffix=".py") as file:
+            self.cache.get_or_create(self.module, "module", file.name, self.factory)
+            file.write(b"X = 1\n")
+            file.flush()
+            self.cache.get_or_create(self.module, "module", file.name, self.factory)
+
+        self.assertEqual(2, self.built)
+        self.assertEqual(1, len(self.cache))
+
+    def test_eviction(self):
+        for name in ["first", "second", "third"]:
+            self.cache.get_or_create(self.module, name, __file__, self.factory)
+
+        self.cache.get_or_create(self.module, "first", __file__, self.factory)
+        self.assertEqual(4, self.built)
+        self.assertEqual(2, len(self.cache))
+
+    def test_clear(self):
+        self.cache.get_or_create(self.module, "module", __file__, self.factory)
+        self.cache.clear()
+        self.assertEqual((0, 0, 2, 0), tuple(self.cache.info()))
+
+    def test_disabled(self):
+        cache = CommandModuleCache(maxsize=0)
+        cache.get_or_create(self.module, "module", __file__, self.factory)
+        cache.get_or_create(self.module, "module", __file__, self.factory)
+        self.assertEqual(2, self.built)
+
+    def test_shared_cache(self):
+        cache_clear()
+        first = create_command_module_for_file(FILENAME)
+        second = create_command_module_for_file(FILENAME)
+        self.assertIs(first, second)
+        self.assertEqual(1, cache_info().hits)
+        self.assertEqual(1, cache_info().misses)
+        self.assertEqual(COMMAND_MODULE_CACHE.info().currsize, cache_info().currsize)
+
+    @given(st.integers().filter(lambda x: x < 0))
+    def test_negative_size(self, num):
+        with self.assertRaises(ValueError):
+            _ = CommandModuleCache(maxsize=num)
+
+    @given(st.text())
+    def test_size_not_int(self, text):
+        with self.assertRaises(TypeError):
+            # noinspection PyTypeChecker
+            _ = CommandModuleCache(maxsize=text)
+
+
+if __name__ == "__main__":
+    unittest.main()
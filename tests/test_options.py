@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for options.py
+"""
+
+import unittest
+from hypothesis import given
+import hypothesis.strategies as st
+
+from clippy.options import ClippyOptions, split_clippy_options, FORMATS, KNOWN_OPTIONS
+
+
+class TestOptions(unittest.TestCase):
+    def test_no_options(self):
+        options, remaining = split_clippy_options(["command", "arg", "--flag"])
+        self.assertEqual(ClippyOptions(), options)
+        self.assertEqual(["command", "arg", "--flag"], remaining)
+
+    def test_equals_value(self):
+        options, remaining = split_clippy_options(["command", "--clippy-format=json", "arg"])
+        self.assertEqual("json", options.format)
+        self.assertEqual(["command", "arg"], remaining)
+
+    def test_separate_value(self):
+        options, remaining = split_clippy_options(["--clippy-format", "csv", "command"])
+        self.assertEqual("csv", options.format)
+        self.assertEqual(["command"], remaining)
+
+    def test_missing_value(self):
+        with self.assertRaises(ValueError) as err:
+            _ = split_clippy_options(["command", "--clippy-format"])
+
+        self.assertIn("requires a value", str(err.exception))
+
+    @given(st.text(alphabet="abcdefghijklmnopqrstuvwxyz").filter(lambda x: x and x not in KNOWN_OPTIONS))
+    def test_unrecognized(self, name):
+        with self.assertRaises(ValueError) as err:
+            _ = split_clippy_options([f"--clippy-{name}"])
+
+        self.assertIn("Unrecognized option", str(err.exception))
+
+    @given(st.text(alphabet="abcdefghijklmnopqrstuvwxyz").filter(lambda x: x not in FORMATS))
+    def test_unrecognized_format(self, name):
+        with self.assertRaises(ValueError) as err:
+            _ = split_clippy_options(["command", f"--clippy-format={name}"])
+
+        self.assertIn("Unrecognized output format", str(err.exception))
+
+    @given(st.sampled_from(["rpc-workers", "jobs"]), st.one_of(st.integers(max_value=0).map(str), st.text(alphabet="abc-.")))
+    def test_invalid_integer(self, name, value):
+        with self.assertRaises(ValueError) as err:
+            _ = split_clippy_options([f"--clippy-{name}={value}"])
+
+        self.assertIn("must be a positive integer", str(err.exception))
+
+    def test_default(self):
+        self.assertIsNone(ClippyOptions().format)
+        self.assertEqual("text", ClippyOptions().get("format", "text"))
+
+    @given(st.integers())
+    def test_values_not_dict(self, num):
+        with self.assertRaises(TypeError):
+            # noinspection PyTypeChecker
+            _ = ClippyOptions(num)
+
+    def test_to_string(self):
+        self.assertEqual("ClippyOptions({'format': 'json'})", str(ClippyOptions({"format": "json"})))
+
+
+if __name__ == "__main__":
+    unittest.main()
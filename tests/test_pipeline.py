@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for pipeline.py
+"""
+
+import sys
+import threading
+import unittest
+from hypothesis import given
+import hypothesis.strategies as st
+
+from clippy import clippy
+from clippy.dispatch import dispatch
+from clippy.pipeline import BufferedIterator, split_stages
+
+CALLS = list()
+PRODUCED = list()
+
+
+@clippy
+def numbers(count: int):
+    for idx in range(count):
+        PRODUCED.append(idx)
+        yield idx
+
+
+@clippy
+def scale(values, factor: int = 2):
+    return (value * factor for value in values)
+
+
+@clippy
+def total(values):
+    return sum(values)
+
+
+@clippy
+def first(values, count: int = 1):
+    return [value for (_, value) in zip(range(count), values)]
+
+
+@clippy
+def record(value: int):
+    CALLS.append(value)
+    return {"value": value}
+
+
+@clippy
+def keys(mapping, required):
+    return sorted(mapping.keys()) + [required]
+
+
+@clippy
+def constant():
+    return 1
+
+
+@clippy
+def window(values, start: int = 0, stop: int = 1):
+    return list(values)[start:stop]
+
+
+@clippy
+def broken(count: int):
+    yield from range(count)
+    raise RuntimeError("broken on purpose")
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.module = sys.modules[__name__]
+        CALLS.clear()
+        PRODUCED.clear()
+
+    def test_split_stages(self):
+        self.assertEqual([["a", "--x", "1"], ["b"], ["c", "--y", "2"]], split_stages(["a", "--x", "1", "::", "b", "::", "c", "--y", "2"]))
+
+    def test_generators(self):
+        result = dispatch(self.module, ["numbers", "5", "::", "scale", "--factor", "3", "::", "total"])
+        self.assertTrue(result.invoked)
+        self.assertEqual(30, result.value)
+        self.assertEqual("total", result.command.name)
+
+    def test_objects_not_strings(self):
+        self.assertEqual(["value", "x"], dispatch(self.module, ["record", "4", "::", "keys", "x"]).value)
+
+    def test_abbreviated_stages(self):
+        self.assertEqual(6, dispatch(self.module, ["num", "3", "::", "sc", "::", "to"]).value)
+
+    def test_lazy(self):
+        result = dispatch(self.module, ["numbers", "100000", "::", "first", "--count", "3"])
+        self.assertEqual([0, 1, 2], result.value)
+        self.assertLess(len(PRODUCED), 100000)
+
+    def test_last_stage_is_lazy(self):
+        result = dispatch(self.module, ["numbers", "3", "::", "scale"])
+        self.assertEqual([0, 2, 4], list(result.value))
+
+    def test_error_propagates(self):
+        with self.assertRaises(RuntimeError):
+            dispatch(self.module, ["broken", "3", "::", "total"])
+
+    def test_validated_before_running(self):
+        result = dispatch(self.module, ["record", "1", "::", "keys"])
+        self.assertEqual(1, result.status)
+        self.assertIn("missing required parameter", result.output)
+        self.assertEqual([], CALLS)
+
+    def test_invalid_argument(self):
+        result = dispatch(self.module, ["record", "1", "::", "window", "--stop=x"])
+        self.assertEqual(1, result.status)
+        self.assertIn("'x'", result.output)
+        self.assertEqual([], CALLS)
+
+    def test_unrecognized_stage(self):
+        result = dispatch(self.module, ["record", "1", "::", "missing"])
+        self.assertEqual(1, result.status)
+        self.assertEqual("Unrecognized command missing", result.output)
+        self.assertEqual([], CALLS)
+
+    def test_ambiguous_option(self):
+        result = dispatch(self.module, ["record", "1", "::", "window", "--st=2"])
+        self.assertEqual(1, result.status)
+        self.assertEqual("Ambiguous option st could be any of: start, stop", result.output)
+        self.assertEqual([], CALLS)
+
+    def test_empty_stage(self):
+        self.assertEqual("Pipeline stage 2 is empty", dispatch(self.module, ["record", "1", "::"]).output)
+
+    def test_stage_help(self):
+        result = dispatch(self.module, ["record", "1", "::", "scale", "--help"])
+        self.assertEqual(0, result.status)
+        self.assertIn("--factor", result.output)
+        self.assertEqual([], CALLS)
+
+    def test_no_positional_parameter(self):
+        result = dispatch(self.module, ["record", "1", "::", "constant"])
+        self.assertFalse(result.invoked)
+        self.assertEqual(1, result.status)
+        self.assertEqual("Command constant has no positional parameter to receive the output of record", result.output)
+        self.assertEqual([], CALLS)
+
+    @given(st.lists(st.integers()), st.integers(min_value=1, max_value=200))
+    def test_buffered_iterator(self, values, buffer_size):
+        self.assertEqual(values, list(BufferedIterator(iter(values), buffer_size)))
+
+    def test_buffered_iterator_bounded(self):
+        produced = list()
+        waiting = threading.Event()
+
+        def source():
+            for idx in range(1000):
+                produced.append(idx)
+
+                if len(produced) > 20:
+                    waiting.set()
+
+                yield idx
+
+        buffered = BufferedIterator(source(), 8)
+        waiting.wait(0.5)
+        # the buffer, one chunk being filled, and one item waiting to be added to it
+        self.assertLessEqual(len(produced), 8 + 8 + 1)
+        self.assertEqual(list(range(1000)), list(buffered))
+
+    def test_buffered_iterator_close(self):
+        buffered = BufferedIterator(iter(range(100000)), 4)
+        self.assertEqual(0, next(buffered))
+        buffered.close()
+        buffered._thread.join(5)  # pylint: disable=protected-access
+        self.assertFalse(buffered._thread.is_alive())  # pylint: disable=protected-access
+
+    @given(st.integers(max_value=0))
+    def test_buffered_iterator_size(self, size):
+        with self.assertRaises(ValueError):
+            BufferedIterator(iter([]), size)
+
+    def test_buffered_iterator_source(self):
+        with self.assertRaises(TypeError):
+            BufferedIterator([1, 2, 3])
+
+    def test_to_string(self):
+        self.assertEqual("BufferedIterator(16)", str(BufferedIterator(iter([]), 16)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for prefix_index.py
+"""
+
+import unittest
+from hypothesis import given
+import hypothesis.strategies as st
+
+from clippy.prefix_index import AmbiguousPrefixError, PrefixIndex
+
+NAMES = ["documented_no_parameters", "documented_one_parameter", "documented_one_typed_documented_parameter", "documented_one_typed_parameter",
+         "one_parameter", "one_optional_parameter", "add", "add_all"]
+
+
+class TestPrefixIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = PrefixIndex(NAMES, "command")
+
+    def test_exact(self):
+        for name in NAMES:
+            self.assertEqual(name, self.index.resolve(name))
+
+    def test_exact_wins_over_longer(self):
+        self.assertEqual("add", self.index.resolve("add"))
+
+    def test_unique_prefix(self):
+        self.assertEqual("documented_no_parameters", self.index.resolve("documented_n"))
+        self.assertEqual("add_all", self.index.resolve("add_"))
+
+    def test_ambiguous_prefix(self):
+        with self.assertRaises(AmbiguousPrefixError) as err:
+            self.index.resolve("documented_one")
+
+        self.assertEqual("documented_one", err.exception.prefix)
+        self.assertEqual(["documented_one_parameter", "documented_one_typed_documented_parameter", "documented_one_typed_parameter"],
+                         err.exception.candidates)
+        self.assertIn("Ambiguous command documented_one", str(err.exception))
+
+    def test_abbreviated_words(self):
+        self.assertEqual("documented_one_typed_documented_parameter", self.index.resolve("doc_one_t_d"))
+        self.assertEqual("one_optional_parameter", self.index.resolve("o_op"))
+
+    def test_ambiguous_abbreviation(self):
+        with self.assertRaises(AmbiguousPrefixError) as err:
+            self.index.resolve("doc_one_t")
+
+        self.assertEqual(["documented_one_typed_documented_parameter", "documented_one_typed_parameter"], err.exception.candidates)
+
+    def test_no_match(self):
+        self.assertIsNone(self.index.resolve("missing"))
+        self.assertIsNone(self.index.resolve("doc_two"))
+        self.assertIsNone(self.index.resolve(""))
+
+    def test_with_prefix(self):
+        self.assertEqual(["one_optional_parameter", "one_parameter"], self.index.with_prefix("one_"))
+        self.assertEqual([], self.index.with_prefix("zzz"))
+        self.assertEqual(sorted(NAMES), self.index.names)
+
+    def test_contains(self):
+        self.assertIn("add", self.index)
+        self.assertNotIn("ad", self.index)
+        self.assertEqual(len(NAMES), len(PrefixIndex(NAMES + NAMES)))
+
+    @given(st.sets(st.text(alphabet="abc_", min_size=1), min_size=1))
+    def test_every_name_resolves(self, names):
+        index = PrefixIndex(names)
+
+        for name in names:
+            self.assertEqual(name, index.resolve(name))
+
+    @given(st.sets(st.text(alphabet="abc_", min_size=1)), st.text(alphabet="abc_"))
+    def test_with_prefix_matches_scan(self, names, prefix):
+        self.assertEqual(sorted(name for name in names if name.startswith(prefix)), PrefixIndex(names).with_prefix(prefix))
+
+    @given(st.sets(st.text(alphabet="abc", min_size=1), min_size=1), st.text(alphabet="abc", min_size=1))
+    def test_resolve_matches_scan(self, names, key):
+        matches = [name for name in names if name.startswith(key)]
+
+        if key in names or len(matches) == 1:
+            self.assertEqual(key if key in names else matches[0], PrefixIndex(names).resolve(key))
+        elif matches:
+            self.assertRaises(AmbiguousPrefixError, PrefixIndex(names).resolve, key)
+        else:
+            self.assertIsNone(PrefixIndex(names).resolve(key))
+
+    def test_invalid_names(self):
+        self.assertRaises(TypeError, PrefixIndex, "name")
+        self.assertRaises(TypeError, PrefixIndex, [1])
+
+    @given(st.integers())
+    def test_invalid_key(self, num):
+        self.assertRaises(TypeError, self.index.resolve, num)
+        self.assertRaises(TypeError, self.index.with_prefix, num)
+
+    def test_to_string(self):
+        self.assertEqual(f"PrefixIndex('command', {len(NAMES)} names)", str(self.index))
+
+
+if __name__ == "__main__":
+    unittest.main()
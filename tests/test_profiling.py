@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for profiling.py
+"""
+
+import os
+import pstats
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from hypothesis import given
+import hypothesis.strategies as st
+
+from clippy import clippy
+from clippy.dispatch import dispatch
+from clippy.options import ClippyOptions
+from clippy.profiling import Profiler, create_profiler, default_profile_path
+
+
+@clippy
+def allocate(count: int):
+    return len([str(idx) for idx in range(count)])
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.module = sys.modules[__name__]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cpu(self):
+        path = os.path.join(self.directory.name, "allocate.pstats")
+        result = dispatch(self.module, ["allocate", "1000", "--clippy-profile=cpu", f"--clippy-profile-output={path}"])
+        self.assertEqual(1000, result.value)
+
+        functions = [function for (_, _, function) in pstats.Stats(path).stats.keys()]
+        self.assertIn("allocate", functions)
+        self.assertNotIn("parse_arguments", functions)
+
+    def test_memory(self):
+        path = os.path.join(self.directory.name, "allocate.txt")
+        dispatch(self.module, ["allocate", "1000", "--clippy-profile", "memory", "--clippy-profile-output", path])
+
+        with open(path) as file:
+            report = file.read()
+
+        self.assertIn("Peak memory:", report)
+        self.assertIn("test_profiling.py", report)
+
+    def test_not_requested(self):
+        self.assertIsNone(create_profiler(ClippyOptions(), "allocate"))
+
+    def test_default_path(self):
+        self.assertEqual("clippy-allocate.pstats", default_profile_path("cpu", "allocate"))
+        self.assertEqual("clippy-allocate.pstats", create_profiler(ClippyOptions({"profile": "cpu"}), "allocate").path)
+
+    @given(st.text().filter(lambda x: x not in ["cpu", "memory"]))
+    def test_invalid_mode(self, mode):
+        with self.assertRaises(ValueError):
+            _ = Profiler(mode, "output")
+
+    @given(st.text(alphabet="abcdefghijklmnopqrstuvwxyz", min_size=1).filter(lambda x: x not in ["cpu", "memory"]))
+    def test_invalid_mode_option(self, mode):
+        result = dispatch(self.module, ["allocate", "10", f"--clippy-profile={mode}"])
+        self.assertFalse(result.invoked)
+        self.assertEqual(1, result.status)
+        self.assertIn("Unrecognized profile mode", result.output)
+
+    @given(st.one_of(st.integers(max_value=0).map(str), st.text(alphabet="abc-.")))
+    def test_invalid_top(self, top):
+        with mock.patch.dict(os.environ, {"CLIPPY_PROFILE_TOP": top}):
+            result = dispatch(self.module, ["allocate", "10", "--clippy-profile=memory", f"--clippy-profile-output={os.devnull}"])
+            self.assertEqual(1, result.status)
+            self.assertIn("CLIPPY_PROFILE_TOP must be a positive integer", result.output)
+
+            # the variable is only read when profiling
+            self.assertEqual(10, dispatch(self.module, ["allocate", "10"]).value)
+
+    def test_top(self):
+        with mock.patch.dict(os.environ, {"CLIPPY_PROFILE_TOP": "3"}):
+            self.assertEqual(3, create_profiler(ClippyOptions({"profile": "memory"}), "allocate")._top)
+
+
+if __name__ == "__main__":
+    unittest.main()
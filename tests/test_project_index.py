@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for project_index.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from hypothesis import given
+import hypothesis.strategies as st
+
+from clippy import project_index
+from clippy.prefix_index import AmbiguousPrefixError
+from clippy.project_index import ProjectIndex, find_project_index, find_source_files, index_main, index_source_file, load_project_index, \
+    module_name_for, resolve_command, INDEX_FILENAME
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FILES_MODULE = '''"""
+File tools.
+"""
+
+from clippy import begin_clippy, clippy
+
+raise RuntimeError("imported")
+
+
+@clippy
+def copy_file(source: str, target: str, force: bool = False):
+    """Copy a file."""
+    return f"copy {source} {target} {force}"
+
+
+@clippy
+def status():
+    return "files ok"
+
+
+if __name__ == "__main__":
+    begin_clippy()
+'''
+
+NET_MODULE = '''import clippy
+
+LIMIT = 3
+
+
+@clippy.clippy
+def fetch(url, retries=LIMIT):
+    return f"fetch {url} {retries}"
+
+
+@clippy.clippy
+def status():
+    return "net ok"
+
+
+if __name__ == "__main__":
+    clippy.begin_clippy()
+'''
+
+STARRED_MODULE = '''from tools.net import *
+
+
+@clippy.clippy
+def starred():
+    return "starred ok"
+'''
+
+RUN_MODULE = '''from clippy import begin_clippy, clippy
+
+
+@clippy
+def hello():
+    return "hello from run"
+
+
+if __name__ == "__main__":
+    begin_clippy()
+'''
+
+SOURCES = {
+    os.path.join("tools", "files", "copy_tools.py"): FILES_MODULE,
+    os.path.join("tools", "net.py"): NET_MODULE,
+    os.path.join("tools", "plain.py"): "x = 1\n",
+    os.path.join("tools", "starred.py"): STARRED_MODULE,
+    os.path.join("tools", "undecorated.py"): "from os.path import *\n\n\ndef helper():\n    pass\n",
+    "run.py": RUN_MODULE,
+    os.path.join("tools", "mentions.py"): "# clippy is not used here\n",
+    os.path.join("tools", "broken.py"): "from clippy import clippy\ndef (\n",
+    os.path.join(".hidden", "net.py"): NET_MODULE,
+    os.path.join("__pycache__", "net.py"): NET_MODULE,
+    os.path.join("my-scripts", "net.py"): NET_MODULE,
+}
+
+
+def run(arguments, cwd):
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.environ.get("PYTHONPATH", "")]))
+    environment.pop("CLIPPY_INDEX", None)
+    process = subprocess.run([sys.executable, "-m", "clippy"] + arguments, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                             universal_newlines=True, timeout=30, cwd=cwd, env=environment)
+    return process.returncode, process.stdout
+
+
+class TestProjectIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = os.path.realpath(self.directory.name)
+
+        for (name, source) in SOURCES.items():
+            os.makedirs(os.path.dirname(os.path.join(self.root, name)), exist_ok=True)
+
+            with open(os.path.join(self.root, name), "w") as file:
+                file.write(source)
+
+        self.index = ProjectIndex.build([self.root])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_module_name_for(self):
+        self.assertEqual("tools.net", module_name_for("/src", os.path.join("/src", "tools", "net.py")))
+        self.assertEqual("tools", module_name_for("/src", os.path.join("/src", "tools", "__init__.py")))
+        self.assertIsNone(module_name_for("/src", os.path.join("/src", "my-scripts", "net.py")))
+        self.assertIsNone(module_name_for("/src", os.path.join("/src", "__init__.py")))
+
+    def test_find_source_files(self):
+        files = [os.path.relpath(filename, self.root) for (_, filename) in find_source_files([self.root])]
+        self.assertIn(os.path.join("tools", "net.py"), files)
+        self.assertNotIn(os.path.join(".hidden", "net.py"), files)
+        self.assertNotIn(os.path.join("__pycache__", "net.py"), files)
+
+        with self.assertRaises(FileNotFoundError):
+            find_source_files([os.path.join(self.root, "missing")])
+
+    def test_index_source_file(self):
+        module_name, entry = index_source_file(self.root, os.path.join(self.root, "tools", "files", "copy_tools.py"))
+        self.assertEqual("tools.files.copy_tools", module_name)
+        self.assertEqual({"copy_file": "<source> <target> [--force]", "status": ""}, entry["commands"])
+        self.assertEqual(self.root, entry["root"])
+
+    def test_index_source_file_skipped(self):
+        for name in ["plain.py", "mentions.py", "broken.py", "undecorated.py"]:
+            self.assertIsNone(index_source_file(self.root, os.path.join(self.root, "tools", name)))
+
+    def test_build(self):
+        self.assertEqual(["run", "tools.files.copy_tools", "tools.net", "tools.starred"], sorted(self.index.modules.keys()))
+        self.assertEqual({"copy_file": ["tools.files.copy_tools"], "fetch": ["tools.net"], "hello": ["run"],
+                          "status": ["tools.files.copy_tools", "tools.net"]}, self.index.commands)
+
+        # a default that is not a literal leaves only the usage unknown
+        self.assertIsNone(self.index.modules["tools.net"]["commands"]["fetch"])
+
+    def test_build_parallel(self):
+        with mock.patch.object(project_index, "PARALLEL_THRESHOLD", 0):
+            self.assertEqual(self.index.modules, ProjectIndex.build([self.root], 2).modules)
+
+    @given(st.integers(max_value=0))
+    def test_build_invalid_jobs(self, jobs):
+        with self.assertRaises(ValueError):
+            ProjectIndex.build([self.root], jobs)
+
+    def test_find(self):
+        self.assertEqual(("tools.files.copy_tools", "copy_file"), self.index.find("copy_file"))
+        self.assertEqual(("tools.files.copy_tools", "copy_file"), self.index.find("cop"))
+        self.assertEqual(("tools.net", "status"), self.index.find("tools.net:status"))
+
+    def test_find_ambiguous(self):
+        with self.assertRaises(AmbiguousPrefixError) as context:
+            self.index.find("status")
+
+        self.assertEqual(["tools.files.copy_tools:status", "tools.net:status"], context.exception.candidates)
+
+    @given(st.sampled_from(["nothing", "tools.net:copy_file", "tools.none:status", ""]))
+    def test_find_missing(self, name):
+        with self.assertRaises(ValueError):
+            self.index.find(name)
+
+    def test_usage(self):
+        self.assertEqual("Usage:\n\tclippy --run copy_file <source> <target> [--force]\n\tclippy --run fetch [arguments]\n\tclippy --run hello"
+                         "\n\tclippy --run tools.files.copy_tools:status\n\tclippy --run tools.net:status", self.index.usage())
+
+    def test_skipped(self):
+        self.assertEqual({"tools.starred": "Module imports * from tools.net"}, self.index.skipped)
+
+        with self.assertRaises(ValueError) as context:
+            self.index.find("starred")
+
+        self.assertIn("tools.starred", str(context.exception))
+
+    def test_round_trip(self):
+        copy = ProjectIndex.from_dict(json.loads(json.dumps(self.index.to_dict())))
+        self.assertEqual(self.index.commands, copy.commands)
+
+    @given(st.one_of(st.none(), st.integers(), st.dictionaries(st.text(), st.integers())))
+    def test_from_dict_invalid(self, data):
+        with self.assertRaises(ValueError):
+            ProjectIndex.from_dict(data)
+
+    def test_index_main(self):
+        output = os.path.join(self.root, "index.json")
+        self.assertEqual((0, f"Indexed 4 commands in 3 modules to {output}\nSkipped 1 modules whose commands cannot be found without importing "
+                             f"them; run them with `clippy <module>`:\n\ttools.starred: Module imports * from tools.net"),
+                         index_main([self.root, "--output", output]))
+        self.assertEqual(self.index.commands, load_project_index(output).commands)
+        self.assertEqual(1, index_main([self.root, "--jobs=0"])[0])
+        self.assertEqual(1, index_main([self.root, "--other"])[0])
+
+    def test_find_project_index(self):
+        index_main([self.root, f"--output={os.path.join(self.root, INDEX_FILENAME)}"])
+
+        with mock.patch.dict(os.environ):
+            os.environ.pop("CLIPPY_INDEX", None)
+            self.assertEqual(os.path.join(self.root, INDEX_FILENAME), find_project_index(os.path.join(self.root, "tools", "files")))
+            os.environ["CLIPPY_INDEX"] = "elsewhere.json"
+            self.assertEqual("elsewhere.json", find_project_index(self.root))
+
+    def test_resolve_command(self):
+        path = os.path.join(self.root, "index.json")
+        index_main([self.root, "--output", path])
+
+        with mock.patch.dict(os.environ, {"CLIPPY_INDEX": path}):
+            self.assertEqual((0, "", ("tools.net", self.root, ["fetch", "a"])), resolve_command(["fet", "a"]))
+            self.assertEqual((1, self.index.usage(), None), resolve_command([]))
+            self.assertEqual(1, resolve_command(["status"])[0])
+            os.remove(os.path.join(self.root, "tools", "net.py"))
+            self.assertEqual(1, resolve_command(["fetch"])[0])
+
+        with mock.patch.dict(os.environ, {"CLIPPY_INDEX": os.path.join(self.root, "missing.json")}):
+            self.assertEqual(1, resolve_command(["fetch"])[0])
+
+    def test_run(self):
+        self.assertEqual(0, run(["--index"], self.root)[0])
+        self.assertTrue(os.path.isfile(os.path.join(self.root, INDEX_FILENAME)))
+        subdirectory = os.path.join(self.root, "tools")
+        self.assertEqual((0, "fetch u 3\n"), run(["--run", "fetch", "u"], subdirectory))
+        self.assertEqual((0, "net ok\n"), run(["--run", "tools.net:status"], subdirectory))
+
+        # help is read from source, so a module that cannot be imported still shows it
+        status, output = run(["--run", "copy", "--help"], subdirectory)
+        self.assertEqual(0, status)
+        self.assertIn("python -m tools.files.copy_tools copy_file <source> <target> [--force]", output)
+
+    def test_module_named_run(self):
+        # the index commands are spelled as options, so a module named run is run as any other module
+        self.assertEqual((0, "hello from run\n"), run(["run", "hello"], self.root))
+
+
+if __name__ == "__main__":
+    unittest.main()
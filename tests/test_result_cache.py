@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for result_cache.py
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from hypothesis import given
+import hypothesis.strategies as st
+
+from clippy import clippy
+from clippy.dispatch import dispatch
+from clippy.result_cache import ResultCache
+
+CALLS = list()
+
+
+@clippy(cache=True)
+def expensive(arg: int):
+    CALLS.append(arg)
+    return arg * 2
+
+
+@clippy(cache=True, ttl=60)
+def numbers(count: int):
+    CALLS.append(count)
+    return (idx for idx in range(count))
+
+
+def other(arg):
+    return arg
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(self.directory.name)
+        CALLS.clear()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_put_get(self):
+        key = self.cache.key(other, {"arg": 1})
+        self.assertEqual((False, None), self.cache.get(key))
+        self.assertTrue(self.cache.put(key, {"value": [1, 2]}))
+        self.assertEqual((True, {"value": [1, 2]}), self.cache.get(key))
+
+    def test_key(self):
+        self.assertEqual(self.cache.key(other, {"arg": 1}), self.cache.key(other, {"arg": 1}))
+        self.assertNotEqual(self.cache.key(other, {"arg": 1}), self.cache.key(other, {"arg": 2}))
+        self.assertNotEqual(self.cache.key(other, {"arg": 1}), self.cache.key(expensive, {"arg": 1}))
+        self.assertIsNone(self.cache.key(other, {"arg": lambda: None}))
+
+    def test_key_defaults(self):
+        def scaled(arg, factor=1, *, offset=0):
+            return arg * factor + offset
+
+        key = self.cache.key(scaled, {"arg": 1})
+        scaled.__defaults__ = (2,)
+        self.assertNotEqual(key, self.cache.key(scaled, {"arg": 1}))
+        changed = self.cache.key(scaled, {"arg": 1})
+        scaled.__kwdefaults__ = {"offset": 1}
+        self.assertNotEqual(changed, self.cache.key(scaled, {"arg": 1}))
+
+    def test_evict_on_threshold(self):
+        cache = ResultCache(self.directory.name, max_bytes=10000)
+        cache.put(cache.key(other, {"arg": 0}), "x" * 1000)
+
+        with mock.patch.object(ResultCache, "evict") as evict:
+            for idx in range(1, 5):
+                cache.put(cache.key(other, {"arg": idx}), "x" * 1000)
+
+            evict.assert_not_called()
+
+            for idx in range(5, 12):
+                cache.put(cache.key(other, {"arg": idx}), "x" * 1000)
+
+            evict.assert_called()
+
+    def test_ttl(self):
+        key = self.cache.key(other, {"arg": 1})
+        self.cache.put(key, "value")
+
+        with mock.patch("time.time", return_value=9e12):
+            self.assertEqual((False, None), self.cache.get(key, ttl=60))
+
+        self.assertEqual((False, None), self.cache.get(key))
+
+    def test_evict(self):
+        cache = ResultCache(self.directory.name, max_bytes=3000)
+
+        for idx in range(4):
+            key = cache.key(other, {"arg": idx})
+            cache.put(key, "x" * 1000)
+            os.utime(cache._path(key), (idx, idx))  # pylint: disable=protected-access
+
+        cache.evict()
+        self.assertFalse(cache.get(cache.key(other, {"arg": 0}))[0])
+        self.assertTrue(cache.get(cache.key(other, {"arg": 3}))[0])
+
+    def test_unpicklable(self):
+        self.assertFalse(self.cache.put(self.cache.key(other, {"arg": 1}), (idx for idx in range(2))))
+
+    def test_clear(self):
+        key = self.cache.key(other, {"arg": 1})
+        self.cache.put(key, "value")
+        self.cache.clear()
+        self.assertFalse(self.cache.get(key)[0])
+
+    def test_dispatch(self):
+        module = sys.modules[__name__]
+
+        with mock.patch.dict(os.environ, {"CLIPPY_CACHE_DIR": self.directory.name}):
+            self.assertEqual(4, dispatch(module, ["expensive", "2"]).value)
+            self.assertEqual(4, dispatch(module, ["expensive", "2"]).value)
+            self.assertEqual([2], CALLS)
+
+            self.assertEqual(4, dispatch(module, ["expensive", "2", "--clippy-no-cache"]).value)
+            self.assertEqual([2, 2], CALLS)
+
+            self.assertEqual([0, 1], list(dispatch(module, ["numbers", "2"]).value))
+            self.assertEqual([0, 1], list(dispatch(module, ["numbers", "2"]).value))
+            self.assertEqual([2, 2, 2, 2], CALLS)
+
+    @given(st.integers().filter(lambda x: x < 0))
+    def test_negative_size(self, num):
+        with self.assertRaises(ValueError):
+            _ = ResultCache(self.directory.name, max_bytes=num)
+
+    @given(st.integers().filter(lambda x: x <= 0))
+    def test_invalid_ttl(self, num):
+        with self.assertRaises(ValueError):
+            _ = clippy(other, ttl=num)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for rpc.py
+"""
+
+import io
+import json
+import subprocess
+import sys
+import threading
+import unittest
+from contextlib import redirect_stderr
+from hypothesis import given
+import hypothesis.strategies as st
+
+from clippy import clippy
+from clippy.command_module import create_command_module_for_module
+from clippy.rpc import RPCServer, COMMAND_ERROR, INVALID_PARAMS, INVALID_REQUEST, METHOD_NOT_FOUND, PARSE_ERROR
+
+RELEASE = threading.Event()
+
+
+@clippy
+def add(first: int, second: int = 1):
+    return first + second
+
+
+@clippy
+def shout(arg: str):
+    print("shouting")
+    return arg.upper()
+
+
+@clippy
+def count(limit: int):
+    return (idx for idx in range(limit))
+
+
+@clippy
+def wait():
+    RELEASE.wait(10)
+    return "waited"
+
+
+@clippy
+def fail():
+    raise RuntimeError("failed on purpose")
+
+
+@clippy
+def pairs():
+    return {(1, 2): 3}
+
+
+def request(method, params=None, request_id=1):
+    message = {"jsonrpc": "2.0", "method": method, "id": request_id}
+
+    if params is not None:
+        message["params"] = params
+
+    return json.dumps(message)
+
+
+class TestRPC(unittest.TestCase):
+    def setUp(self):
+        self.command_module = create_command_module_for_module(sys.modules[__name__])
+        self.server = RPCServer(self.command_module)
+
+    def serve(self, lines, workers=1):
+        output = io.StringIO()
+        RPCServer(self.command_module, io.StringIO("\n".join(lines) + "\n"), output, workers).serve()
+        return [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_named_params(self):
+        self.assertEqual({"jsonrpc": "2.0", "id": 1, "result": 5}, self.server.handle_line(request("add", {"first": 2, "second": 3})))
+
+    def test_positional_params(self):
+        self.assertEqual(5, self.server.handle_line(request("add", [2, 3]))["result"])
+
+    def test_string_params(self):
+        self.assertEqual(3, self.server.handle_line(request("add", {"first": "2"}))["result"])
+
+    def test_iterator(self):
+        self.assertEqual([0, 1, 2], self.server.handle_line(request("count", {"limit": 3}))["result"])
+
+    def test_pipelined(self):
+        responses = self.serve([request("add", [idx], idx) for idx in range(50)])
+        self.assertEqual([(idx, idx + 1) for idx in range(50)], [(response["id"], response["result"]) for response in responses])
+
+    def test_out_of_order(self):
+        RELEASE.clear()
+        lines = [request("wait", request_id="slow"), request("add", [1], "fast")]
+        output = io.StringIO()
+        server = RPCServer(self.command_module, io.StringIO("\n".join(lines) + "\n"), output, 2)
+        thread = threading.Thread(target=server.serve)
+        thread.start()
+
+        for _ in range(1000):
+            if output.getvalue():
+                break
+
+            thread.join(0.01)
+
+        RELEASE.set()
+        thread.join(10)
+        self.assertEqual(["fast", "slow"], [json.loads(line)["id"] for line in output.getvalue().splitlines()])
+
+    def test_print_goes_to_stderr(self):
+        stderr = io.StringIO()
+
+        with redirect_stderr(stderr):
+            self.assertEqual(["HI"], [response["result"] for response in self.serve([request("shout", ["hi"])])])
+
+        self.assertEqual("shouting\n", stderr.getvalue())
+
+    def test_notification(self):
+        self.assertIsNone(self.server.handle_line(json.dumps({"jsonrpc": "2.0", "method": "add", "params": [1]})))
+
+    def test_batch(self):
+        line = "[" + ",".join([request("add", [1], 1), request("add", [2], 2)]) + "]"
+        self.assertEqual([2, 3], [response["result"] for response in self.server.handle_line(line)])
+
+    def test_empty_batch(self):
+        self.assertEqual(INVALID_REQUEST, self.server.handle_line("[]")["error"]["code"])
+
+    def test_blank_line(self):
+        self.assertIsNone(self.server.handle_line("\n"))
+
+    def test_parse_error(self):
+        self.assertEqual(PARSE_ERROR, self.server.handle_line("{")["error"]["code"])
+
+    def test_invalid_request(self):
+        self.assertEqual(INVALID_REQUEST, self.server.handle_line(json.dumps({"method": "add", "id": 1}))["error"]["code"])
+
+    def test_method_not_found(self):
+        self.assertEqual(METHOD_NOT_FOUND, self.server.handle_line(request("nope"))["error"]["code"])
+
+    def test_invalid_params(self):
+        self.assertEqual(INVALID_PARAMS, self.server.handle_line(request("add", {"second": 1}))["error"]["code"])
+        self.assertEqual(INVALID_PARAMS, self.server.handle_line(request("add", [1, 2, 3]))["error"]["code"])
+
+    def test_command_error(self):
+        response = self.server.handle_line(request("fail"))
+        self.assertEqual(COMMAND_ERROR, response["error"]["code"])
+        self.assertIn("failed on purpose", response["error"]["message"])
+
+    def test_unencodable_result(self):
+        for workers in [1, 2]:
+            responses = self.serve([request("pairs", None, 1), request("add", [1], 2)], workers)
+            self.assertEqual({1: COMMAND_ERROR, 2: None}, {response["id"]: response.get("error", {}).get("code") for response in responses})
+
+    def test_unencodable_batch(self):
+        line = "[" + ",".join([request("pairs", None, 1), request("add", [2], 2)]) + "]"
+        responses = json.loads(self.server.respond(line))
+        self.assertEqual(COMMAND_ERROR, responses[0]["error"]["code"])
+        self.assertEqual(3, responses[1]["result"])
+
+    def test_invalid_workers_option(self):
+        process = subprocess.run([sys.executable, "-m", "examples.simple", "--clippy-rpc", "--clippy-rpc-workers", "many"], input="",
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=30, check=False)
+        self.assertEqual(1, process.returncode)
+        self.assertIn("must be a positive integer", process.stdout)
+        self.assertNotIn("Traceback", process.stderr)
+
+    @given(st.integers(max_value=0))
+    def test_workers_positive(self, workers):
+        with self.assertRaises(ValueError):
+            RPCServer(self.command_module, workers=workers)
+
+    def test_module_required(self):
+        with self.assertRaises(TypeError):
+            RPCServer("module")
+
+    def test_to_string(self):
+        self.assertEqual(f"RPCServer({self.command_module.name!r}, 1)", str(self.server))
+
+    def test_co_process(self):
+        lines = [request("one_parameter", ["a"], 1), request("nope", None, 2)]
+        process = subprocess.run([sys.executable, "-m", "examples.simple", "--clippy-rpc"], input="\n".join(lines) + "\n",
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=30, check=True)
+        responses = [json.loads(line) for line in process.stdout.splitlines()]
+        self.assertEqual("one_parameter arg: a", responses[0]["result"])
+        self.assertEqual(METHOD_NOT_FOUND, responses[1]["error"]["code"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for search.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from hypothesis import given
+import hypothesis.strategies as st
+
+from clippy import clippy
+from clippy.command_module import CommandModule, create_command_module_for_module
+from clippy.dispatch import dispatch
+from clippy.search import SearchIndex, index_path, load_search_index, save_search_index, search_commands, search_index_for, tokenize
+
+
+@clippy
+def parse_csv(path: str, delimiter: str = ","):
+    """
+    Parse rows from a spreadsheet.
+
+    :param path: The file to read.
+    :param delimiter: The character between columns.
+    :return: Every row.
+    """
+    return path, delimiter
+
+
+@clippy
+def write_json(path: str):
+    """
+    Write rows as JSON to a file.
+
+    :param path: The file to write.
+    """
+    return path
+
+
+@clippy
+def parse_json(text: str):
+    """
+    Parse a JSON document.
+    """
+    return text
+
+
+@clippy
+def undocumented(value):
+    return value
+
+
+class TestSearch(unittest.TestCase):
+    def setUp(self):
+        self.command_module = create_command_module_for_module(sys.modules[__name__])
+        self.index = SearchIndex.build(self.command_module)
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "tools.py")
+
+        with open(self.filename, "w") as file:
+            file.write("# tools\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def names(self, terms):
+        return [name for (name, _) in self.index.search(terms)]
+
+    def module_with_file(self):
+        return CommandModule(self.command_module.name, command_list=list(self.command_module.commands.values()), filename=self.filename)
+
+    def test_tokenize(self):
+        self.assertEqual(["parse", "csv", "rows", "file"], tokenize("parse_csv: Rows, from the FILE."))
+        self.assertEqual(list(), tokenize(None))
+        self.assertEqual(list(), tokenize("the of a"))
+
+    def test_search(self):
+        # equal scores are in the order the commands are defined
+        self.assertEqual(["write_json", "parse_json"], self.names("json"))
+        self.assertEqual(["parse_csv", "parse_json"], self.names("parse"))
+
+    def test_search_every_term(self):
+        self.assertEqual(["parse_json"], self.names("parse json"))
+        self.assertEqual(list(), self.names("csv document"))
+
+    def test_search_fields(self):
+        self.assertEqual(["parse_csv"], self.names("columns"))
+        self.assertEqual(["parse_csv"], self.names("every"))
+        self.assertEqual(["parse_csv", "write_json"], sorted(self.names("rows")))
+
+    def test_search_prefix(self):
+        self.assertEqual(["parse_csv"], self.names("spread"))
+        self.assertEqual(["write_json", "parse_json"], self.names("js"))
+
+    def test_search_ranked(self):
+        # a word in a description counts for more than the same word in parameter documentation
+        self.assertEqual(["write_json", "parse_csv"], self.names("file"))
+        self.assertGreater(self.index.search("json")[0][1], self.index.search("js")[0][1])
+        self.assertEqual(1, len(self.index.search("json", 1)))
+
+    def test_search_undocumented(self):
+        self.assertEqual(list(), self.names("documentation provided"))
+        self.assertEqual(["undocumented"], self.names("undocumented"))
+
+    @given(st.text())
+    def test_search_any_text(self, text):
+        for (name, score) in self.index.search(text):
+            self.assertIn(name, self.index.commands)
+            self.assertGreater(score, 0)
+
+    def test_search_invalid(self):
+        with self.assertRaises(TypeError):
+            self.index.search(None)
+
+    def test_render(self):
+        output = self.index.render("csv")
+        self.assertIn(f"python -m {self.command_module.name} parse_csv <path> [--delimiter=<str>]", output)
+        self.assertIn("Parse rows from a spreadsheet.", output)
+        self.assertNotIn("write_json", output)
+        self.assertIsNone(self.index.render("nothing"))
+
+    def test_round_trip(self):
+        data = json.loads(json.dumps(self.index.to_dict()))
+        copy = SearchIndex.from_dict(data)
+        self.assertEqual(self.index.commands, copy.commands)
+        self.assertEqual(self.index.search("parse rows"), copy.search("parse rows"))
+
+    @given(st.one_of(st.none(), st.integers(), st.dictionaries(st.text(), st.integers())))
+    def test_from_dict_invalid(self, data):
+        with self.assertRaises(ValueError):
+            SearchIndex.from_dict(data)
+
+    def test_save_and_load(self):
+        index = SearchIndex.build(self.module_with_file())
+        self.assertTrue(save_search_index(index, self.filename))
+        self.assertTrue(os.path.isfile(index_path(self.filename)))
+        self.assertEqual(os.path.join(self.directory.name, "__pycache__"), os.path.dirname(index_path(self.filename)))
+        self.assertEqual(index.search("json"), load_search_index(self.filename, self.command_module.name).search("json"))
+        self.assertIsNone(load_search_index(self.filename, "other_module"))
+
+    def test_load_stale(self):
+        save_search_index(SearchIndex.build(self.module_with_file()), self.filename)
+
+        with open(self.filename, "a") as file:
+            file.write("# changed\n")
+
+        self.assertIsNone(load_search_index(self.filename))
+
+    def test_load_missing(self):
+        self.assertIsNone(load_search_index(self.filename))
+        self.assertIsNone(load_search_index(os.path.join(self.directory.name, "missing.py")))
+
+        os.makedirs(os.path.dirname(index_path(self.filename)))
+
+        with open(index_path(self.filename), "w") as file:
+            file.write("not json")
+
+        self.assertIsNone(load_search_index(self.filename))
+
+    def test_search_index_for(self):
+        command_module = self.module_with_file()
+        index = search_index_for(command_module)
+        self.assertTrue(os.path.isfile(index_path(self.filename)))
+        self.assertEqual(index.commands, search_index_for(command_module).commands)
+
+    def test_search_commands(self):
+        status, output = search_commands(self.module_with_file(), ["parse", "json"])
+        self.assertEqual(0, status)
+        self.assertIn("parse_json", output)
+        self.assertEqual((1, "No commands match 'missing'"), search_commands(self.module_with_file(), ["missing"]))
+
+    def test_dispatch(self):
+        command_module = self.module_with_file()
+        result = dispatch(command_module, ["--help", "json"])
+        self.assertEqual(0, result.status)
+        self.assertIn("write_json", result.output)
+        self.assertEqual(result.output, dispatch(command_module, ["--clippy-search", "json"]).output)
+        self.assertEqual(1, dispatch(command_module, ["--help", "missing"]).status)
+        self.assertIn("Usage:", dispatch(command_module, ["--help"]).output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for split.py
+"""
+
+import gzip
+import operator
+import os
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, TextIO
+from hypothesis import given
+import hypothesis.strategies as st
+
+from clippy import clippy
+from clippy.dispatch import dispatch
+from clippy.options import ClippyOptions
+from clippy.command_module import create_command_module_for_module
+from clippy import split
+from clippy.split import file_ranges, input_parameter, line_ranges, run_split, split_jobs
+
+
+@clippy(split="lines", reduce=operator.add)
+def count_lines(data: TextIO, prefix: str = ""):
+    return sum(1 for line in data if line.startswith(prefix))
+
+
+@clippy(split="lines", reduce=operator.add)
+def count_bytes(data: memoryview):
+    return len(data)
+
+
+@clippy(split="lines", reduce=operator.add)
+def copy_bytes(data: bytes):
+    return data
+
+
+@clippy(split="lines", reduce=operator.add)
+def each_line(data: BinaryIO):
+    return (line for line in data)
+
+
+@clippy(split="lines", reduce=min)
+def first_line(data: TextIO):
+    return data.readline()
+
+
+@clippy(split="lines", reduce=operator.add)
+def no_file(value):
+    return value
+
+
+@clippy
+def not_split(data: TextIO):
+    return data.read()
+
+
+class TestSplit(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.lines = [f"{idx} {'x' * (idx % 7)}\n" for idx in range(5000)]
+        self.path = self.write("lines.txt", "".join(self.lines).encode())
+        self.commands = create_command_module_for_module(sys.modules[__name__]).commands
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.directory.name, name)
+
+        with open(path, "wb") as file:
+            file.write(data)
+
+        return path
+
+    def run_split(self, name, jobs=3, **arguments):
+        return run_split(self.commands[name], dict(arguments, data=self.path), jobs)
+
+    @given(st.lists(st.binary(max_size=20).map(lambda x: x.replace(b"\n", b"")), max_size=50), st.integers(min_value=1, max_value=20),
+           st.booleans())
+    def test_line_ranges(self, lines, parts, trailing):
+        data = b"\n".join(lines) + (b"\n" if trailing else b"")
+        ranges = line_ranges(data, parts)
+        self.assertLessEqual(len(ranges), parts)
+        self.assertEqual(data, b"".join(data[start:end] for (start, end) in ranges))
+
+        for (_, end) in ranges[:-1]:
+            self.assertEqual(b"\n", data[end - 1:end])
+
+    @given(st.integers(max_value=0))
+    def test_line_ranges_parts(self, parts):
+        with self.assertRaises(ValueError):
+            line_ranges(b"", parts)
+
+    def test_file_ranges(self):
+        self.assertEqual(8, len(file_ranges(self.path, 8)))
+        self.assertIsNone(file_ranges("-", 8))
+        self.assertIsNone(file_ranges(self.write("empty.txt", b""), 8))
+        self.assertIsNone(file_ranges(self.write("lines.gz", gzip.compress(b"a\nb\n")), 8))
+        self.assertIsNone(file_ranges(self.directory.name, 8))
+
+    def test_text(self):
+        self.assertEqual(5000, self.run_split("count_lines"))
+        self.assertEqual(len([line for line in self.lines if line.startswith("1")]), self.run_split("count_lines", prefix="1"))
+
+    def test_text_utf8(self):
+        self.path = self.write("text.txt", "".join(f"\u00e9 {idx}\n" for idx in range(1000)).encode("utf-8"))
+        self.assertEqual(1000, self.run_split("count_lines", prefix="\u00e9"))
+
+    def test_memoryview(self):
+        self.assertEqual(len("".join(self.lines)), self.run_split("count_bytes"))
+
+    def test_bytes(self):
+        self.assertEqual("".join(self.lines).encode(), self.run_split("copy_bytes"))
+
+    def test_generator(self):
+        self.assertEqual([line.encode() for line in self.lines], self.run_split("each_line"))
+
+    def test_result_type(self):
+        # the result is the same whether the file is split or not
+        self.assertEqual(self.lines[0], self.run_split("first_line", 2))
+        self.assertEqual(self.lines[0], dispatch(sys.modules[__name__], ["first_line", self.path]).value)
+
+    def test_unsplittable_file(self):
+        path = self.write("lines.gz", gzip.compress(b"a\nb\n"))
+        self.assertEqual(2, run_split(self.commands["count_lines"], {"data": path}, 3))
+
+    def test_no_file_parameter(self):
+        self.assertIsNone(input_parameter(self.commands["no_file"]))
+
+        with self.assertRaises(ValueError):
+            run_split(self.commands["no_file"], {"value": "a"}, 2)
+
+    def test_split_jobs(self):
+        self.assertEqual(4, split_jobs(self.commands["count_lines"], ClippyOptions({"jobs": "4"})))
+        self.assertEqual(1, split_jobs(self.commands["count_lines"], ClippyOptions()))
+        self.assertEqual(1, split_jobs(self.commands["not_split"], ClippyOptions({"jobs": "4"})))
+
+    @given(st.sampled_from(["0", "-1", "many", ""]))
+    def test_split_jobs_invalid(self, jobs):
+        with self.assertRaises(ValueError):
+            split_jobs(self.commands["count_lines"], ClippyOptions({"jobs": jobs}))
+
+    def test_dispatch(self):
+        self.assertEqual(5000, dispatch(sys.modules[__name__], ["count_lines", self.path, "--clippy-jobs", "2"]).value)
+        self.assertEqual(5000, dispatch(sys.modules[__name__], ["count_lines", self.path]).value)
+
+    def test_threads(self):
+        paths = [self.write(f"lines{idx}.txt", "".join(self.lines[:1000 * idx]).encode()) for idx in range(1, 5)]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda path: dispatch(sys.modules[__name__], ["count_lines", path, "--clippy-jobs", "2"]).value,
+                                        paths * 3))
+
+        self.assertEqual([1000, 2000, 3000, 4000] * 3, results)
+
+        # the job is only held by the worker processes
+        self.assertIsNone(split._JOB)
+
+
+if __name__ == "__main__":
+    unittest.main()
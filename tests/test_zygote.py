@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for zygote.py
+"""
+
+import array
+import base64
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+import unittest
+from hypothesis import given
+import hypothesis.strategies as st
+
+from clippy import clippy
+from clippy.command_module import create_command_module_for_module
+from clippy.zygote import ZygoteServer, current_rss, request, run_request
+
+
+@clippy
+def worker_pid():
+    return os.getpid()
+
+
+@clippy
+def shout(arg: str):
+    print("shouting")
+    return arg.upper()
+
+
+@clippy
+def blob(size: int = 4):
+    print("header")
+    return bytes(range(256 - size, 256))
+
+
+@clippy
+def values():
+    return array.array("d", [1.0, 2.0])
+
+
+@clippy
+def fail():
+    raise RuntimeError("failed on purpose")
+
+
+@clippy
+def leave(code: str = ""):
+    sys.exit(int(code) if code.isdigit() else code or None)
+
+
+def serve_with_signal_in_fork(server):
+    # SIGTERM arrives while fork is running its handlers in the server, as when a server is stopped just as it replaces a worker
+    os.register_at_fork(after_in_parent=lambda: os.kill(os.getpid(), signal.SIGTERM))
+    server.serve_forever()
+
+
+@unittest.skipUnless(hasattr(os, "fork") and hasattr(socket, "AF_UNIX"), "requires fork and Unix domain sockets")
+class TestZygote(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "zygote.sock")
+        self.command_module = create_command_module_for_module(sys.modules[__name__])
+        self.process = None
+
+    def tearDown(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join(10)
+
+        self.directory.cleanup()
+
+    def start(self, **kwargs):
+        server = ZygoteServer(self.command_module, self.path, **kwargs)
+        self.process = multiprocessing.get_context("fork").Process(target=server.serve_forever)
+        self.process.start()
+
+        for _ in range(500):
+            if os.path.exists(self.path):
+                return
+
+            time.sleep(0.01)
+
+        self.fail("server did not start")
+
+    def test_run_request(self):
+        response = run_request(self.command_module, ["shout", "hello"])
+        self.assertEqual({"status": 0, "output": "shouting\nHELLO\n"}, response)
+
+    def test_run_request_format(self):
+        response = run_request(self.command_module, ["shout", "hello", "--clippy-format=json"])
+        self.assertEqual("shouting\n\"HELLO\"\n", response["output"])
+
+    def test_run_request_unrecognized(self):
+        response = run_request(self.command_module, ["nope"])
+        self.assertEqual(1, response["status"])
+        self.assertIn("Unrecognized command nope", response["output"])
+
+    def test_run_request_error(self):
+        response = run_request(self.command_module, ["fail"])
+        self.assertEqual(1, response["status"])
+        self.assertIn("failed on purpose", response["output"])
+
+    def test_run_request_exit(self):
+        self.assertEqual(0, run_request(self.command_module, ["leave"])["status"])
+        self.assertEqual(3, run_request(self.command_module, ["leave", "3"])["status"])
+        self.assertEqual({"status": 1, "output": "stopped\n"}, run_request(self.command_module, ["leave", "stopped"]))
+
+    def test_run_request_binary(self):
+        response = run_request(self.command_module, ["blob", "--clippy-format=raw"])
+        self.assertEqual("base64", response["encoding"])
+        self.assertEqual(b"header\n\xfc\xfd\xfe\xff", base64.b64decode(response["output"]))
+
+        response = run_request(self.command_module, ["values", "--clippy-format=npy"])
+        self.assertEqual(0, response["status"])
+        self.assertTrue(base64.b64decode(response["output"]).startswith(b"\x93NUMPY"))
+
+        # output that happens to be text is sent as text
+        self.assertEqual({"status": 0, "output": "header\n"}, run_request(self.command_module, ["blob", "--size=0", "--clippy-format=raw"]))
+
+    def test_request_binary(self):
+        self.start(workers=1)
+        self.assertEqual((0, b"header\n\xfc\xfd\xfe\xff"), request(self.path, ["blob", "--clippy-format=raw"], timeout=10))
+
+    def test_request(self):
+        self.start(workers=2)
+        self.assertEqual((0, "shouting\nHELLO\n"), request(self.path, ["shout", "hello"], timeout=10))
+        self.assertEqual(1, request(self.path, ["fail"], timeout=10)[0])
+
+    def test_workers_are_forked(self):
+        self.start(workers=2)
+        pid = int(request(self.path, ["worker_pid"], timeout=10)[1])
+        self.assertNotEqual(os.getpid(), pid)
+        self.assertNotEqual(self.process.pid, pid)
+
+    def test_signal_during_fork(self):
+        server = ZygoteServer(self.command_module, self.path, workers=1)
+        self.process = multiprocessing.get_context("fork").Process(target=serve_with_signal_in_fork, args=(server,))
+        self.process.start()
+        self.process.join(10)
+
+        self.assertFalse(self.process.is_alive())
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_recycle_after_max_requests(self):
+        self.start(workers=1, max_requests=1)
+        first = request(self.path, ["worker_pid"], timeout=10)[1]
+        second = request(self.path, ["worker_pid"], timeout=10)[1]
+        self.assertNotEqual(first, second)
+
+    def test_recycle_after_max_rss(self):
+        self.start(workers=1, max_requests=0, max_rss=1)
+        first = request(self.path, ["worker_pid"], timeout=10)[1]
+        second = request(self.path, ["worker_pid"], timeout=10)[1]
+        self.assertNotEqual(first, second)
+
+    def test_invalid_request(self):
+        self.start(workers=1)
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(10)
+            connection.connect(self.path)
+
+            with connection.makefile("rwb") as stream:
+                stream.write(b"{\"arguments\": 5}\n")
+                stream.flush()
+                response = json.loads(stream.readline().decode("utf-8"))
+
+        self.assertEqual(1, response["status"])
+        self.assertIn("Invalid request", response["output"])
+
+    def test_socket_removed_on_exit(self):
+        self.start(workers=1)
+        self.process.terminate()
+        self.process.join(10)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_existing_file_kept(self):
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write("important")
+
+        with self.assertRaises(FileExistsError):
+            ZygoteServer(self.command_module, self.path, workers=1).serve_forever()
+
+        with open(self.path, "r", encoding="utf-8") as file:
+            self.assertEqual("important", file.read())
+
+    def test_stale_socket_replaced(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+            stale.bind(self.path)
+
+        stale_inode = os.stat(self.path).st_ino
+        self.start(workers=1)
+
+        # the stale socket already exists, so wait for the server to replace it
+        for _ in range(500):
+            if os.path.exists(self.path) and os.stat(self.path).st_ino != stale_inode:
+                break
+
+            time.sleep(0.01)
+
+        time.sleep(0.1)
+        self.assertEqual((0, "shouting\nHI\n"), request(self.path, ["shout", "hi"], timeout=10))
+
+    def test_current_rss(self):
+        self.assertGreater(current_rss(), 0)
+
+    def test_path_required(self):
+        with self.assertRaises(ValueError):
+            ZygoteServer(self.command_module, "")
+
+    def test_module_required(self):
+        with self.assertRaises(TypeError):
+            ZygoteServer("module", self.path)
+
+    @given(st.integers(max_value=0))
+    def test_workers_positive(self, workers):
+        with self.assertRaises(ValueError):
+            ZygoteServer(self.command_module, self.path, workers=workers)
+
+    @given(st.floats())
+    def test_workers_not_int(self, workers):
+        with self.assertRaises(TypeError):
+            ZygoteServer(self.command_module, self.path, workers=workers)
+
+    def test_to_string(self):
+        server = ZygoteServer(self.command_module, self.path, workers=3)
+        self.assertEqual(f"ZygoteServer({self.command_module.name!r}, {self.path!r}, 3)", str(server))
+
+
+if __name__ == "__main__":
+    unittest.main()